@@ -4,7 +4,7 @@ Casos de Uso: Empresa
 Orquesta las operaciones CRUD de empresas.
 Trabaja directamente con los modelos Django del dominio.
 """
-from typing import List, Optional
+from typing import List, Optional, NamedTuple
 from dataclasses import dataclass
 from django.db.models import Q
 
@@ -14,6 +14,9 @@ from domain.exceptions import (
     DuplicateEntityException,
     ValidationException
 )
+from infrastructure.replicas import solo_lectura
+from .filas import fila
+from .integridad import unicidad
 
 
 @dataclass
@@ -49,6 +52,15 @@ class EmpresaDTO:
         }
 
 
+@fila
+class EmpresaFila(NamedTuple):
+    """Fila liviana de empresa para listados (ver filas.py)"""
+    nit: str
+    nombre: str
+    direccion: str
+    telefono: str
+
+
 class EmpresaUseCases:
     """
     Casos de uso para operaciones de Empresa.
@@ -62,18 +74,18 @@ class EmpresaUseCases:
         direccion: str,
         telefono: str
     ) -> EmpresaDTO:
-        """Crea una nueva empresa"""
-        if Empresa.objects.filter(nit=nit).exists():
-            raise DuplicateEntityException('Empresa', nit)
-
+        """Crea una nueva empresa (un NIT repetido lo rechaza la llave primaria)"""
         try:
-            empresa = Empresa.objects.create(
-                nit=nit,
-                nombre=nombre,
-                direccion=direccion,
-                telefono=telefono
-            )
+            with unicidad('Empresa', nit):
+                empresa = Empresa.objects.create(
+                    nit=nit,
+                    nombre=nombre,
+                    direccion=direccion,
+                    telefono=telefono
+                )
             return EmpresaDTO.from_model(empresa)
+        except DuplicateEntityException:
+            raise
         except Exception as e:
             raise ValidationException(str(e))
 
@@ -90,16 +102,12 @@ class EmpresaUseCases:
         except Empresa.DoesNotExist:
             raise EntityNotFoundException('Empresa', nit)
 
-        if nombre is not None:
-            empresa.nombre = nombre
-        if direccion is not None:
-            empresa.direccion = direccion
-        if telefono is not None:
-            empresa.telefono = telefono
-
-        empresa.save()
+        empresa.aplicar_cambios(nombre=nombre, direccion=direccion, telefono=telefono)
+        # Solo las columnas que cambiaron; sin cambios no se escribe ni se agrega un bloque
+        empresa.guardar_cambios()
         return EmpresaDTO.from_model(empresa)
 
+    @solo_lectura
     def obtener_empresa(self, nit: str) -> EmpresaDTO:
         """Obtiene una empresa por NIT"""
         try:
@@ -108,11 +116,18 @@ class EmpresaUseCases:
         except Empresa.DoesNotExist:
             raise EntityNotFoundException('Empresa', nit)
 
+    @solo_lectura
     def listar_empresas(self) -> List[EmpresaDTO]:
         """Lista todas las empresas"""
         empresas = Empresa.objects.all()
         return [EmpresaDTO.from_model(e) for e in empresas]
 
+    @solo_lectura
+    def listar_filas(self) -> List[EmpresaFila]:
+        """Lista las empresas como filas livianas (ruta rápida de lectura)"""
+        return list(map(EmpresaFila._make, Empresa.objects.values_list(*EmpresaFila._fields)))
+
+    @solo_lectura
     def buscar_empresas(self, termino: str) -> List[EmpresaDTO]:
         """Busca empresas por término"""
         empresas = Empresa.objects.filter(
@@ -130,6 +145,7 @@ class EmpresaUseCases:
         except Empresa.DoesNotExist:
             raise EntityNotFoundException('Empresa', nit)
 
+    @solo_lectura
     def contar_empresas(self) -> int:
         """Cuenta el total de empresas"""
         return Empresa.objects.count()
@@ -0,0 +1,23 @@
+"""
+Filas livianas para listados.
+
+Las rutas rápidas de lectura traen tuplas con ``values_list`` y las mapean
+a NamedTuples (``__slots__`` vacío, sin ``__dict__`` por instancia), sin
+instanciar modelos ni dataclasses. Para responder, cada tipo de fila tiene
+un ``to_dict`` compilado una sola vez que arma el dict con un literal en
+lugar de recorrer los campos fila por fila.
+"""
+
+
+def _compilar_to_dict(campos):
+    """Genera ``to_dict(fila)`` que devuelve ``{campo: fila[i], ...}``"""
+    cuerpo = ', '.join(f'{campo!r}: fila[{i}]' for i, campo in enumerate(campos))
+    namespace = {}
+    exec(f'def to_dict(fila):\n    return {{{cuerpo}}}', namespace)
+    return namespace['to_dict']
+
+
+def fila(cls):
+    """Decorador que agrega a una NamedTuple su ``to_dict`` compilado"""
+    cls.to_dict = _compilar_to_dict(cls._fields)
+    return cls
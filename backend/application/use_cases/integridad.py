@@ -0,0 +1,44 @@
+"""
+Errores de integridad de la base de datos como excepciones de dominio.
+
+La unicidad (NIT, código de producto, empresa-producto en inventario,
+producto-moneda en precios) la garantizan las restricciones de la base de
+datos, no consultas previas: los casos de uso escriben dentro de
+``unicidad(...)`` y una violación llega como DuplicateEntityException.
+"""
+from contextlib import contextmanager
+
+from django.db import IntegrityError, transaction
+
+from domain.exceptions import DuplicateEntityException
+
+# SQLSTATE unique_violation de PostgreSQL
+UNIQUE_VIOLATION = '23505'
+
+
+def es_violacion_de_unicidad(error: IntegrityError) -> bool:
+    """True si el IntegrityError viene de una restricción única o de la llave primaria"""
+    causa = error.__cause__
+    # psycopg 3 expone sqlstate; psycopg2, pgcode
+    codigo = getattr(causa, 'sqlstate', None) or getattr(causa, 'pgcode', None)
+    if codigo is not None:
+        return codigo == UNIQUE_VIOLATION
+    # SQLite: "UNIQUE constraint failed: tabla.columna"
+    return 'UNIQUE constraint failed' in str(error)
+
+
+@contextmanager
+def unicidad(entidad: str, identificador):
+    """
+    Ejecuta el bloque en un savepoint y traduce las violaciones de unicidad.
+
+    El savepoint deja usable la transacción que lo rodea (en PostgreSQL
+    un error aborta la transacción completa).
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError as e:
+        if es_violacion_de_unicidad(e):
+            raise DuplicateEntityException(entidad, identificador) from e
+        raise
@@ -4,9 +4,9 @@ Casos de Uso: Inventario
 Orquesta las operaciones CRUD de inventario.
 Trabaja directamente con los modelos Django del dominio.
 """
-from typing import List, Optional
+from typing import Iterator, List, Optional, NamedTuple
 from dataclasses import dataclass
-from django.db.models import Sum
+from django.db.models import Count, Q, Subquery, Sum
 
 from domain.models import Inventario, Empresa, Producto
 from domain.exceptions import (
@@ -15,6 +15,9 @@ from domain.exceptions import (
     ValidationException,
     BusinessRuleViolationException
 )
+from infrastructure.replicas import solo_lectura
+from .filas import fila
+from .integridad import unicidad
 
 
 @dataclass
@@ -58,6 +61,25 @@ class InventarioDTO:
         }
 
 
+@fila
+class InventarioFila(NamedTuple):
+    """Fila liviana de inventario para listados (ver filas.py)"""
+    id: int
+    empresa: str
+    empresa_nombre: str
+    producto: str
+    producto_nombre: str
+    cantidad: int
+    ubicacion: str
+
+
+# Columnas de values_list en el orden de InventarioFila
+_COLUMNAS_FILA = (
+    'id', 'empresa_id', 'empresa__nombre', 'producto__codigo',
+    'producto__nombre', 'cantidad', 'ubicacion',
+)
+
+
 class InventarioUseCases:
     """
     Casos de uso para operaciones de Inventario.
@@ -71,34 +93,40 @@ class InventarioUseCases:
         cantidad: int,
         ubicacion: str = ""
     ) -> InventarioDTO:
-        """Crea un nuevo registro de inventario"""
-        # Verificar empresa
-        try:
-            empresa = Empresa.objects.get(nit=empresa_nit)
-        except Empresa.DoesNotExist:
-            raise EntityNotFoundException('Empresa', empresa_nit)
+        """
+        Crea un registro de inventario.
 
-        # Verificar producto
-        try:
-            producto = Producto.objects.get(codigo=producto_codigo)
-        except Producto.DoesNotExist:
+        Empresa y producto se resuelven en una sola consulta que trae solo
+        lo que necesita el DTO; el par empresa-producto repetido lo rechaza
+        la restricción única.
+        """
+        productos = Producto.objects.filter(codigo=producto_codigo).order_by()
+        empresas = Empresa.objects.filter(nit=empresa_nit).annotate(
+            producto_id=Subquery(productos.values('id')[:1]),
+            producto_nombre=Subquery(productos.values('nombre')[:1]),
+        )
+        fila = empresas.values_list('nombre', 'producto_id', 'producto_nombre').first()
+        if fila is None:
+            raise EntityNotFoundException('Empresa', empresa_nit)
+        empresa_nombre, producto_id, producto_nombre = fila
+        if producto_id is None:
             raise EntityNotFoundException('Producto', producto_codigo)
 
-        # Verificar duplicado
-        if Inventario.objects.filter(empresa=empresa, producto=producto).exists():
-            raise DuplicateEntityException(
-                'Inventario',
-                f'{empresa_nit}-{producto_codigo}'
-            )
-
+        # Instancias diferidas: el DTO y la señal de blockchain no las vuelven a consultar
+        inventario = Inventario(
+            empresa=Empresa.from_db(empresas.db, ['nit', 'nombre'], [empresa_nit, empresa_nombre]),
+            producto=Producto.from_db(
+                empresas.db, ['id', 'codigo', 'nombre'], [producto_id, producto_codigo, producto_nombre]
+            ),
+            cantidad=cantidad,
+            ubicacion=ubicacion or ""
+        )
         try:
-            inventario = Inventario.objects.create(
-                empresa=empresa,
-                producto=producto,
-                cantidad=cantidad,
-                ubicacion=ubicacion or ""
-            )
+            with unicidad('Inventario', f'{empresa_nit}-{producto_codigo}'):
+                inventario.save(force_insert=True)
             return InventarioDTO.from_model(inventario)
+        except DuplicateEntityException:
+            raise
         except Exception as e:
             raise ValidationException(str(e))
 
@@ -114,12 +142,9 @@ class InventarioUseCases:
         except Inventario.DoesNotExist:
             raise EntityNotFoundException('Inventario', id)
 
-        if cantidad is not None:
-            inventario.cantidad = cantidad
-        if ubicacion is not None:
-            inventario.ubicacion = ubicacion
-
-        inventario.save()
+        inventario.aplicar_cambios(cantidad=cantidad, ubicacion=ubicacion)
+        # Solo las columnas que cambiaron; sin cambios no se escribe ni se agrega un bloque
+        inventario.guardar_cambios()
         return InventarioDTO.from_model(inventario)
 
     def incrementar_stock(self, id: int, cantidad: int) -> InventarioDTO:
@@ -132,8 +157,8 @@ class InventarioUseCases:
         if cantidad < 0:
             raise ValidationException("La cantidad a incrementar no puede ser negativa")
 
-        inventario.cantidad += cantidad
-        inventario.save()
+        inventario.aplicar_cambios(cantidad=inventario.cantidad + cantidad)
+        inventario.guardar_cambios()
         return InventarioDTO.from_model(inventario)
 
     def decrementar_stock(self, id: int, cantidad: int) -> InventarioDTO:
@@ -152,10 +177,11 @@ class InventarioUseCases:
                 f"Stock insuficiente. Disponible: {inventario.cantidad}, Solicitado: {cantidad}"
             )
 
-        inventario.cantidad -= cantidad
-        inventario.save()
+        inventario.aplicar_cambios(cantidad=inventario.cantidad - cantidad)
+        inventario.guardar_cambios()
         return InventarioDTO.from_model(inventario)
 
+    @solo_lectura
     def obtener_registro(self, id: int) -> InventarioDTO:
         """Obtiene un registro por ID"""
         try:
@@ -164,11 +190,13 @@ class InventarioUseCases:
         except Inventario.DoesNotExist:
             raise EntityNotFoundException('Inventario', id)
 
+    @solo_lectura
     def listar_inventario(self) -> List[InventarioDTO]:
         """Lista todo el inventario"""
         inventarios = Inventario.objects.select_related('empresa', 'producto').all()
         return [InventarioDTO.from_model(i) for i in inventarios]
 
+    @solo_lectura
     def listar_por_empresa(self, empresa_nit: str) -> List[InventarioDTO]:
         """Lista inventario de una empresa"""
         inventarios = Inventario.objects.select_related('empresa', 'producto').filter(
@@ -176,6 +204,28 @@ class InventarioUseCases:
         )
         return [InventarioDTO.from_model(i) for i in inventarios]
 
+    @solo_lectura
+    def listar_filas(self, empresa_nit: Optional[str] = None) -> List[InventarioFila]:
+        """Lista el inventario como filas livianas (ruta rápida de lectura)"""
+        inventarios = Inventario.objects.all()
+        if empresa_nit is not None:
+            inventarios = inventarios.filter(empresa_id=empresa_nit)
+        return list(map(InventarioFila._make, inventarios.values_list(*_COLUMNAS_FILA)))
+
+    @solo_lectura
+    def iterar_filas(
+        self,
+        empresa_nit: Optional[str] = None,
+        tamano_lote: int = 2000
+    ) -> Iterator[InventarioFila]:
+        """Recorre el inventario como filas livianas leyendo con un cursor"""
+        inventarios = Inventario.objects.all()
+        if empresa_nit is not None:
+            inventarios = inventarios.filter(empresa_id=empresa_nit)
+        columnas = inventarios.values_list(*_COLUMNAS_FILA).iterator(chunk_size=tamano_lote)
+        return map(InventarioFila._make, columnas)
+
+    @solo_lectura
     def listar_con_stock(self) -> List[InventarioDTO]:
         """Lista registros con stock disponible"""
         inventarios = Inventario.objects.select_related('empresa', 'producto').filter(
@@ -183,6 +233,7 @@ class InventarioUseCases:
         )
         return [InventarioDTO.from_model(i) for i in inventarios]
 
+    @solo_lectura
     def listar_sin_stock(self) -> List[InventarioDTO]:
         """Lista registros sin stock"""
         inventarios = Inventario.objects.select_related('empresa', 'producto').filter(
@@ -199,6 +250,7 @@ class InventarioUseCases:
         except Inventario.DoesNotExist:
             raise EntityNotFoundException('Inventario', id)
 
+    @solo_lectura
     def verificar_disponibilidad(
         self,
         empresa_nit: str,
@@ -215,6 +267,27 @@ class InventarioUseCases:
         except Inventario.DoesNotExist:
             return False
 
+    @solo_lectura
+    def resumen_stock(
+        self,
+        empresa_nit: Optional[str] = None,
+        producto_codigo: Optional[str] = None
+    ) -> dict:
+        """Registros, unidades y registros sin stock en una sola consulta agregada"""
+        inventarios = Inventario.objects.all()
+        if empresa_nit is not None:
+            inventarios = inventarios.filter(empresa_id=empresa_nit)
+        if producto_codigo is not None:
+            inventarios = inventarios.filter(producto__codigo=producto_codigo)
+        resumen = inventarios.aggregate(
+            registros=Count('id'),
+            unidades=Sum('cantidad'),
+            sin_stock=Count('id', filter=Q(cantidad=0)),
+        )
+        resumen['unidades'] = resumen['unidades'] or 0
+        return resumen
+
+    @solo_lectura
     def obtener_estadisticas(self) -> dict:
         """Obtiene estadísticas de inventario"""
         total_registros = Inventario.objects.count()
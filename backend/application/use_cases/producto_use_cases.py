@@ -4,7 +4,9 @@ Casos de Uso: Producto
 Orquesta las operaciones CRUD de productos.
 Trabaja directamente con los modelos Django del dominio.
 """
-from typing import List, Optional
+from collections import defaultdict
+from itertools import islice
+from typing import Iterator, List, Optional, NamedTuple
 from dataclasses import dataclass, field
 from decimal import Decimal
 from django.db.models import Q
@@ -16,6 +18,9 @@ from domain.exceptions import (
     ValidationException,
     BusinessRuleViolationException
 )
+from infrastructure.replicas import solo_lectura
+from .filas import fila
+from .integridad import unicidad
 
 
 @dataclass
@@ -55,7 +60,14 @@ class ProductoDTO:
     updated_at: Optional[str] = None
 
     @classmethod
-    def from_model(cls, producto: Producto) -> 'ProductoDTO':
+    def from_model(
+        cls,
+        producto: Producto,
+        precios: Optional[List[PrecioProducto]] = None
+    ) -> 'ProductoDTO':
+        """``precios`` evita la consulta cuando ya se tienen (p. ej. recién creados)"""
+        if precios is None:
+            precios = producto.precios.all()
         return cls(
             id=producto.id,
             codigo=producto.codigo,
@@ -63,7 +75,7 @@ class ProductoDTO:
             caracteristicas=producto.caracteristicas,
             empresa=producto.empresa_id,
             empresa_nombre=producto.empresa.nombre if producto.empresa else "",
-            precios=[PrecioDTO.from_model(p) for p in producto.precios.all()],
+            precios=[PrecioDTO.from_model(p) for p in precios],
             created_at=producto.created_at.isoformat() if producto.created_at else None,
             updated_at=producto.updated_at.isoformat() if producto.updated_at else None,
         )
@@ -82,6 +94,34 @@ class ProductoDTO:
         }
 
 
+@fila
+class ProductoFila(NamedTuple):
+    """Fila liviana de producto para listados (ver filas.py)"""
+    id: int
+    codigo: str
+    nombre: str
+    caracteristicas: str
+    empresa: str
+    empresa_nombre: str
+    precios: List[dict]
+
+
+# Columnas de values_list en el orden de ProductoFila (sin precios)
+_COLUMNAS_FILA = ('id', 'codigo', 'nombre', 'caracteristicas', 'empresa_id', 'empresa__nombre')
+
+
+def _precios_por_producto(precios):
+    """Agrupa los precios (como dicts) por id de producto"""
+    por_producto = defaultdict(list)
+    for producto_id, precio_id, moneda, precio in precios.order_by('id').values_list(
+        'producto_id', 'id', 'moneda', 'precio'
+    ):
+        por_producto[producto_id].append(
+            {'id': precio_id, 'moneda': moneda, 'precio': float(precio)}
+        )
+    return por_producto
+
+
 class ProductoUseCases:
     """
     Casos de uso para operaciones de Producto.
@@ -96,35 +136,42 @@ class ProductoUseCases:
         empresa_nit: str,
         precios: Optional[List[dict]] = None
     ) -> ProductoDTO:
-        """Crea un nuevo producto"""
-        # Verificar que la empresa existe
-        try:
-            empresa = Empresa.objects.get(nit=empresa_nit)
-        except Empresa.DoesNotExist:
-            raise EntityNotFoundException('Empresa', empresa_nit)
+        """
+        Crea un producto con sus precios.
 
-        # Verificar código único
-        if Producto.objects.filter(codigo=codigo).exists():
-            raise DuplicateEntityException('Producto', codigo)
+        La empresa se verifica leyendo solo su nombre (lo necesita el DTO)
+        y el código repetido lo rechaza la restricción única: producto y
+        precios se insertan en un savepoint, los precios con un solo INSERT.
+        """
+        monedas = [p['moneda'] for p in precios or []]
+        if len(set(monedas)) != len(monedas):
+            raise ValidationException('Hay monedas repetidas en los precios', field='precios')
 
-        try:
-            producto = Producto.objects.create(
-                codigo=codigo,
-                nombre=nombre,
-                caracteristicas=caracteristicas or "",
-                empresa=empresa
-            )
-
-            # Crear precios si se proporcionan
-            if precios:
-                for p in precios:
-                    PrecioProducto.objects.create(
-                        producto=producto,
-                        moneda=p['moneda'],
-                        precio=Decimal(str(p['precio']))
-                    )
+        empresas = Empresa.objects.filter(nit=empresa_nit)
+        empresa_nombre = empresas.values_list('nombre', flat=True).first()
+        if empresa_nombre is None:
+            raise EntityNotFoundException('Empresa', empresa_nit)
 
-            return ProductoDTO.from_model(producto)
+        producto = Producto(
+            codigo=codigo,
+            nombre=nombre,
+            caracteristicas=caracteristicas or "",
+            # Instancia diferida: el DTO y la señal de blockchain no la vuelven a consultar
+            empresa=Empresa.from_db(empresas.db, ['nit', 'nombre'], [empresa_nit, empresa_nombre])
+        )
+        try:
+            with unicidad('Producto', codigo):
+                producto.save(force_insert=True)
+                nuevos = [
+                    PrecioProducto(producto=producto, moneda=p['moneda'], precio=Decimal(str(p['precio'])))
+                    for p in precios or []
+                ]
+                for precio in nuevos:
+                    precio.validar()
+                PrecioProducto.objects.bulk_create(nuevos)
+            return ProductoDTO.from_model(producto, precios=nuevos)
+        except DuplicateEntityException:
+            raise
         except Exception as e:
             raise ValidationException(str(e))
 
@@ -140,12 +187,9 @@ class ProductoUseCases:
         except Producto.DoesNotExist:
             raise EntityNotFoundException('Producto', id)
 
-        if nombre is not None:
-            producto.nombre = nombre
-        if caracteristicas is not None:
-            producto.caracteristicas = caracteristicas
-
-        producto.save()
+        producto.aplicar_cambios(nombre=nombre, caracteristicas=caracteristicas)
+        # Solo las columnas que cambiaron; sin cambios no se escribe ni se agrega un bloque
+        producto.guardar_cambios()
         return ProductoDTO.from_model(producto)
 
     def agregar_precio(
@@ -179,6 +223,7 @@ class ProductoUseCases:
         PrecioProducto.objects.filter(producto=producto, moneda=moneda).delete()
         return ProductoDTO.from_model(producto)
 
+    @solo_lectura
     def obtener_producto(self, id: int) -> ProductoDTO:
         """Obtiene un producto por ID"""
         try:
@@ -187,6 +232,7 @@ class ProductoUseCases:
         except Producto.DoesNotExist:
             raise EntityNotFoundException('Producto', id)
 
+    @solo_lectura
     def obtener_por_codigo(self, codigo: str) -> ProductoDTO:
         """Obtiene un producto por código"""
         try:
@@ -195,11 +241,13 @@ class ProductoUseCases:
         except Producto.DoesNotExist:
             raise EntityNotFoundException('Producto', codigo)
 
+    @solo_lectura
     def listar_productos(self) -> List[ProductoDTO]:
         """Lista todos los productos"""
         productos = Producto.objects.select_related('empresa').prefetch_related('precios').all()
         return [ProductoDTO.from_model(p) for p in productos]
 
+    @solo_lectura
     def listar_por_empresa(self, empresa_nit: str) -> List[ProductoDTO]:
         """Lista productos de una empresa"""
         productos = Producto.objects.select_related('empresa').prefetch_related('precios').filter(
@@ -207,6 +255,75 @@ class ProductoUseCases:
         )
         return [ProductoDTO.from_model(p) for p in productos]
 
+    @solo_lectura
+    def listar_filas(self, empresa_nit: Optional[str] = None) -> List[ProductoFila]:
+        """
+        Lista productos como filas livianas (ruta rápida de lectura).
+
+        Los precios se traen en una segunda consulta de tuplas y se
+        agrupan por producto, igual que el prefetch pero sin modelos.
+        """
+        productos = Producto.objects.all()
+        precios = PrecioProducto.objects.all()
+        if empresa_nit is not None:
+            productos = productos.filter(empresa_id=empresa_nit)
+            precios = precios.filter(producto__empresa_id=empresa_nit)
+
+        por_producto = _precios_por_producto(precios)
+        return [
+            ProductoFila(*columnas, por_producto.get(columnas[0], []))
+            for columnas in productos.values_list(*_COLUMNAS_FILA)
+        ]
+
+    @solo_lectura
+    def iterar_filas(
+        self,
+        empresa_nit: Optional[str] = None,
+        tamano_lote: int = 1000
+    ) -> Iterator[ProductoFila]:
+        """
+        Recorre los productos como filas livianas sin cargarlos todos.
+
+        Los productos se leen con un cursor (``iterator``) y los precios
+        se consultan por lotes de ``tamano_lote`` productos, así la memoria
+        no crece con el tamaño del catálogo.
+        """
+        productos = Producto.objects.all()
+        if empresa_nit is not None:
+            productos = productos.filter(empresa_id=empresa_nit)
+        columnas = productos.values_list(*_COLUMNAS_FILA).iterator(chunk_size=tamano_lote)
+
+        while True:
+            lote = list(islice(columnas, tamano_lote))
+            if not lote:
+                return
+            por_producto = _precios_por_producto(
+                PrecioProducto.objects.filter(producto_id__in=[c[0] for c in lote])
+            )
+            for c in lote:
+                yield ProductoFila(*c, por_producto.get(c[0], []))
+
+    @solo_lectura
+    def listar_identificadores(self) -> List[tuple]:
+        """(código, nombre, NIT de la empresa) de todos los productos"""
+        return list(Producto.objects.values_list('codigo', 'nombre', 'empresa_id'))
+
+    @solo_lectura
+    def resumen_por_empresa(self, empresa_nit: str, limite: int = 5) -> dict:
+        """Cantidad de productos de una empresa y los nombres de los primeros ``limite``"""
+        productos = Producto.objects.filter(empresa_id=empresa_nit)
+        return {
+            'total': productos.count(),
+            'nombres': list(productos.order_by('nombre').values_list('nombre', flat=True)[:limite]),
+        }
+
+    @solo_lectura
+    def precios_por_codigo(self, codigo: str) -> List[dict]:
+        """Precios de un producto (como dicts) sin cargar el producto"""
+        por_producto = _precios_por_producto(PrecioProducto.objects.filter(producto__codigo=codigo))
+        return next(iter(por_producto.values()), [])
+
+    @solo_lectura
     def buscar_productos(self, termino: str) -> List[ProductoDTO]:
         """Busca productos por término"""
         productos = Producto.objects.select_related('empresa').prefetch_related('precios').filter(
@@ -6,6 +6,7 @@ router = DefaultRouter()
 router.register('blockchain', BlockchainViewSet, basename='blockchain')
 
 urlpatterns = [
-    path('', include(router.urls)),
+    # Rutas personalizadas ANTES del router
     path('blockchain/registrar/', RegistrarTransaccionView.as_view(), name='registrar-transaccion'),
+    path('', include(router.urls)),
 ]
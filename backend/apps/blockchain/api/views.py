@@ -7,6 +7,8 @@ from rest_framework.decorators import action
 
 from apps.blockchain.models import RegistroBlockchain
 from apps.users.api.permissions import IsAdminRole
+from infrastructure.replicas import solo_lectura
+from infrastructure.streaming import StreamingJSONResponse, acepta_streaming
 from .serializers import RegistroBlockchainSerializer, VerificarIntegridadSerializer
 
 
@@ -16,13 +18,36 @@ class BlockchainViewSet(ReadOnlyModelViewSet):
     serializer_class = RegistroBlockchainSerializer
     permission_classes = [AllowAny]
 
+    @solo_lectura
+    def list(self, request, *args, **kwargs):
+        """La cadena crece con cada escritura: se responde en streaming"""
+        if not acepta_streaming(request):
+            return super().list(request, *args, **kwargs)
+        return StreamingJSONResponse(request, self._iterar_registros())
+
+    @solo_lectura
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @solo_lectura
+    def _iterar_registros(self):
+        campos = RegistroBlockchainSerializer.Meta.fields
+        # Mismo formato de fecha que el serializer (zona horaria local)
+        timestamp = RegistroBlockchainSerializer().fields['timestamp']
+        for valores in self.get_queryset().values_list(*campos).iterator(chunk_size=2000):
+            registro = dict(zip(campos, valores))
+            registro['timestamp'] = timestamp.to_representation(registro['timestamp'])
+            yield registro
+
     @action(detail=False, methods=['get'])
+    @solo_lectura
     def verificar(self, request):
         """Verificar integridad de la cadena"""
         resultado = RegistroBlockchain.verificar_integridad()
         return Response(resultado)
 
     @action(detail=False, methods=['get'])
+    @solo_lectura
     def estadisticas(self, request):
         """Obtener estadísticas de la blockchain"""
         from django.db.models import Count
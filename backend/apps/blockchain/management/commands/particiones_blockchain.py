@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from apps.blockchain.models import RegistroBlockchain
+from infrastructure import particiones
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea por adelantado las particiones mensuales del registro de la blockchain '
+        'y las muestra (solo PostgreSQL). Pensado para correr periódicamente'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--meses', type=int, default=settings.BLOCKCHAIN_MESES_ADELANTE,
+            help='Meses futuros que deben tener partición'
+        )
+        parser.add_argument(
+            '--particionar', action='store_true',
+            help='Convertir la tabla si todavía no está particionada'
+        )
+        parser.add_argument(
+            '--desparticionar', action='store_true',
+            help='Volver a una tabla sin particiones'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('El particionamiento solo está disponible en PostgreSQL')
+
+        tabla = RegistroBlockchain._meta.db_table
+        hoy = timezone.now().date()
+        hasta = particiones.sumar_meses(hoy, options['meses'])
+        particionada = particiones.esta_particionada(connection, tabla)
+
+        if options['desparticionar']:
+            if particionada:
+                with transaction.atomic():
+                    particiones.desparticionar(connection, tabla, columna_id='indice')
+                self.stdout.write(self.style.SUCCESS(f'La tabla {tabla} ya no está particionada'))
+            return
+
+        if not particionada:
+            if not options['particionar']:
+                raise CommandError(f'La tabla {tabla} no está particionada (use --particionar)')
+            primero = RegistroBlockchain.objects.aggregate(primero=Min('timestamp'))['primero']
+            with transaction.atomic():
+                particiones.particionar_por_mes(
+                    connection, tabla, 'timestamp',
+                    desde=primero.date() if primero else hoy, hasta=hasta, columna_id='indice'
+                )
+            self.stdout.write(self.style.SUCCESS(f'La tabla {tabla} quedó particionada por mes'))
+        else:
+            creadas = particiones.crear_particiones_mensuales(connection, tabla, hoy, hasta)
+            for nombre in creadas:
+                self.stdout.write(self.style.SUCCESS(f'Partición creada: {nombre}'))
+
+        for nombre, limites, filas, tamano in particiones.listar_particiones(connection, tabla):
+            self.stdout.write(f'{nombre}  {limites}  ~{filas} filas  {tamano // 1024} KB')
@@ -1,37 +1,67 @@
-import threading
+from contextvars import ContextVar
 
-_user = threading.local()
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from rest_framework.exceptions import AuthenticationFailed
+
+from apps.users.authentication import autenticar_request
+
+# Un valor por contexto: cada request (hilo en WSGI, tarea en ASGI) ve el suyo
+_usuario_actual = ContextVar('usuario_actual', default=None)
 
 
 class CurrentUserMiddleware:
     """
-    Middleware para almacenar el usuario actual en una variable thread-local
+    Middleware para almacenar el usuario actual en una variable de contexto
     Permite acceder al usuario desde cualquier parte del código (signals, models, etc.)
-    Soporta autenticación JWT de DRF
+    Soporta autenticación JWT de DRF: el token se valida una sola vez y
+    la vista reutiliza el resultado (ver apps.users.authentication)
+
+    Funciona en modo síncrono (WSGI) y asíncrono (ASGI); el valor se
+    restablece al terminar cada request.
     """
+    sync_capable = True
+    async_capable = True
 
     def __init__(self, get_response):
         self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        user = getattr(request, 'user', None)
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = _usuario_actual.set(resolver_usuario(request))
+        try:
+            return self.get_response(request)
+        finally:
+            _usuario_actual.reset(token)
+
+    async def __acall__(self, request):
+        # La sesión y la caché de usuarios pueden consultar la base de datos
+        token = _usuario_actual.set(await sync_to_async(resolver_usuario)(request))
+        try:
+            return await self.get_response(request)
+        finally:
+            _usuario_actual.reset(token)
+
+
+def resolver_usuario(request):
+    """Usuario de la sesión o, si es anónimo, el del token JWT"""
+    user = getattr(request, 'user', None)
 
-        # Si el usuario es anónimo, intentar autenticación JWT
-        if not user or not user.is_authenticated:
-            try:
-                from rest_framework_simplejwt.authentication import JWTAuthentication
-                jwt_auth = JWTAuthentication()
-                auth_result = jwt_auth.authenticate(request)
-                if auth_result:
-                    user = auth_result[0]
-            except Exception:
-                pass
+    # Si el usuario es anónimo, intentar autenticación JWT
+    if not user or not user.is_authenticated:
+        try:
+            auth_result = autenticar_request(request)
+            if auth_result:
+                user = auth_result[0]
+        except AuthenticationFailed:
+            pass
 
-        _user.value = user
-        response = self.get_response(request)
-        return response
+    return user
 
 
 def get_current_user():
     """Obtiene el usuario actual del request"""
-    return getattr(_user, 'value', None)
+    return _usuario_actual.get()
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0002_alter_registroblockchain_timestamp_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='registroblockchain',
+            index=models.Index(fields=['tipo', 'timestamp'], name='blockchain_tipo_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registroblockchain',
+            index=models.Index(fields=['timestamp'], name='blockchain_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:05
+
+from django.conf import settings
+from django.db import migrations
+from django.db.models import Min
+from django.utils import timezone
+
+from infrastructure import particiones
+
+
+def particionar(apps, schema_editor):
+    """
+    Particiona el registro por mes de timestamp (solo PostgreSQL y con
+    settings.BLOCKCHAIN_PARTICIONAR_POR_MES).
+
+    Crea un mes por partición desde el primer bloque hasta
+    BLOCKCHAIN_MESES_ADELANTE meses en el futuro, más una partición por
+    defecto; los meses siguientes los crea el comando particiones_blockchain.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql' or not settings.BLOCKCHAIN_PARTICIONAR_POR_MES:
+        return
+    RegistroBlockchain = apps.get_model('blockchain', 'RegistroBlockchain')
+    tabla = RegistroBlockchain._meta.db_table
+    if particiones.esta_particionada(connection, tabla):
+        return
+    hoy = timezone.now().date()
+    primero = RegistroBlockchain.objects.aggregate(primero=Min('timestamp'))['primero']
+    particiones.particionar_por_mes(
+        connection, tabla, 'timestamp',
+        desde=primero.date() if primero else hoy,
+        hasta=particiones.sumar_meses(hoy, settings.BLOCKCHAIN_MESES_ADELANTE),
+        columna_id='indice',
+    )
+
+
+def desparticionar(apps, schema_editor):
+    connection = schema_editor.connection
+    tabla = apps.get_model('blockchain', 'RegistroBlockchain')._meta.db_table
+    if particiones.esta_particionada(connection, tabla):
+        particiones.desparticionar(connection, tabla, columna_id='indice')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blockchain', '0003_indices_tipo_timestamp'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
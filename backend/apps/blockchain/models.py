@@ -2,6 +2,9 @@ from django.db import models
 from django.utils import timezone
 import hashlib
 import json
+import time
+
+from apps.monitoring.metrics import BLOCKCHAIN_APPEND
 
 
 class RegistroBlockchain(models.Model):
@@ -35,6 +38,11 @@ class RegistroBlockchain(models.Model):
         verbose_name = 'Registro Blockchain'
         verbose_name_plural = 'Registros Blockchain'
         ordering = ['-indice']
+        indexes = [
+            # Estadísticas por tipo y filtros del admin por tipo y fecha
+            models.Index(fields=['tipo', 'timestamp'], name='blockchain_tipo_ts_idx'),
+            models.Index(fields=['timestamp'], name='blockchain_timestamp_idx'),
+        ]
 
     def __str__(self):
         return f"Bloque #{self.indice} - {self.tipo}"
@@ -46,7 +54,10 @@ class RegistroBlockchain(models.Model):
         return hashlib.sha256(contenido.encode()).hexdigest()
 
     def save(self, *args, **kwargs):
-        if not self.hash_actual:
+        nuevo = not self.hash_actual
+        inicio = time.perf_counter()
+
+        if nuevo:
             # Asignar timestamp ANTES de calcular el hash
             if not self.timestamp:
                 self.timestamp = timezone.now()
@@ -69,6 +80,9 @@ class RegistroBlockchain(models.Model):
 
         super().save(*args, **kwargs)
 
+        if nuevo:
+            BLOCKCHAIN_APPEND.observe(time.perf_counter() - inicio)
+
     @classmethod
     def verificar_integridad(cls):
         """Verifica la integridad de toda la cadena"""
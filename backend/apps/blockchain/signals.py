@@ -13,21 +13,39 @@ def get_username():
     """Obtiene el email del usuario actual o 'sistema' si no hay usuario"""
     user = get_current_user()
     if user and user.is_authenticated:
-        return user.email
+        # User y UsuarioToken (tokens sin estado) devuelven el email
+        return user.get_username()
     return 'sistema'
 
 
+def get_cambios(instance):
+    """
+    Diferencia de una actualización parcial ({campo: {'antes', 'despues'}}),
+    o None si la instancia se guardó completa (el bloque lleva la foto entera)
+    """
+    if not instance.cambios:
+        return None
+    return {
+        campo: {'antes': antes, 'despues': despues}
+        for campo, (antes, despues) in instance.cambios.items()
+    }
+
+
 # Signals para Empresa
 @receiver(post_save, sender=Empresa)
 def registrar_empresa(sender, instance, created, **kwargs):
     """Registra creación o modificación de empresa en blockchain"""
     tipo = 'empresa_creada' if created else 'empresa_modificada'
-    datos = {
-        'nit': instance.nit,
-        'nombre': instance.nombre,
-        'direccion': instance.direccion,
-        'telefono': instance.telefono,
-    }
+    cambios = None if created else get_cambios(instance)
+    if cambios:
+        datos = {'nit': instance.nit, 'cambios': cambios}
+    else:
+        datos = {
+            'nit': instance.nit,
+            'nombre': instance.nombre,
+            'direccion': instance.direccion,
+            'telefono': instance.telefono,
+        }
     RegistroBlockchain.registrar_transaccion(
         tipo=tipo,
         datos=datos,
@@ -40,12 +58,16 @@ def registrar_empresa(sender, instance, created, **kwargs):
 def registrar_producto(sender, instance, created, **kwargs):
     """Registra creación o modificación de producto en blockchain"""
     tipo = 'producto_creado' if created else 'producto_modificado'
-    datos = {
-        'id': instance.id,
-        'codigo': instance.codigo,
-        'nombre': instance.nombre,
-        'empresa': instance.empresa.nit if instance.empresa else None,
-    }
+    cambios = None if created else get_cambios(instance)
+    if cambios:
+        datos = {'id': instance.id, 'codigo': instance.codigo, 'cambios': cambios}
+    else:
+        datos = {
+            'id': instance.id,
+            'codigo': instance.codigo,
+            'nombre': instance.nombre,
+            'empresa': instance.empresa.nit if instance.empresa else None,
+        }
     RegistroBlockchain.registrar_transaccion(
         tipo=tipo,
         datos=datos,
@@ -61,9 +83,13 @@ def registrar_inventario(sender, instance, created, **kwargs):
         'id': instance.id,
         'empresa': instance.empresa.nit if instance.empresa else None,
         'producto': instance.producto.nombre if instance.producto else None,
-        'cantidad': instance.cantidad,
-        'ubicacion': instance.ubicacion,
     }
+    cambios = None if created else get_cambios(instance)
+    if cambios:
+        datos['cambios'] = cambios
+    else:
+        datos['cantidad'] = instance.cantidad
+        datos['ubicacion'] = instance.ubicacion
     RegistroBlockchain.registrar_transaccion(
         tipo='inventario_actualizado',
         datos=datos,
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from apps.chatbot.models import ConversacionChat, MensajeChat
 
@@ -11,17 +12,88 @@ class MensajeChatSerializer(serializers.ModelSerializer):
         read_only_fields = ['timestamp']
 
 
-class ConversacionChatSerializer(serializers.ModelSerializer):
-    """Serializer para conversaciones"""
-    mensajes = MensajeChatSerializer(many=True, read_only=True)
+class ConversacionBaseSerializer(serializers.ModelSerializer):
+    """Datos de la conversación, sin mensajes"""
 
     class Meta:
         model = ConversacionChat
-        fields = ['id', 'session_id', 'usuario', 'created_at', 'mensajes']
+        fields = ['id', 'session_id', 'usuario', 'created_at']
         read_only_fields = ['created_at']
 
 
+class ConversacionChatSerializer(ConversacionBaseSerializer):
+    """Serializer para conversaciones con todos sus mensajes"""
+    mensajes = MensajeChatSerializer(many=True, read_only=True)
+
+    class Meta(ConversacionBaseSerializer.Meta):
+        fields = ConversacionBaseSerializer.Meta.fields + ['mensajes']
+
+
+class UltimoMensajeSerializer(serializers.Serializer):
+    """Último mensaje de una conversación, de las anotaciones del queryset"""
+    tipo = serializers.CharField(source='ultimo_tipo')
+    mensaje = serializers.CharField(source='ultimo_mensaje')
+    timestamp = serializers.DateTimeField(source='ultimo_timestamp')
+
+    def to_representation(self, instance):
+        if instance.ultimo_timestamp is None:
+            return None
+        return super().to_representation(instance)
+
+
+class ConversacionResumenSerializer(ConversacionBaseSerializer):
+    """
+    Resumen de una conversación para listados.
+
+    Requiere las anotaciones ``total_mensajes``, ``ultimo_tipo``,
+    ``ultimo_mensaje`` y ``ultimo_timestamp`` (ver ConversacionViewSet).
+    """
+    total_mensajes = serializers.IntegerField(read_only=True)
+    ultimo_mensaje = UltimoMensajeSerializer(source='*', read_only=True)
+
+    class Meta(ConversacionBaseSerializer.Meta):
+        fields = ConversacionBaseSerializer.Meta.fields + ['total_mensajes', 'ultimo_mensaje']
+
+
 class EnviarMensajeSerializer(serializers.Serializer):
     """Serializer para enviar mensaje al chatbot"""
     message = serializers.CharField(required=True)
     session_id = serializers.CharField(required=False)
+    # False: no usar la caché de respuestas (se consulta el webhook)
+    cache = serializers.BooleanField(required=False, default=True)
+
+
+class CursorField(serializers.DateTimeField):
+    """
+    Cursor del historial: ``<timestamp ISO 8601>,<id>`` como lo devuelve
+    ``cursores``, o solo el timestamp. Se convierte en (timestamp, id o None).
+    """
+    default_error_messages = {
+        'id_invalido': 'El id del cursor debe ser un entero.',
+    }
+
+    def to_internal_value(self, value):
+        id_mensaje = None
+        if isinstance(value, str):
+            value, _, id_mensaje = value.partition(',')
+            # El '+' de la zona horaria llega como espacio si no se codificó en la URL
+            if 'T' in value:
+                value = value.strip().replace(' ', '+')
+            if id_mensaje:
+                try:
+                    id_mensaje = int(id_mensaje)
+                except ValueError:
+                    self.fail('id_invalido')
+            else:
+                id_mensaje = None
+        return super().to_internal_value(value), id_mensaje
+
+
+class HistorialParamsSerializer(serializers.Serializer):
+    """Parámetros de paginación del historial de una sesión"""
+    before = CursorField(required=False)
+    after = CursorField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1)
+
+    def validate_limit(self, value):
+        return min(value, settings.CHATBOT_HISTORY_MAX_PAGE_SIZE)
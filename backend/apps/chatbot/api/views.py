@@ -1,169 +1,382 @@
-import requests
+import json
 import uuid
+from asgiref.sync import sync_to_async
 from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.views import APIView
 from rest_framework.viewsets import ReadOnlyModelViewSet
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.conf import settings
+from django.db.models import Count, OuterRef, Prefetch, Q, Subquery
+from django.http import HttpResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
+from apps.chatbot.cache import cache_respuestas
+from apps.chatbot.consultas import es_consulta_de_datos, responder_con_datos
 from apps.chatbot.models import ConversacionChat, MensajeChat
+from apps.chatbot.persistencia import aguardar_mensajes, buffer_mensajes, guardar_mensajes
+from apps.chatbot.respuestas import respuesta_local
+from apps.chatbot.webhook import aconsultar_webhook, astream_webhook, consultar_webhook, stream_webhook
+from apps.monitoring.metrics import CHATBOT_CACHE, CHATBOT_RESPUESTAS
+from apps.users.authentication import autenticar_request
+from infrastructure.renderers import FastJSONRenderer
+from infrastructure.streaming import EventStreamResponse, acepta_eventos, es_asgi, evento_sse
 from .serializers import (
+    ConversacionBaseSerializer,
     ConversacionChatSerializer,
+    ConversacionResumenSerializer,
+    HistorialParamsSerializer,
     MensajeChatSerializer,
     EnviarMensajeSerializer
 )
 
 
-class ChatbotView(APIView):
-    """Vista para interactuar con el chatbot de n8n"""
-    permission_classes = [AllowAny]
+@method_decorator(csrf_exempt, name='dispatch')
+class ChatbotView(View):
+    """
+    Vista asíncrona para interactuar con el chatbot de n8n
+
+    Mientras el webhook responde el worker sigue atendiendo otros
+    requests. Es una vista de Django (DRF no soporta vistas asíncronas):
+    autentica con el mismo JWT que ya validó CurrentUserMiddleware y
+    responde con el renderer JSON de la API.
+
+    Con ``Accept: text/event-stream`` (o ``?stream=true``) responde con
+    Server-Sent Events: un evento ``delta`` por fragmento si el webhook
+    responde en streaming y un ``done`` final con el mismo cuerpo que la
+    respuesta JSON. Si el webhook no hace streaming solo se envía ``done``.
+    Bajo WSGI los eventos salen de un generador síncrono que recorre el
+    servidor (uno asíncrono se acumularía entero); bajo ASGI, de uno
+    asíncrono.
+
+    Las consultas de datos (stock, precios, productos de una empresa) se
+    responden con los datos del sistema y las preguntas repetidas desde la
+    caché de respuestas, en ambos casos sin llamar al webhook;
+    ``"cache": false`` en el cuerpo o ``Cache-Control: no-cache`` saltean
+    la caché.
+    """
+    http_method_names = ['post', 'options']
+
+    async def post(self, request):
+        try:
+            user = await _usuario_del_request(request)
+        except AuthenticationFailed as e:
+            return _respuesta_json(
+                {'detail': e.detail}, status.HTTP_401_UNAUTHORIZED,
+                headers={'WWW-Authenticate': 'Bearer realm="api"'}
+            )
 
-    def post(self, request):
-        serializer = EnviarMensajeSerializer(data=request.data)
+        datos = _leer_datos(request)
+        if datos is None:
+            return _respuesta_json({'detail': 'JSON inválido'}, status.HTTP_400_BAD_REQUEST)
+
+        serializer = EnviarMensajeSerializer(data=datos)
         if not serializer.is_valid():
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return _respuesta_json(serializer.errors, status.HTTP_400_BAD_REQUEST)
 
         mensaje = serializer.validated_data['message']
         session_id = serializer.validated_data.get('session_id') or str(uuid.uuid4())
 
         # Obtener o crear conversación
-        conversacion, _ = ConversacionChat.objects.get_or_create(
+        conversacion, _ = await ConversacionChat.objects.aget_or_create(
             session_id=session_id,
-            defaults={'usuario': request.user if request.user.is_authenticated else None}
-        )
-
-        # Guardar mensaje del usuario
-        MensajeChat.objects.create(
-            conversacion=conversacion,
-            tipo='user',
-            mensaje=mensaje
+            defaults={'usuario_id': user.pk if user else None}
         )
 
-        # Llamar al webhook de n8n
-        try:
-            webhook_url = settings.CHATBOT_WEBHOOK_URL
-            payload = {"message": mensaje}
-            headers = {"Content-Type": "application/json"}
-
-            response = requests.post(
-                webhook_url,
-                json=payload,
-                headers=headers,
-                timeout=10
+        origen = 'datos'
+        respuesta = None
+        if settings.CHATBOT_DATA_ANSWERS:
+            respuesta = await sync_to_async(responder_con_datos)(mensaje)
+        if respuesta is None:
+            origen = 'cache'
+            respuesta = _buscar_en_cache(request, serializer.validated_data)
+        pregunta = MensajeChat(conversacion=conversacion, tipo='user', mensaje=mensaje)
+        asgi = es_asgi(request)
+        if respuesta is not None:
+            await aguardar_mensajes(
+                pregunta, MensajeChat(conversacion=conversacion, tipo='bot', mensaje=respuesta)
             )
+            CHATBOT_RESPUESTAS.inc(origen)
+            cuerpo = {'session_id': session_id, 'response': respuesta, 'success': True}
+            if acepta_eventos(request):
+                evento = evento_sse('done', cuerpo)
+                return EventStreamResponse(_unico(evento) if asgi else [evento])
+            return _respuesta_json(cuerpo)
 
-            if response.status_code == 200:
-                # Intentar obtener respuesta como JSON o texto
-                try:
-                    bot_response = response.json()
-                    if isinstance(bot_response, dict):
-                        respuesta = bot_response.get('response', bot_response.get('message', str(bot_response)))
-                    else:
-                        respuesta = str(bot_response)
-                except:
-                    respuesta = response.text
-
-                # Guardar respuesta del bot
-                MensajeChat.objects.create(
-                    conversacion=conversacion,
-                    tipo='bot',
-                    mensaje=respuesta
-                )
-
-                return Response({
-                    'session_id': session_id,
-                    'response': respuesta,
-                    'success': True
-                })
-            else:
-                # Fallback: respuesta local
-                respuesta = self._get_fallback_response(mensaje)
-                MensajeChat.objects.create(
-                    conversacion=conversacion,
-                    tipo='bot',
-                    mensaje=respuesta
-                )
-                return Response({
-                    'session_id': session_id,
-                    'response': respuesta,
-                    'success': True
-                })
-
-        except (requests.exceptions.Timeout, requests.exceptions.RequestException):
-            # Fallback: respuesta local cuando n8n no está disponible
-            respuesta = self._get_fallback_response(mensaje)
-            MensajeChat.objects.create(
-                conversacion=conversacion,
-                tipo='bot',
-                mensaje=respuesta
-            )
-            return Response({
-                'session_id': session_id,
-                'response': respuesta,
-                'success': True
-            })
+        if acepta_eventos(request):
+            # La pregunta se guarda aunque el cliente se desconecte durante el stream
+            await aguardar_mensajes(pregunta)
+            if asgi:
+                return EventStreamResponse(_aeventos_del_bot(conversacion, mensaje))
+            return EventStreamResponse(_eventos_del_bot(conversacion, mensaje))
+
+        # Llamar al webhook de n8n; si no responde, respuesta local
+        if asgi:
+            respuesta = await aconsultar_webhook(mensaje)
+        else:
+            # Bajo WSGI el loop de esta vista dura un request: cliente síncrono del proceso
+            respuesta = await sync_to_async(consultar_webhook, thread_sensitive=False)(mensaje)
+        return _respuesta_json(await _aguardar_respuesta(conversacion, mensaje, respuesta, pregunta))
+
+
+def _buscar_en_cache(request, datos):
+    """Respuesta cacheada para el mensaje, o None si no hay o se pidió saltear la caché"""
+    if not settings.CHATBOT_CACHE_ENABLED:
+        return None
+    if not datos['cache'] or 'no-cache' in request.headers.get('Cache-Control', ''):
+        CHATBOT_CACHE.inc('bypass')
+        return None
+    mensaje = datos['message']
+    # Las consultas de datos dependen de la entidad nombrada: solo la misma pregunta
+    respuesta = cache_respuestas.obtener(mensaje, exacta=es_consulta_de_datos(mensaje))
+    CHATBOT_CACHE.inc('miss' if respuesta is None else 'hit')
+    return respuesta
 
-    def _get_fallback_response(self, mensaje):
-        """Genera respuestas locales cuando n8n no está disponible"""
-        mensaje_lower = mensaje.lower()
 
-        if any(word in mensaje_lower for word in ['hola', 'buenos', 'buenas', 'hey', 'hi']):
-            return "¡Hola! Soy el asistente virtual de Lite Thinking. ¿En qué puedo ayudarte hoy? Puedo informarte sobre empresas, productos, inventario o el sistema en general."
+def _respuesta_a_guardar(conversacion, mensaje, respuesta, pregunta):
+    """
+    Mensajes a guardar, origen y cuerpo de la respuesta del bot (la local si es None).
 
-        elif any(word in mensaje_lower for word in ['empresa', 'empresas', 'compañía', 'nit']):
-            return "El módulo de Empresas te permite gestionar las compañías registradas. Puedes agregar empresas con su NIT, nombre, dirección y teléfono. Solo los administradores pueden crear, editar o eliminar empresas."
+    ``pregunta`` es el mensaje del usuario si todavía no se guardó: se
+    escribe junto con la respuesta.
+    """
+    origen = 'webhook'
+    if respuesta is None:
+        respuesta = respuesta_local(mensaje)
+        origen = 'fallback'
+    elif settings.CHATBOT_CACHE_ENABLED:
+        # También tras un bypass: la respuesta nueva reemplaza a la cacheada
+        cache_respuestas.guardar(mensaje, respuesta)
 
-        elif any(word in mensaje_lower for word in ['producto', 'productos', 'catálogo', 'precio']):
-            return "El módulo de Productos te permite gestionar el catálogo con precios en múltiples monedas (USD, EUR, COP). Cada producto está asociado a una empresa y tiene código único, nombre, características y precios."
+    mensajes = [MensajeChat(conversacion=conversacion, tipo='bot', mensaje=respuesta)]
+    if pregunta is not None:
+        mensajes.insert(0, pregunta)
+    cuerpo = {
+        'session_id': conversacion.session_id,
+        'response': respuesta,
+        'success': True
+    }
+    return mensajes, origen, cuerpo
 
-        elif any(word in mensaje_lower for word in ['inventario', 'stock', 'cantidad', 'pdf', 'email']):
-            return "El módulo de Inventario te permite controlar el stock de productos. Puedes descargar reportes en PDF y enviarlos por correo electrónico. Se registra cada movimiento de inventario."
 
-        elif any(word in mensaje_lower for word in ['blockchain', 'integridad', 'hash', 'verificar']):
-            return "El módulo de Blockchain verifica la integridad de los datos mediante hashes SHA-256. Cada registro de inventario se almacena en una cadena de bloques para garantizar trazabilidad y seguridad."
+def _guardar_respuesta(conversacion, mensaje, respuesta, pregunta=None):
+    """Guarda la respuesta del bot y devuelve el cuerpo de la respuesta"""
+    mensajes, origen, cuerpo = _respuesta_a_guardar(conversacion, mensaje, respuesta, pregunta)
+    guardar_mensajes(*mensajes)
+    CHATBOT_RESPUESTAS.inc(origen)
+    return cuerpo
 
-        elif any(word in mensaje_lower for word in ['usuario', 'admin', 'rol', 'permiso', 'login']):
-            return "El sistema tiene dos roles: Administrador (acceso completo a CRUD) y Externo (solo lectura). Los usuarios se autentican con email y contraseña encriptada mediante JWT."
 
-        elif any(word in mensaje_lower for word in ['ayuda', 'help', 'qué puedes', 'funciones']):
-            return "Puedo ayudarte con información sobre:\n• Gestión de Empresas\n• Catálogo de Productos\n• Control de Inventario\n• Verificación Blockchain\n• Usuarios y permisos\n\n¿Sobre qué tema te gustaría saber más?"
+async def _aguardar_respuesta(conversacion, mensaje, respuesta, pregunta=None):
+    """Versión asíncrona de ``_guardar_respuesta``"""
+    mensajes, origen, cuerpo = _respuesta_a_guardar(conversacion, mensaje, respuesta, pregunta)
+    await aguardar_mensajes(*mensajes)
+    CHATBOT_RESPUESTAS.inc(origen)
+    return cuerpo
 
-        elif any(word in mensaje_lower for word in ['gracias', 'thanks', 'genial', 'perfecto']):
-            return "¡De nada! Estoy aquí para ayudarte. ¿Hay algo más en lo que pueda asistirte?"
 
-        elif any(word in mensaje_lower for word in ['adiós', 'chao', 'bye', 'hasta luego']):
-            return "¡Hasta pronto! Fue un placer ayudarte. Vuelve cuando necesites asistencia."
+async def _unico(evento):
+    yield evento
 
+
+def _eventos_del_bot(conversacion, mensaje):
+    """
+    Eventos SSE de la respuesta del bot.
+
+    El mensaje del bot se guarda al terminar el stream con el texto
+    completo; si el cliente se desconecta antes no se guarda.
+    """
+    fragmentos = []
+    respuesta = None
+    for tipo, texto in stream_webhook(mensaje):
+        if tipo == 'delta':
+            fragmentos.append(texto)
+            yield evento_sse('delta', {'text': texto})
         else:
-            return "Entiendo tu consulta. Soy el asistente de Lite Thinking y puedo ayudarte con información sobre empresas, productos, inventario, blockchain y usuarios. ¿Podrías ser más específico sobre lo que necesitas?"
+            respuesta = texto
+    if fragmentos:
+        respuesta = ''.join(fragmentos)
+
+    yield evento_sse('done', _guardar_respuesta(conversacion, mensaje, respuesta))
+
+
+async def _aeventos_del_bot(conversacion, mensaje):
+    """Versión asíncrona de ``_eventos_del_bot`` (ASGI)"""
+    fragmentos = []
+    respuesta = None
+    async for tipo, texto in astream_webhook(mensaje):
+        if tipo == 'delta':
+            fragmentos.append(texto)
+            yield evento_sse('delta', {'text': texto})
+        else:
+            respuesta = texto
+    if fragmentos:
+        respuesta = ''.join(fragmentos)
+
+    yield evento_sse('done', await _aguardar_respuesta(conversacion, mensaje, respuesta))
+
+
+async def _usuario_del_request(request):
+    """Usuario de la sesión o del token JWT (None si es anónimo)"""
+    user = await request.auser()
+    if user.is_authenticated:
+        return user
+    # Memorizado: CurrentUserMiddleware ya validó el token
+    resultado = await sync_to_async(autenticar_request)(request)
+    return resultado[0] if resultado else None
+
+
+def _leer_datos(request):
+    """Cuerpo del request como dict (JSON o formulario); None si el JSON es inválido"""
+    if request.content_type == 'application/json':
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+    return request.POST
+
+
+def _respuesta_json(datos, status_code=status.HTTP_200_OK, headers=None):
+    return HttpResponse(
+        FastJSONRenderer().render(datos),
+        status=status_code,
+        content_type='application/json',
+        headers=headers
+    )
 
 
 class ConversacionViewSet(ReadOnlyModelViewSet):
-    """ViewSet para ver historial de conversaciones"""
+    """
+    ViewSet para ver historial de conversaciones
+
+    El listado devuelve un resumen por conversación (cantidad de mensajes y
+    último mensaje, anotados en la misma consulta). Con ``?mensajes=true``
+    incluye todos los mensajes, precargados con una consulta adicional; el
+    detalle siempre los incluye. Para sesiones largas conviene el historial
+    paginado (HistorialChatView).
+    """
     serializer_class = ConversacionChatSerializer
     permission_classes = [IsAuthenticated]
 
+    def _con_mensajes(self):
+        return self.action == 'retrieve' or self.request.query_params.get('mensajes') == 'true'
+
+    def get_serializer_class(self):
+        if self._con_mensajes():
+            return ConversacionChatSerializer
+        return ConversacionResumenSerializer
+
     def get_queryset(self):
+        # Los mensajes en el buffer de este proceso también son historial
+        buffer_mensajes.vaciar()
         # Solo mostrar conversaciones del usuario autenticado
         if self.request.user.is_authenticated:
             if self.request.user.is_admin:
-                return ConversacionChat.objects.all()
-            return ConversacionChat.objects.filter(usuario=self.request.user)
-        return ConversacionChat.objects.none()
+                queryset = ConversacionChat.objects.all()
+            else:
+                queryset = ConversacionChat.objects.filter(usuario_id=self.request.user.pk)
+        else:
+            return ConversacionChat.objects.none()
+
+        if self._con_mensajes():
+            return queryset.prefetch_related(
+                Prefetch('mensajes', queryset=MensajeChat.objects.order_by('timestamp', 'id'))
+            )
+        ultimo = MensajeChat.objects.filter(
+            conversacion=OuterRef('pk')
+        ).order_by('-timestamp', '-id')
+        return queryset.annotate(
+            total_mensajes=Count('mensajes'),
+            ultimo_tipo=Subquery(ultimo.values('tipo')[:1]),
+            ultimo_mensaje=Subquery(ultimo.values('mensaje')[:1]),
+            ultimo_timestamp=Subquery(ultimo.values('timestamp')[:1]),
+        )
 
 
 class HistorialChatView(APIView):
-    """Vista para obtener historial de una sesión específica"""
+    """
+    Vista para obtener historial de una sesión específica
+
+    Paginado por cursor sobre (timestamp, id) de los mensajes (usa el
+    índice conversación + timestamp, sin OFFSET):
+
+    GET /api/chatbot/historial/<session_id>/                  - Últimos N mensajes
+    GET /api/chatbot/historial/<session_id>/?before=<cursor>  - N mensajes anteriores
+    GET /api/chatbot/historial/<session_id>/?after=<cursor>   - N mensajes posteriores
+
+    N es ``limit`` (CHATBOT_HISTORY_PAGE_SIZE por defecto, con tope
+    CHATBOT_HISTORY_MAX_PAGE_SIZE). Los mensajes van siempre en orden
+    cronológico; ``cursores`` trae ``<timestamp>,<id>`` del primero y del
+    último para pedir la página anterior o la siguiente (el id desempata
+    los mensajes con el mismo timestamp; un timestamp solo también es un
+    cursor válido) y ``hay_mas`` indica si quedan mensajes en la dirección
+    pedida.
+    """
     permission_classes = [AllowAny]
 
     def get(self, request, session_id):
+        params = HistorialParamsSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
         try:
             conversacion = ConversacionChat.objects.get(session_id=session_id)
-            serializer = ConversacionChatSerializer(conversacion)
-            return Response(serializer.data)
         except ConversacionChat.DoesNotExist:
             return Response(
                 {'error': 'Conversación no encontrada'},
                 status=status.HTTP_404_NOT_FOUND
             )
+
+        buffer_mensajes.vaciar()
+        limite = params.validated_data.get('limit', settings.CHATBOT_HISTORY_PAGE_SIZE)
+        pagina, hay_mas = _pagina_de_mensajes(
+            conversacion, limite,
+            before=params.validated_data.get('before'),
+            after=params.validated_data.get('after'),
+        )
+        mensajes = MensajeChatSerializer(pagina, many=True).data
+
+        datos = ConversacionBaseSerializer(conversacion).data
+        datos['mensajes'] = mensajes
+        datos['hay_mas'] = hay_mas
+        datos['cursores'] = {
+            'before': _cursor(mensajes[0]) if mensajes else None,
+            'after': _cursor(mensajes[-1]) if mensajes else None,
+        }
+        return Response(datos)
+
+
+def _pagina_de_mensajes(conversacion, limite, before=None, after=None):
+    """
+    Página de mensajes de la conversación en orden cronológico y si quedan más.
+
+    Sin ``after`` se recorre hacia atrás desde ``before`` (o desde el final);
+    con ``after`` hacia adelante. Se pide un mensaje de más para saber si
+    quedan otros sin contar. Los cursores son (timestamp, id), el mismo
+    orden de la página; con id None se compara solo el timestamp.
+    """
+    mensajes = MensajeChat.objects.filter(conversacion=conversacion)
+    if before is not None:
+        timestamp, id_mensaje = before
+        anteriores = Q(timestamp__lt=timestamp)
+        if id_mensaje is not None:
+            anteriores |= Q(timestamp=timestamp, id__lt=id_mensaje)
+        mensajes = mensajes.filter(anteriores)
+    if after is not None:
+        timestamp, id_mensaje = after
+        posteriores = Q(timestamp__gt=timestamp)
+        if id_mensaje is not None:
+            posteriores |= Q(timestamp=timestamp, id__gt=id_mensaje)
+        pagina = list(mensajes.filter(posteriores).order_by('timestamp', 'id')[:limite + 1])
+        return pagina[:limite], len(pagina) > limite
+
+    pagina = list(mensajes.order_by('-timestamp', '-id')[:limite + 1])
+    return pagina[:limite][::-1], len(pagina) > limite
+
+
+def _cursor(mensaje):
+    """Cursor ``<timestamp>,<id>`` de un mensaje serializado"""
+    return f"{mensaje['timestamp']},{mensaje['id']}"
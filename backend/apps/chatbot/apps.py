@@ -5,3 +5,6 @@ class ChatbotConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.chatbot'
     verbose_name = 'Chatbot IA'
+
+    def ready(self):
+        import apps.chatbot.signals  # noqa
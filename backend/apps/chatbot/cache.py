@@ -0,0 +1,171 @@
+"""
+Caché de respuestas del chatbot para preguntas repetidas.
+
+Las preguntas se normalizan (minúsculas, sin tildes ni puntuación) y se
+comparan primero por igualdad y luego por similitud de conjuntos de
+palabras (Jaccard, sin stopwords), así "¿Qué productos hay?" y "que
+productos hay" comparten respuesta. La similitud nunca une preguntas que
+difieren en lo que identifican (códigos, números, NIT, nombres propios):
+"stock de PROD-001" no devuelve la respuesta de "stock de PROD-002". La caché es por proceso, con TTL
+(CHATBOT_CACHE_TTL) y desalojo LRU (CHATBOT_CACHE_MAX). Solo se guardan
+respuestas del webhook: el webhook recibe únicamente el mensaje, así que
+su respuesta no depende de la sesión ni del usuario.
+"""
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+
+# Bytes que no son letras ni dígitos ASCII pasan a ser espacios; \x01 marca la ñ
+_SEPARADORES = bytes(
+    b if b in b'abcdefghijklmnopqrstuvwxyz0123456789\x01' else 32 for b in range(256)
+)
+
+# Palabras que no distinguen una pregunta de otra
+STOPWORDS = frozenset(
+    'a al como con cual cuales de del donde el en es esta este hay la las lo los me mi '
+    'para por que quien se su sus un una unos unas y o puedo puedes'.split()
+)
+
+_ORACIONES = re.compile(r'[.!?¿¡\n]+')
+_PALABRAS = re.compile(r'\w+')
+
+
+def normalizar(texto):
+    """Minúsculas, sin tildes (conserva la ñ), sin puntuación ni espacios repetidos"""
+    texto = texto.lower()
+    if texto.isascii():
+        datos = texto.encode('ascii')
+    else:
+        # NFKD separa las tildes de la letra y el encode a ASCII las descarta
+        datos = unicodedata.normalize('NFKD', texto.replace('ñ', '\x01')).encode('ascii', 'ignore')
+    return ' '.join(datos.translate(_SEPARADORES).decode('ascii').replace('\x01', 'ñ').split())
+
+
+def palabras(normalizado):
+    """Conjunto de palabras significativas de un texto normalizado"""
+    return frozenset(p for p in normalizado.split() if p not in STOPWORDS)
+
+
+def identificadores(mensaje):
+    """
+    Palabras del mensaje que nombran algo concreto, normalizadas.
+
+    Son las que tienen dígitos (códigos, NIT, cantidades) y las que
+    empiezan con mayúscula sin abrir la oración (nombres propios).
+    """
+    encontrados = {p for p in normalizar(mensaje).split() if not p.isalpha()}
+    for oracion in _ORACIONES.split(mensaje):
+        for palabra in _PALABRAS.findall(oracion)[1:]:
+            if palabra[0].isupper():
+                encontrados.add(normalizar(palabra))
+    return frozenset(encontrados)
+
+
+class CacheRespuestas:
+    """
+    Caché LRU con TTL indexada por pregunta normalizada.
+
+    Un índice invertido palabra -> preguntas limita la búsqueda por
+    similitud a las entradas que comparten al menos una palabra.
+    """
+
+    def __init__(self, max_entradas=1000, ttl=300.0, umbral_similitud=0.8, reloj=time.monotonic):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self.umbral_similitud = umbral_similitud
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        # normalizado -> (vence, palabras, identificadores, respuesta), en orden de uso
+        self._entradas = OrderedDict()
+        self._indice = {}
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def limpiar(self):
+        with self._lock:
+            self._entradas.clear()
+            self._indice.clear()
+
+    def obtener(self, mensaje, exacta=False):
+        """
+        Respuesta cacheada para la pregunta (o una similar); None si no hay.
+
+        Con ``exacta`` solo vale la misma pregunta normalizada.
+        """
+        normalizado = normalizar(mensaje)
+        ahora = self._reloj()
+        with self._lock:
+            if normalizado in self._entradas:
+                clave = normalizado
+            elif exacta:
+                return None
+            else:
+                clave = self._similar(normalizado, identificadores(mensaje))
+            if clave is None:
+                return None
+            vence, _, _, respuesta = self._entradas[clave]
+            if vence <= ahora:
+                self._quitar(clave)
+                return None
+            self._entradas.move_to_end(clave)
+            return respuesta
+
+    def guardar(self, mensaje, respuesta):
+        normalizado = normalizar(mensaje)
+        if not normalizado:
+            return
+        with self._lock:
+            if normalizado in self._entradas:
+                self._quitar(normalizado)
+            while len(self._entradas) >= self.max_entradas:
+                self._quitar(next(iter(self._entradas)))
+            tokens = palabras(normalizado)
+            self._entradas[normalizado] = (
+                self._reloj() + self.ttl, tokens, identificadores(mensaje), respuesta
+            )
+            for palabra in tokens:
+                self._indice.setdefault(palabra, set()).add(normalizado)
+
+    def _similar(self, normalizado, ids):
+        """Pregunta cacheada más parecida por encima del umbral y con los mismos identificadores"""
+        umbral = self.umbral_similitud
+        tokens = palabras(normalizado)
+        if umbral >= 1 or not tokens:
+            return None
+        # Palabras en común por candidata, contadas desde el índice invertido
+        comunes = {}
+        for palabra in tokens:
+            for candidata in self._indice.get(palabra, ()):
+                comunes[candidata] = comunes.get(candidata, 0) + 1
+        # Jaccard >= umbral exige al menos umbral * |tokens| palabras en común
+        minimo = umbral * len(tokens)
+        mejor, mejor_similitud = None, umbral
+        for candidata, interseccion in comunes.items():
+            _, tokens_candidata, ids_candidata, _ = self._entradas[candidata]
+            if interseccion < minimo or ids_candidata != ids:
+                continue
+            union = len(tokens) + len(tokens_candidata) - interseccion
+            if interseccion / union >= mejor_similitud:
+                mejor, mejor_similitud = candidata, interseccion / union
+        return mejor
+
+    def _quitar(self, clave):
+        _, tokens, _, _ = self._entradas.pop(clave)
+        for palabra in tokens:
+            claves = self._indice.get(palabra)
+            if claves is not None:
+                claves.discard(clave)
+                if not claves:
+                    del self._indice[palabra]
+
+
+cache_respuestas = CacheRespuestas(
+    max_entradas=settings.CHATBOT_CACHE_MAX,
+    ttl=settings.CHATBOT_CACHE_TTL,
+    umbral_similitud=settings.CHATBOT_CACHE_SIMILARITY,
+)
@@ -0,0 +1,205 @@
+"""
+Respuestas del chatbot con datos del sistema.
+
+Responde sin llamar al webhook preguntas como "¿cuánto stock tiene la
+empresa Acme?" o "¿cuánto cuesta el PROD-001?". El tipo de consulta sale
+de la sección ``consultas`` del archivo de intenciones; la empresa o el
+producto se resuelven con un índice en memoria de NIT, códigos y nombres
+(frases normalizadas, se busca la más larga en cada posición del
+mensaje). Las cifras salen de agregados de los casos de uso, así que la
+respuesta refleja el estado actual de la base.
+
+El índice es por proceso: se reconstruye tras CHATBOT_DATA_INDEX_TTL
+segundos o cuando se guarda o elimina una empresa o un producto en este
+proceso (ver signals.py).
+"""
+import threading
+import time
+from functools import cache
+
+from django.conf import settings
+
+from application.use_cases import EmpresaUseCases, InventarioUseCases, ProductoUseCases
+from apps.chatbot.cache import STOPWORDS, normalizar
+from apps.chatbot.intenciones import MotorIntenciones
+
+# Palabras de la frase más larga que se indexa por entidad
+MAX_PALABRAS = 8
+
+# Consultas que se responden para cada tipo de entidad
+CONSULTAS_DE_PRODUCTO = ('stock', 'precio')
+CONSULTAS_DE_EMPRESA = ('stock', 'productos', 'contacto')
+
+
+class IndiceEntidades:
+    """Frases normalizadas (NIT, código o nombre) -> entidades que las usan"""
+
+    def __init__(self, empresas, productos):
+        self.empresas = {empresa.nit: empresa for empresa in empresas}
+        self.productos = {codigo: (codigo, nombre, nit) for codigo, nombre, nit in productos}
+        self._frases = {}
+        for empresa in self.empresas.values():
+            self._agregar(empresa.nit, ('empresa', empresa.nit))
+            # El NIT sin dígito de verificación también identifica a la empresa
+            self._agregar(empresa.nit.split('-')[0], ('empresa', empresa.nit))
+            self._agregar(empresa.nombre, ('empresa', empresa.nit))
+        for codigo, nombre, _ in self.productos.values():
+            self._agregar(codigo, ('producto', codigo))
+            self._agregar(nombre, ('producto', codigo))
+        self._max_palabras = max((len(frase) for frase in self._frases), default=0)
+
+    def __len__(self):
+        return len(self._frases)
+
+    def _agregar(self, texto, entidad):
+        palabras = tuple(normalizar(texto).split()[:MAX_PALABRAS])
+        # Un nombre de una palabra común ("de", "el") no identifica nada
+        if not palabras or (len(palabras) == 1 and palabras[0] in STOPWORDS):
+            return
+        entidades = self._frases.setdefault(palabras, [])
+        if entidad not in entidades:
+            entidades.append(entidad)
+
+    def buscar(self, mensaje):
+        """Entidades mencionadas en el mensaje, en orden de aparición"""
+        palabras = normalizar(mensaje).split()
+        encontradas = []
+        i = 0
+        while i < len(palabras):
+            for largo in range(min(self._max_palabras, len(palabras) - i), 0, -1):
+                entidades = self._frases.get(tuple(palabras[i:i + largo]))
+                if entidades:
+                    encontradas.extend(e for e in entidades if e not in encontradas)
+                    i += largo
+                    break
+            else:
+                i += 1
+        return encontradas
+
+
+class _Indice:
+    """Índice perezoso con TTL e invalidación explícita"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._indice = None
+        self._vence = 0.0
+
+    def invalidar(self):
+        self._indice = None
+
+    def obtener(self):
+        indice = self._indice
+        if indice is not None and time.monotonic() < self._vence:
+            return indice
+        with self._lock:
+            if self._indice is None or time.monotonic() >= self._vence:
+                self._indice = IndiceEntidades(
+                    EmpresaUseCases().listar_filas(),
+                    ProductoUseCases().listar_identificadores(),
+                )
+                self._vence = time.monotonic() + settings.CHATBOT_DATA_INDEX_TTL
+            return self._indice
+
+
+indice_entidades = _Indice()
+
+
+@cache
+def motor_consultas():
+    """Clasificador de la sección ``consultas`` del archivo de intenciones"""
+    return MotorIntenciones.desde_archivo(settings.CHATBOT_INTENTS_FILE, seccion='consultas')
+
+
+def es_consulta_de_datos(mensaje):
+    """True si el mensaje pide datos del sistema (stock, precios, contacto...)"""
+    return bool(motor_consultas().clasificar(mensaje))
+
+
+def responder_con_datos(mensaje):
+    """Respuesta con datos del sistema, o None si el mensaje no es una consulta de datos"""
+    consultas = [intencion.nombre for intencion, _ in motor_consultas().clasificar(mensaje)]
+    if not consultas:
+        return None
+
+    indice = indice_entidades.obtener()
+    producto = empresa = None
+    for tipo, clave in indice.buscar(mensaje):
+        if tipo == 'producto' and producto is None:
+            producto = indice.productos[clave]
+        elif tipo == 'empresa' and empresa is None:
+            empresa = indice.empresas[clave]
+
+    for consulta in consultas:
+        if producto is not None and consulta in CONSULTAS_DE_PRODUCTO:
+            return _RESPUESTAS_DE_PRODUCTO[consulta](producto, empresa)
+        if empresa is not None and consulta in CONSULTAS_DE_EMPRESA:
+            return _RESPUESTAS_DE_EMPRESA[consulta](empresa)
+    return None
+
+
+def _numero(valor, decimales=0):
+    """Número con separadores en formato colombiano (1.234.567,50)"""
+    return f'{valor:,.{decimales}f}'.replace(',', '_').replace('.', ',').replace('_', '.')
+
+
+def _stock_de_producto(producto, empresa):
+    codigo, nombre, _ = producto
+    resumen = InventarioUseCases().resumen_stock(
+        empresa_nit=empresa.nit if empresa else None, producto_codigo=codigo
+    )
+    donde = f' en {empresa.nombre}' if empresa else ''
+    if not resumen['registros']:
+        return f'El producto {nombre} ({codigo}) no tiene registros de inventario{donde}.'
+    return (
+        f'Del producto {nombre} ({codigo}) hay {_numero(resumen["unidades"])} unidades{donde} '
+        f'en {resumen["registros"]} registro(s) de inventario.'
+    )
+
+
+def _precio_de_producto(producto, empresa):
+    codigo, nombre, _ = producto
+    precios = ProductoUseCases().precios_por_codigo(codigo)
+    if not precios:
+        return f'El producto {nombre} ({codigo}) no tiene precios registrados.'
+    lista = ', '.join(f'{_numero(p["precio"], 2)} {p["moneda"]}' for p in precios)
+    return f'El producto {nombre} ({codigo}) cuesta {lista}.'
+
+
+def _stock_de_empresa(empresa):
+    resumen = InventarioUseCases().resumen_stock(empresa_nit=empresa.nit)
+    if not resumen['registros']:
+        return f'{empresa.nombre} (NIT {empresa.nit}) no tiene registros de inventario.'
+    return (
+        f'{empresa.nombre} (NIT {empresa.nit}) tiene {_numero(resumen["unidades"])} unidades '
+        f'en {resumen["registros"]} registro(s) de inventario; '
+        f'{resumen["sin_stock"]} sin stock.'
+    )
+
+
+def _productos_de_empresa(empresa):
+    resumen = ProductoUseCases().resumen_por_empresa(empresa.nit)
+    if not resumen['total']:
+        return f'{empresa.nombre} (NIT {empresa.nit}) no tiene productos registrados.'
+    nombres = ', '.join(resumen['nombres'])
+    restantes = resumen['total'] - len(resumen['nombres'])
+    mas = f' y {restantes} más' if restantes else ''
+    return (
+        f'{empresa.nombre} (NIT {empresa.nit}) tiene {resumen["total"]} producto(s): '
+        f'{nombres}{mas}.'
+    )
+
+
+def _contacto_de_empresa(empresa):
+    return (
+        f'{empresa.nombre} (NIT {empresa.nit}): dirección {empresa.direccion}, '
+        f'teléfono {empresa.telefono}.'
+    )
+
+
+_RESPUESTAS_DE_PRODUCTO = {'stock': _stock_de_producto, 'precio': _precio_de_producto}
+_RESPUESTAS_DE_EMPRESA = {
+    'stock': _stock_de_empresa,
+    'productos': _productos_de_empresa,
+    'contacto': _contacto_de_empresa,
+}
@@ -0,0 +1,166 @@
+"""
+Motor de intenciones para las respuestas locales del chatbot.
+
+Las intenciones, sus palabras clave y sus respuestas se definen en un
+archivo JSON (CHATBOT_INTENTS_FILE). Al cargarlo, todas las palabras
+clave se compilan en un solo autómata: un trie cuyas transiciones son
+palabras completas, así que clasificar un mensaje es una pasada sobre
+las palabras del texto normalizado (sin tildes ni mayúsculas) con
+búsquedas en diccionarios. Las palabras coinciden completas (sin límites
+de palabra que revisar) y ``producto*`` acepta cualquier terminación
+(productos, productora...). En cada posición gana la frase clave más
+larga: "buenos dias" no cuenta además como "buenos".
+
+Cada palabra distinta encontrada suma el ``peso`` de su intención. Gana
+la intención con más puntaje; si varias empatan se responden juntas (hasta
+``max_respuestas``) en el orden del archivo.
+"""
+import json
+from dataclasses import dataclass
+from functools import cache
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from apps.chatbot.cache import normalizar
+
+
+@dataclass(frozen=True)
+class Intencion:
+    nombre: str
+    respuesta: str
+    palabras: tuple
+    peso: float = 1.0
+
+
+# Transiciones memorizadas por nodo (acota la memoria ante textos arbitrarios)
+MAX_TRANSICIONES = 10000
+
+
+class _Nodo:
+    """Estado del trie: transiciones por palabra y palabras clave que terminan aquí"""
+    __slots__ = ('hijos', 'patron', 'prefijos', 'longitudes', '_transiciones')
+
+    def __init__(self):
+        self.hijos = {}
+        self.patron = None
+        # Palabras clave con comodín que terminan en este nodo: prefijo -> patrón
+        self.prefijos = {}
+        self.longitudes = ()
+        self._transiciones = {}
+
+    def paso(self, palabra):
+        """(nodo siguiente, patrón con comodín que acepta la palabra), memorizado"""
+        transicion = self._transiciones.get(palabra)
+        if transicion is None:
+            patron = None
+            for longitud in self.longitudes:
+                patron = self.prefijos.get(palabra[:longitud])
+                if patron is not None:
+                    break
+            transicion = (self.hijos.get(palabra), patron)
+            if len(self._transiciones) < MAX_TRANSICIONES:
+                self._transiciones[palabra] = transicion
+        return transicion
+
+
+class MotorIntenciones:
+    """Clasifica mensajes en intenciones con un trie de palabras compilado una vez"""
+
+    def __init__(self, intenciones, por_defecto, max_respuestas=1):
+        self.intenciones = tuple(intenciones)
+        self.por_defecto = por_defecto
+        self.max_respuestas = max_respuestas
+
+        # Patrón (palabras normalizadas, comodín) -> índices de las intenciones
+        patrones = {}
+        for indice, intencion in enumerate(self.intenciones):
+            for palabra in intencion.palabras:
+                patron = (tuple(normalizar(palabra.rstrip('*')).split()), palabra.endswith('*'))
+                if patron[0]:
+                    patrones.setdefault(patron, []).append(indice)
+        self._intenciones_por_patron = list(patrones.values())
+
+        self._raiz = _Nodo()
+        for numero, (palabras, comodin) in enumerate(patrones):
+            nodo = self._raiz
+            for palabra in palabras[:-1]:
+                nodo = nodo.hijos.setdefault(palabra, _Nodo())
+            if comodin:
+                nodo.prefijos[palabras[-1]] = numero
+                # Los prefijos más largos primero
+                nodo.longitudes = tuple(sorted({len(p) for p in nodo.prefijos}, reverse=True))
+            else:
+                nodo.hijos.setdefault(palabras[-1], _Nodo()).patron = numero
+
+    def _patrones(self, palabras):
+        """Patrones encontrados: en cada posición el más largo, sin solaparse"""
+        encontrados = set()
+        i, total = 0, len(palabras)
+        while i < total:
+            nodo, mejor, fin = self._raiz, None, i + 1
+            for j in range(i, total):
+                nodo, numero = nodo.paso(palabras[j])
+                if numero is not None:
+                    mejor, fin = numero, j + 1
+                if nodo is None:
+                    break
+                if nodo.patron is not None:
+                    mejor, fin = nodo.patron, j + 1
+            if mejor is not None:
+                encontrados.add(mejor)
+            i = fin
+        return encontrados
+
+    @classmethod
+    def desde_archivo(cls, ruta, seccion='intenciones'):
+        """
+        Carga las intenciones de una sección del archivo JSON.
+
+        La sección ``intenciones`` exige respuesta y ``por_defecto``; otras
+        secciones (``consultas``) solo se usan para clasificar.
+        """
+        con_respuesta = seccion == 'intenciones'
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                config = json.load(archivo)
+            intenciones = [
+                Intencion(
+                    nombre=item['nombre'],
+                    respuesta=item['respuesta'] if con_respuesta else item.get('respuesta', ''),
+                    palabras=tuple(item['palabras']),
+                    peso=float(item.get('peso', 1.0)),
+                )
+                for item in config[seccion]
+            ]
+            por_defecto = config['por_defecto'] if con_respuesta else ''
+            return cls(intenciones, por_defecto, int(config.get('max_respuestas', 1)))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            raise ImproperlyConfigured(f'Archivo de intenciones del chatbot inválido ({ruta}): {e}')
+
+    def clasificar(self, mensaje):
+        """Lista de (intención, puntaje) ordenada de mayor a menor puntaje"""
+        puntajes = {}
+        for numero in self._patrones(normalizar(mensaje).split()):
+            for indice in self._intenciones_por_patron[numero]:
+                puntajes[indice] = puntajes.get(indice, 0.0) + self.intenciones[indice].peso
+        # Empates en el orden del archivo
+        orden = sorted(puntajes, key=lambda indice: (-puntajes[indice], indice))
+        return [(self.intenciones[indice], puntajes[indice]) for indice in orden]
+
+    def responder(self, mensaje):
+        """Respuesta de la intención ganadora (o de las empatadas)"""
+        clasificacion = self.clasificar(mensaje)
+        if not clasificacion:
+            return self.por_defecto
+        mejor = clasificacion[0][1]
+        respuestas = [
+            intencion.respuesta for intencion, puntaje in clasificacion if puntaje == mejor
+        ]
+        return '\n\n'.join(respuestas[:self.max_respuestas])
+
+
+@cache
+def motor():
+    """Motor de intenciones de CHATBOT_INTENTS_FILE (se compila una vez por proceso)"""
+    return MotorIntenciones.desde_archivo(settings.CHATBOT_INTENTS_FILE)
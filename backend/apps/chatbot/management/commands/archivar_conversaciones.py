@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.chatbot.retencion import archivar_conversaciones
+
+
+class Command(BaseCommand):
+    help = (
+        'Archiva en JSONL comprimido las conversaciones del chatbot sin actividad '
+        'reciente y las elimina por lotes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dias', type=int, default=settings.CHATBOT_RETENTION_DAYS,
+            help='Días sin actividad para archivar una conversación'
+        )
+        parser.add_argument('--lote', type=int, default=500, help='Conversaciones por lote')
+        parser.add_argument('--directorio', help='Directorio de los archivos (por defecto bajo MEDIA_ROOT)')
+        parser.add_argument('--simular', action='store_true', help='Solo contar, sin archivar ni borrar')
+
+    def handle(self, *args, **options):
+        resultado = archivar_conversaciones(
+            dias=options['dias'],
+            lote=options['lote'],
+            directorio=options['directorio'],
+            simular=options['simular'],
+        )
+        if options['simular']:
+            self.stdout.write(
+                f"Se archivarían {resultado['conversaciones']} conversaciones "
+                f"({resultado['mensajes']} mensajes)"
+            )
+            return
+        if not resultado['archivo']:
+            self.stdout.write('No hay conversaciones para archivar')
+            return
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Se archivaron {resultado['conversaciones']} conversaciones "
+                f"({resultado['mensajes']} mensajes) en {resultado['archivo']}"
+            )
+        )
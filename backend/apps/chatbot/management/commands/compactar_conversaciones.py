@@ -0,0 +1,23 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from apps.chatbot.retencion import compactar_conversaciones
+
+
+class Command(BaseCommand):
+    help = 'Resume los mensajes más antiguos de las sesiones del chatbot que superan el máximo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--max-mensajes', type=int, default=settings.CHATBOT_SESSION_MAX_MESSAGES,
+            help='Mensajes por sesión antes de resumir (se conserva la mitad más reciente)'
+        )
+
+    def handle(self, *args, **options):
+        resultado = compactar_conversaciones(maximo=options['max_mensajes'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Se resumieron {resultado['mensajes']} mensajes de "
+                f"{resultado['conversaciones']} conversaciones"
+            )
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mensajechat',
+            index=models.Index(fields=['conversacion', 'timestamp'], name='chatbot_mensaje_conv_ts_idx'),
+        ),
+    ]
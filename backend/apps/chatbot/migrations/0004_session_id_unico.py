@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:07
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def unificar_sesiones_duplicadas(apps, schema_editor):
+    """
+    Une las conversaciones con el mismo session_id en la más antigua.
+
+    get_or_create sin índice único pudo crear duplicados con requests
+    concurrentes de la misma sesión.
+    """
+    ConversacionChat = apps.get_model('chatbot', 'ConversacionChat')
+    MensajeChat = apps.get_model('chatbot', 'MensajeChat')
+    duplicadas = (
+        ConversacionChat.objects.values('session_id')
+        .annotate(total=Count('id')).filter(total__gt=1)
+        .values_list('session_id', flat=True)
+    )
+    for session_id in list(duplicadas):
+        ids = list(
+            ConversacionChat.objects.filter(session_id=session_id)
+            .order_by('created_at', 'id').values_list('id', flat=True)
+        )
+        MensajeChat.objects.filter(conversacion_id__in=ids[1:]).update(conversacion_id=ids[0])
+        ConversacionChat.objects.filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0003_mensaje_conversacion_timestamp'),
+    ]
+
+    operations = [
+        migrations.RunPython(unificar_sesiones_duplicadas, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='conversacionchat',
+            name='session_id',
+            field=models.CharField(max_length=100, unique=True, verbose_name='ID de Sesión'),
+        ),
+        migrations.AlterField(
+            model_name='mensajechat',
+            name='tipo',
+            field=models.CharField(choices=[('user', 'Usuario'), ('bot', 'Bot'), ('resumen', 'Resumen')], max_length=10, verbose_name='Tipo'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chatbot', '0004_session_id_unico'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mensajechat',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Marca de tiempo'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from apps.users.models import User
 
 
@@ -13,7 +14,7 @@ class ConversacionChat(models.Model):
         null=True,
         blank=True
     )
-    session_id = models.CharField('ID de Sesión', max_length=100)
+    session_id = models.CharField('ID de Sesión', max_length=100, unique=True)
     created_at = models.DateTimeField('Fecha de creación', auto_now_add=True)
 
     class Meta:
@@ -31,6 +32,7 @@ class MensajeChat(models.Model):
     TIPO_CHOICES = [
         ('user', 'Usuario'),
         ('bot', 'Bot'),
+        ('resumen', 'Resumen'),
     ]
 
     conversacion = models.ForeignKey(
@@ -41,12 +43,17 @@ class MensajeChat(models.Model):
     )
     tipo = models.CharField('Tipo', max_length=10, choices=TIPO_CHOICES)
     mensaje = models.TextField('Mensaje')
-    timestamp = models.DateTimeField('Marca de tiempo', auto_now_add=True)
+    # Hora de llegada del mensaje, no la de la escritura (ver apps.chatbot.persistencia)
+    timestamp = models.DateTimeField('Marca de tiempo', default=timezone.now, editable=False)
 
     class Meta:
         verbose_name = 'Mensaje'
         verbose_name_plural = 'Mensajes'
         ordering = ['timestamp']
+        indexes = [
+            # Historial de una sesión paginado por timestamp
+            models.Index(fields=['conversacion', 'timestamp'], name='chatbot_mensaje_conv_ts_idx'),
+        ]
 
     def __str__(self):
         return f"{self.tipo}: {self.mensaje[:50]}..."
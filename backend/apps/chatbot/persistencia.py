@@ -0,0 +1,166 @@
+"""
+Persistencia de los mensajes del chatbot.
+
+Por defecto cada respuesta se escribe junto con su pregunta antes de
+responder. Con CHATBOT_WRITE_BEHIND=True los mensajes se acumulan en un
+buffer del proceso y se escriben con un solo ``bulk_create`` cuando hay
+CHATBOT_WRITE_BEHIND_SIZE pendientes o cuando el más antiguo lleva
+CHATBOT_WRITE_BEHIND_INTERVAL segundos esperando. El vaciado por tiempo lo
+hace un ``threading.Timer`` del proceso, así que funciona igual bajo WSGI
+(donde cada vista asíncrona corre en un event loop que se cierra al
+responder) que bajo ASGI.
+
+Lo pendiente también se escribe al terminar el proceso: con ``atexit`` en
+una salida normal (gunicorn termina sus workers así al recibir SIGTERM) y
+bajo ASGI en el ``lifespan.shutdown`` del servidor. No se escribe desde un
+manejador de señales: correría en el hilo principal interrumpido en
+cualquier punto, quizá en medio de una consulta con la misma conexión.
+
+El timestamp de cada mensaje es el de su llegada, no el de la escritura.
+Las vistas de historial vacían el buffer antes de leer, así que en el
+mismo proceso una sesión siempre ve sus mensajes; otro worker no los ve
+hasta que se escriben. Un proceso que no termina normalmente (SIGKILL,
+OOM, SIGTERM sin un servidor que lo atienda) pierde lo pendiente, así que
+los despliegues que auditan las conversaciones no deben activarlo.
+"""
+import atexit
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+
+from apps.chatbot.models import MensajeChat
+from apps.monitoring.metrics import CHATBOT_BUFFER_ESCRITOS, CHATBOT_BUFFER_PENDIENTES
+
+logger = logging.getLogger(__name__)
+
+
+class BufferMensajes:
+    """Mensajes pendientes de escribir, con umbral por cantidad y por antigüedad"""
+
+    def __init__(self, max_mensajes=100, intervalo=2.0, reloj=time.monotonic):
+        self.max_mensajes = max_mensajes
+        self.intervalo = intervalo
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self._pendientes = []
+        self._desde = None
+        # Timer del vaciado por tiempo programado
+        self._programado = None
+
+    def __len__(self):
+        return len(self._pendientes)
+
+    def agregar(self, mensajes):
+        """Agrega mensajes sin guardar; True si ya hay que vaciar el buffer"""
+        with self._lock:
+            if not self._pendientes:
+                self._desde = self._reloj()
+            self._pendientes.extend(mensajes)
+            CHATBOT_BUFFER_PENDIENTES.set(len(self._pendientes))
+            return (
+                len(self._pendientes) >= self.max_mensajes
+                or self._reloj() - self._desde >= self.intervalo
+            )
+
+    def vaciar(self):
+        """Escribe los mensajes pendientes; devuelve cuántos se guardaron"""
+        with self._lock:
+            mensajes, self._pendientes, self._desde = self._pendientes, [], None
+            CHATBOT_BUFFER_PENDIENTES.set(0)
+        if not mensajes:
+            return 0
+        try:
+            with transaction.atomic():
+                MensajeChat.objects.bulk_create(mensajes)
+        except DatabaseError:
+            # Un mensaje inválido (p. ej. de una conversación ya archivada)
+            # no debe llevarse al resto del lote
+            return self._guardar_de_a_uno(mensajes)
+        CHATBOT_BUFFER_ESCRITOS.inc('guardado', valor=len(mensajes))
+        return len(mensajes)
+
+    def _guardar_de_a_uno(self, mensajes):
+        guardados = 0
+        for mensaje in mensajes:
+            try:
+                with transaction.atomic():
+                    mensaje.save(force_insert=True)
+            except DatabaseError:
+                logger.exception('No se pudo guardar un mensaje del chatbot (conversación %s)',
+                                 mensaje.conversacion_id)
+                CHATBOT_BUFFER_ESCRITOS.inc('descartado')
+            else:
+                guardados += 1
+                CHATBOT_BUFFER_ESCRITOS.inc('guardado')
+        return guardados
+
+    def limpiar(self):
+        """Descarta los mensajes pendientes sin escribirlos (y el vaciado programado)"""
+        with self._lock:
+            self._pendientes, self._desde = [], None
+            CHATBOT_BUFFER_PENDIENTES.set(0)
+            if self._programado is not None:
+                self._programado.cancel()
+                self._programado = None
+
+    def programar(self):
+        """Programa el vaciado por tiempo en un hilo, si no hay uno pendiente"""
+        with self._lock:
+            if self._programado is not None and self._programado.is_alive():
+                return
+            self._programado = threading.Timer(self.intervalo, self._al_vencer)
+            # No retiene al proceso al salir: de lo pendiente se encarga atexit
+            self._programado.daemon = True
+            self._programado.start()
+
+    def _al_vencer(self):
+        try:
+            self.vaciar()
+        except Exception:
+            logger.exception('No se pudieron guardar los mensajes pendientes del chatbot')
+        finally:
+            # Conexiones de este hilo, que termina aquí
+            connections.close_all()
+
+
+buffer_mensajes = BufferMensajes(
+    max_mensajes=settings.CHATBOT_WRITE_BEHIND_SIZE,
+    intervalo=settings.CHATBOT_WRITE_BEHIND_INTERVAL,
+)
+
+
+def guardar_mensajes(*mensajes):
+    """
+    Guarda mensajes sin guardar (instancias de MensajeChat).
+
+    Sin write-behind es un solo INSERT; con write-behind solo se escribe
+    si el buffer llegó a un umbral.
+    """
+    if not settings.CHATBOT_WRITE_BEHIND:
+        MensajeChat.objects.bulk_create(mensajes)
+    elif buffer_mensajes.agregar(mensajes):
+        buffer_mensajes.vaciar()
+    else:
+        buffer_mensajes.programar()
+
+
+async def aguardar_mensajes(*mensajes):
+    """Versión asíncrona de ``guardar_mensajes``: solo pasa a un hilo si escribe"""
+    if not settings.CHATBOT_WRITE_BEHIND:
+        await MensajeChat.objects.abulk_create(mensajes)
+    elif buffer_mensajes.agregar(mensajes):
+        await sync_to_async(buffer_mensajes.vaciar)()
+    else:
+        buffer_mensajes.programar()
+
+
+@atexit.register
+def vaciar_al_salir():
+    try:
+        buffer_mensajes.vaciar()
+    except Exception:
+        logger.exception('No se pudieron guardar los mensajes pendientes del chatbot al salir')
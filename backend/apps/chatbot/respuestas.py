@@ -0,0 +1,12 @@
+"""
+Respuestas locales del chatbot.
+
+Se usan cuando el webhook de n8n no está disponible o responde con error.
+Las reglas viven en el archivo de intenciones (ver ``apps.chatbot.intenciones``).
+"""
+from apps.chatbot.intenciones import motor
+
+
+def respuesta_local(mensaje):
+    """Genera respuestas locales cuando n8n no está disponible"""
+    return motor().responder(mensaje)
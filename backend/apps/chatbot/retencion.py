@@ -0,0 +1,227 @@
+"""
+Retención del historial del chatbot.
+
+Dos tareas periódicas (ver los comandos ``archivar_conversaciones`` y
+``compactar_conversaciones``):
+
+* Archivo: las conversaciones sin actividad en CHATBOT_RETENTION_DAYS días
+  se escriben en un JSONL comprimido con gzip bajo
+  MEDIA_ROOT/CHATBOT_ARCHIVE_DIR (una línea por conversación con todos sus
+  mensajes) y se eliminan por lotes. Cada lote se bloquea, se vuelve a
+  comprobar su inactividad, se escribe al archivo y se borra en una misma
+  transacción: un mensaje que llega mientras tanto espera al bloqueo o
+  deja a su conversación fuera del lote, y si el proceso se interrumpe lo
+  ya borrado está archivado.
+* Compactación: una sesión con más de CHATBOT_SESSION_MAX_MESSAGES
+  mensajes conserva la mitad más reciente y reemplaza los anteriores por
+  un mensaje ``resumen`` (temas según el motor de intenciones y últimas
+  preguntas del usuario) con el timestamp del último mensaje resumido.
+"""
+import gzip
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.chatbot.intenciones import motor
+from apps.chatbot.models import ConversacionChat, MensajeChat
+from infrastructure.renderers import FastJSONRenderer
+
+# Preguntas del usuario que se citan en un resumen y su largo máximo
+PREGUNTAS_EN_RESUMEN = 3
+LARGO_PREGUNTA = 80
+
+
+def directorio_de_archivo():
+    return Path(settings.MEDIA_ROOT) / settings.CHATBOT_ARCHIVE_DIR
+
+
+def conversaciones_inactivas(limite):
+    """Conversaciones cuya última actividad (o creación, sin mensajes) es anterior a limite"""
+    return ConversacionChat.objects.annotate(
+        ultima_actividad=Coalesce(Max('mensajes__timestamp'), 'created_at')
+    ).filter(ultima_actividad__lt=limite)
+
+
+def archivar_conversaciones(dias=None, lote=500, directorio=None, simular=False):
+    """
+    Archiva y elimina las conversaciones sin actividad en los últimos ``dias``.
+
+    Devuelve un dict con la cantidad de conversaciones y mensajes
+    archivados y la ruta del archivo (None si no había nada que archivar
+    o si ``simular`` es True, en cuyo caso no se escribe ni borra nada).
+    """
+    dias = settings.CHATBOT_RETENTION_DAYS if dias is None else dias
+    limite = timezone.now() - timedelta(days=dias)
+    candidatas = conversaciones_inactivas(limite).order_by('id').values_list('id', flat=True)
+    resultado = {'conversaciones': 0, 'mensajes': 0, 'archivo': None}
+
+    if simular:
+        ids = list(candidatas)
+        resultado['conversaciones'] = len(ids)
+        resultado['mensajes'] = MensajeChat.objects.filter(conversacion_id__in=ids).count()
+        return resultado
+
+    renderer = FastJSONRenderer()
+    archivo = None
+    ultimo_id = 0
+    try:
+        while True:
+            # Paginación por id: cada lote empieza donde terminó el anterior
+            ids = list(candidatas.filter(id__gt=ultimo_id)[:lote])
+            if not ids:
+                break
+            ultimo_id = ids[-1]
+            with transaction.atomic():
+                # Los mensajes nuevos de estas conversaciones esperan al commit
+                list(
+                    ConversacionChat.objects.select_for_update()
+                    .filter(id__in=ids).order_by('id').values_list('id', flat=True)
+                )
+                # Sin las que recibieron mensajes desde que se eligió el lote
+                inactivas = conversaciones_inactivas(limite).filter(id__in=ids)
+                ids = list(inactivas.order_by('id').values_list('id', flat=True))
+                if not ids:
+                    continue
+                lineas = _lineas_de_lote(ids, renderer)
+                if archivo is None:
+                    ruta = _ruta_nueva(Path(directorio) if directorio else directorio_de_archivo())
+                    archivo = gzip.open(ruta, 'wb', compresslevel=6)
+                    resultado['archivo'] = str(ruta)
+                archivo.writelines(lineas)
+                archivo.flush()
+                _, borrados = inactivas.delete()
+            resultado['conversaciones'] += borrados.get('chatbot.ConversacionChat', 0)
+            resultado['mensajes'] += borrados.get('chatbot.MensajeChat', 0)
+    finally:
+        if archivo is not None:
+            archivo.close()
+    return resultado
+
+
+def _ruta_nueva(directorio):
+    directorio.mkdir(parents=True, exist_ok=True)
+    nombre = timezone.now().strftime('conversaciones-%Y%m%dT%H%M%S')
+    ruta = directorio / f'{nombre}.jsonl.gz'
+    numero = 1
+    while ruta.exists():
+        numero += 1
+        ruta = directorio / f'{nombre}-{numero}.jsonl.gz'
+    return ruta
+
+
+def _lineas_de_lote(ids, renderer):
+    """Una línea JSON por conversación del lote, con sus mensajes en orden"""
+    mensajes = {}
+    filas = (
+        MensajeChat.objects.filter(conversacion_id__in=ids)
+        .order_by('conversacion_id', 'timestamp', 'id')
+        .values_list('conversacion_id', 'tipo', 'mensaje', 'timestamp')
+    )
+    for conversacion_id, tipo, mensaje, timestamp in filas:
+        mensajes.setdefault(conversacion_id, []).append(
+            {'tipo': tipo, 'mensaje': mensaje, 'timestamp': timestamp}
+        )
+
+    conversaciones = (
+        ConversacionChat.objects.filter(id__in=ids).order_by('id')
+        .values_list('id', 'session_id', 'usuario_id', 'created_at')
+    )
+    return [
+        renderer.render({
+            'id': id_, 'session_id': session_id, 'usuario': usuario_id,
+            'created_at': created_at, 'mensajes': mensajes.get(id_, []),
+        }) + b'\n'
+        for id_, session_id, usuario_id, created_at in conversaciones
+    ]
+
+
+def resumir(mensajes):
+    """
+    Texto de resumen de una lista de (tipo, mensaje, timestamp) en orden.
+
+    Es un resumen extractivo: rango de fechas, temas de las preguntas del
+    usuario (clasificadas con el motor de intenciones) y las últimas
+    preguntas textuales.
+    """
+    preguntas = [mensaje for tipo, mensaje, _ in mensajes if tipo == 'user']
+    temas = {}
+    for pregunta in preguntas:
+        clasificacion = motor().clasificar(pregunta)
+        if clasificacion:
+            nombre = clasificacion[0][0].nombre
+            temas[nombre] = temas.get(nombre, 0) + 1
+
+    desde = timezone.localtime(mensajes[0][2]).date()
+    hasta = timezone.localtime(mensajes[-1][2]).date()
+    partes = [f'Resumen de {len(mensajes)} mensajes anteriores ({desde} a {hasta}).']
+    if temas:
+        ordenados = sorted(temas.items(), key=lambda tema: -tema[1])
+        partes.append('Temas: ' + ', '.join(f'{nombre} ({total})' for nombre, total in ordenados) + '.')
+    if preguntas:
+        citas = [_recortar(p) for p in preguntas[-PREGUNTAS_EN_RESUMEN:]]
+        partes.append('Últimas preguntas: ' + '; '.join(f'«{cita}»' for cita in citas) + '.')
+    return ' '.join(partes)
+
+
+def _recortar(texto):
+    texto = ' '.join(texto.split())
+    return texto if len(texto) <= LARGO_PREGUNTA else texto[:LARGO_PREGUNTA - 1] + '…'
+
+
+def compactar_conversacion(conversacion_id, maximo=None):
+    """
+    Resume los mensajes más antiguos si la conversación supera ``maximo``.
+
+    Conserva los ``maximo // 2`` mensajes más recientes (los resúmenes
+    anteriores no cuentan ni se vuelven a resumir). Devuelve la cantidad
+    de mensajes reemplazados por el resumen.
+    """
+    maximo = settings.CHATBOT_SESSION_MAX_MESSAGES if maximo is None else maximo
+    with transaction.atomic():
+        mensajes = list(
+            MensajeChat.objects.filter(conversacion_id=conversacion_id)
+            .exclude(tipo='resumen').order_by('timestamp', 'id')
+            .values_list('id', 'tipo', 'mensaje', 'timestamp')
+        )
+        if not maximo or len(mensajes) <= maximo:
+            return 0
+
+        antiguos = mensajes[:len(mensajes) - maximo // 2]
+        ultimo_id, _, _, ultimo_timestamp = antiguos[-1]
+        MensajeChat.objects.filter(conversacion_id=conversacion_id).exclude(tipo='resumen').filter(
+            Q(timestamp__lt=ultimo_timestamp) | Q(timestamp=ultimo_timestamp, id__lte=ultimo_id)
+        ).delete()
+
+        # En el lugar de los mensajes resumidos
+        MensajeChat.objects.create(
+            conversacion_id=conversacion_id,
+            tipo='resumen',
+            mensaje=resumir([fila[1:] for fila in antiguos]),
+            timestamp=ultimo_timestamp
+        )
+    return len(antiguos)
+
+
+def compactar_conversaciones(maximo=None):
+    """Compacta todas las conversaciones que superan ``maximo`` mensajes"""
+    maximo = settings.CHATBOT_SESSION_MAX_MESSAGES if maximo is None else maximo
+    resultado = {'conversaciones': 0, 'mensajes': 0}
+    if not maximo:
+        return resultado
+
+    excedidas = (
+        MensajeChat.objects.exclude(tipo='resumen').values('conversacion_id')
+        .annotate(total=Count('id')).filter(total__gt=maximo)
+        .values_list('conversacion_id', flat=True)
+    )
+    for conversacion_id in list(excedidas):
+        resumidos = compactar_conversacion(conversacion_id, maximo)
+        if resumidos:
+            resultado['conversaciones'] += 1
+            resultado['mensajes'] += resumidos
+    return resultado
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.chatbot.consultas import indice_entidades
+from apps.empresas.models import Empresa
+from apps.productos.models import Producto
+
+
+@receiver(post_save, sender=Empresa)
+@receiver(post_delete, sender=Empresa)
+@receiver(post_save, sender=Producto)
+@receiver(post_delete, sender=Producto)
+def invalidar_indice_de_entidades(sender, instance, **kwargs):
+    """El índice de NIT, códigos y nombres se reconstruye en la próxima consulta"""
+    indice_entidades.invalidar()
@@ -0,0 +1,377 @@
+"""
+Cliente del webhook de n8n.
+
+Bajo ASGI la llamada no bloquea el worker: mientras el bot responde, el
+event loop atiende otros requests. El loop del servidor reutiliza un
+``httpx.AsyncClient`` con pool de conexiones keep-alive, que se cierra al
+apagar el servidor (lifespan, ver config/asgi.py). Bajo WSGI cada request
+corre su vista asíncrona en un loop propio que se cierra al terminar, así
+que ahí se usa un ``httpx.Client`` compartido por todo el proceso (es
+seguro entre hilos). Un circuit breaker evita esperar el timeout completo
+cuando n8n está caído. Las consultas devuelven None si el webhook falla o
+el circuito está abierto, para que la vista use la respuesta local.
+
+``stream_webhook`` y ``astream_webhook`` son las variantes para el modo
+SSE: reenvían los fragmentos a medida que llegan cuando el webhook
+responde en streaming (líneas JSON de n8n o Server-Sent Events).
+"""
+import asyncio
+import atexit
+import json
+import ssl
+import threading
+import time
+import weakref
+from functools import cache
+from itertools import chain
+
+import certifi
+import httpx
+from django.conf import settings
+
+from apps.monitoring.metrics import (
+    CHATBOT_WEBHOOK,
+    CHATBOT_CIRCUITO,
+    CHATBOT_CIRCUITO_CAMBIOS,
+    CHATBOT_CIRCUITO_RECHAZOS,
+    CHATBOT_PRIMER_FRAGMENTO,
+)
+from infrastructure.circuit_breaker import CircuitBreaker, CERRADO, SEMIABIERTO, ABIERTO
+
+_VALOR_ESTADO = {CERRADO: 0, SEMIABIERTO: 1, ABIERTO: 2}
+
+# Content-Types con los que el webhook responde de forma incremental
+TIPOS_EN_STREAMING = {'text/event-stream', 'application/x-ndjson', 'application/jsonl'}
+# Claves en las que llega el texto de cada fragmento (n8n, OpenAI y similares)
+_CLAVES_DE_TEXTO = ('content', 'delta', 'text', 'response', 'message')
+
+# Un cliente por event loop: las conexiones de httpx pertenecen a su loop
+_clientes = weakref.WeakKeyDictionary()
+# Cliente síncrono del proceso (WSGI)
+_cliente_del_proceso = None
+_lock_cliente = threading.Lock()
+
+
+def _al_cambiar_circuito(estado):
+    CHATBOT_CIRCUITO.set(_VALOR_ESTADO[estado])
+    CHATBOT_CIRCUITO_CAMBIOS.inc(estado)
+
+
+circuito = CircuitBreaker(
+    umbral_fallos=settings.CHATBOT_CIRCUIT_FAILURES,
+    tiempo_apertura=settings.CHATBOT_CIRCUIT_RESET,
+    al_cambiar=_al_cambiar_circuito,
+)
+CHATBOT_CIRCUITO.set(_VALOR_ESTADO[circuito.estado])
+
+
+@cache
+def _contexto_ssl():
+    """Contexto TLS compartido: crearlo cuesta decenas de ms por cliente"""
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+def _opciones_cliente():
+    return {
+        'timeout': httpx.Timeout(
+            settings.CHATBOT_WEBHOOK_TIMEOUT,
+            connect=settings.CHATBOT_WEBHOOK_CONNECT_TIMEOUT,
+        ),
+        'limits': httpx.Limits(
+            max_connections=settings.CHATBOT_WEBHOOK_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.CHATBOT_WEBHOOK_MAX_KEEPALIVE,
+            keepalive_expiry=30,
+        ),
+        'verify': _contexto_ssl(),
+    }
+
+
+def _cliente():
+    """Cliente con pool de conexiones del event loop actual"""
+    loop = asyncio.get_running_loop()
+    cliente = _clientes.get(loop)
+    if cliente is None:
+        cliente = _clientes[loop] = httpx.AsyncClient(**_opciones_cliente())
+    return cliente
+
+
+def _cliente_sincrono():
+    """Cliente síncrono con pool de conexiones, compartido por los hilos del proceso"""
+    global _cliente_del_proceso
+    if _cliente_del_proceso is None:
+        with _lock_cliente:
+            if _cliente_del_proceso is None:
+                _cliente_del_proceso = httpx.Client(**_opciones_cliente())
+    return _cliente_del_proceso
+
+
+async def cerrar_cliente():
+    """Cierra el cliente del event loop actual (p. ej. al apagar el worker)"""
+    cliente = _clientes.pop(asyncio.get_running_loop(), None)
+    if cliente is not None:
+        await cliente.aclose()
+
+
+@atexit.register
+def cerrar_cliente_sincrono():
+    """Cierra el cliente síncrono del proceso"""
+    global _cliente_del_proceso
+    with _lock_cliente:
+        cliente, _cliente_del_proceso = _cliente_del_proceso, None
+    if cliente is not None:
+        cliente.close()
+
+
+def extraer_respuesta(response):
+    """Texto de la respuesta del bot (JSON con response/message o texto plano)"""
+    try:
+        bot_response = response.json()
+    except ValueError:
+        return response.text
+    if isinstance(bot_response, dict):
+        return bot_response.get('response', bot_response.get('message', str(bot_response)))
+    return str(bot_response)
+
+
+def consultar_webhook(mensaje):
+    """Envía el mensaje al webhook con el cliente síncrono; el texto del bot o None si falla"""
+    if not _permite():
+        return None
+
+    inicio = time.perf_counter()
+    try:
+        response = _cliente_sincrono().post(settings.CHATBOT_WEBHOOK_URL, json={'message': mensaje})
+    except httpx.HTTPError as error:
+        _registrar_error(error, inicio)
+        return None
+    return _leer_respuesta(response, inicio)
+
+
+async def aconsultar_webhook(mensaje):
+    """Envía el mensaje al webhook sin bloquear el loop; el texto del bot o None si falla"""
+    if not _permite():
+        return None
+
+    inicio = time.perf_counter()
+    try:
+        response = await _cliente().post(settings.CHATBOT_WEBHOOK_URL, json={'message': mensaje})
+    except httpx.HTTPError as error:
+        _registrar_error(error, inicio)
+        return None
+    except asyncio.CancelledError:
+        # Una prueba cancelada no debe dejar el circuito semiabierto para siempre;
+        # con el circuito cerrado el cliente que se fue no dice nada de n8n
+        if circuito.estado != CERRADO:
+            circuito.registrar_fallo()
+        raise
+    return _leer_respuesta(response, inicio)
+
+
+def _permite():
+    if circuito.permite():
+        return True
+    CHATBOT_CIRCUITO_RECHAZOS.inc()
+    return False
+
+
+def _registrar_error(error, inicio):
+    circuito.registrar_fallo()
+    resultado = 'timeout' if isinstance(error, httpx.TimeoutException) else 'error'
+    CHATBOT_WEBHOOK.observe(time.perf_counter() - inicio, resultado)
+
+
+def _registrar_status(response):
+    """Registra en el circuito una respuesta que no es 200"""
+    # 5xx: n8n con problemas; 4xx: responde, aunque no con lo esperado
+    if response.status_code >= 500:
+        circuito.registrar_fallo()
+    else:
+        circuito.registrar_exito()
+
+
+def _leer_respuesta(response, inicio):
+    """Texto del bot de una respuesta ya leída, o None si no es un 200"""
+    if response.status_code != 200:
+        _registrar_status(response)
+        CHATBOT_WEBHOOK.observe(time.perf_counter() - inicio, 'http_error')
+        return None
+
+    circuito.registrar_exito()
+    CHATBOT_WEBHOOK.observe(time.perf_counter() - inicio, 'ok')
+    if _tipo(response) in TIPOS_EN_STREAMING:
+        return texto_completo(response)
+    return extraer_respuesta(response)
+
+
+def texto_de_fragmento(dato):
+    """Texto de un fragmento del stream (JSON o texto plano); '' si no trae texto"""
+    try:
+        fragmento = json.loads(dato)
+    except ValueError:
+        return dato
+    if isinstance(fragmento, dict):
+        # n8n envía {"type": "begin"|"item"|"end", "content": ...}
+        for clave in _CLAVES_DE_TEXTO:
+            valor = fragmento.get(clave)
+            if isinstance(valor, str):
+                return valor
+        return ''
+    return fragmento if isinstance(fragmento, str) else dato
+
+
+def _tipo(response):
+    return response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+
+
+def _dato_de_linea(linea, sse, pendientes):
+    """
+    Dato que completa ``linea``, o None si todavía no hay uno.
+
+    Sin SSE cada línea no vacía es un dato (líneas JSON de n8n). Con SSE
+    ``pendientes`` acumula las líneas ``data:`` hasta la línea en blanco
+    que cierra el evento.
+    """
+    if not sse:
+        return linea if linea.strip() else None
+    if linea.startswith('data:'):
+        pendientes.append(linea[5:].removeprefix(' '))
+        return None
+    if linea or not pendientes:
+        return None
+    dato = '\n'.join(pendientes)
+    pendientes.clear()
+    return None if dato == '[DONE]' else dato
+
+
+def texto_completo(response):
+    """Texto de una respuesta en streaming ya leída (fragmentos concatenados)"""
+    sse = _tipo(response) == 'text/event-stream'
+    pendientes = []
+    textos = []
+    for linea in response.text.splitlines() + ['']:
+        dato = _dato_de_linea(linea, sse, pendientes)
+        if dato is not None:
+            textos.append(texto_de_fragmento(dato))
+    return ''.join(textos)
+
+
+class _Fragmentos:
+    """Textos de los fragmentos de una respuesta en streaming, línea a línea"""
+
+    def __init__(self, response, inicio):
+        self.sse = _tipo(response) == 'text/event-stream'
+        self.pendientes = []
+        self.inicio = inicio
+        self.primero = True
+
+    def texto(self, linea):
+        """Texto que completa ``linea`` ('' si no completa ninguno)"""
+        dato = _dato_de_linea(linea, self.sse, self.pendientes)
+        texto = texto_de_fragmento(dato) if dato is not None else ''
+        if texto and self.primero:
+            CHATBOT_PRIMER_FRAGMENTO.observe(time.perf_counter() - self.inicio)
+            self.primero = False
+        return texto
+
+
+async def _con_linea_final(lineas):
+    """Las líneas del stream más una en blanco que cierra el último evento"""
+    async for linea in lineas:
+        yield linea
+    yield ''
+
+
+def stream_webhook(mensaje):
+    """
+    Respuesta del bot a medida que llega del webhook (cliente síncrono).
+
+    Genera ``('delta', texto)`` por cada fragmento si el webhook responde
+    en streaming, o un único ``('respuesta', texto)`` si responde de una
+    vez. No genera nada si el webhook falla antes de responder o el
+    circuito está abierto; si falla a mitad del stream termina con los
+    fragmentos ya enviados.
+    """
+    if not _permite():
+        return
+
+    inicio = time.perf_counter()
+    resultado = 'error'
+    try:
+        with _cliente_sincrono().stream(
+            'POST', settings.CHATBOT_WEBHOOK_URL, json={'message': mensaje}
+        ) as response:
+            if response.status_code != 200:
+                response.read()
+                resultado = 'http_error'
+                _registrar_status(response)
+                return
+
+            if _tipo(response) not in TIPOS_EN_STREAMING:
+                response.read()
+                circuito.registrar_exito()
+                resultado = 'ok'
+                CHATBOT_PRIMER_FRAGMENTO.observe(time.perf_counter() - inicio)
+                yield 'respuesta', extraer_respuesta(response)
+                return
+
+            fragmentos = _Fragmentos(response, inicio)
+            for linea in chain(response.iter_lines(), ['']):
+                if texto := fragmentos.texto(linea):
+                    yield 'delta', texto
+            circuito.registrar_exito()
+            resultado = 'ok'
+    except httpx.HTTPError as error:
+        circuito.registrar_fallo()
+        resultado = 'timeout' if isinstance(error, httpx.TimeoutException) else 'error'
+    except GeneratorExit:
+        # El cliente se desconectó: no cuenta como fallo del webhook, pero
+        # una prueba del circuito semiabierto debe liberarse
+        if circuito.estado != CERRADO:
+            circuito.registrar_fallo()
+        resultado = 'cancelado'
+        raise
+    finally:
+        CHATBOT_WEBHOOK.observe(time.perf_counter() - inicio, resultado)
+
+
+async def astream_webhook(mensaje):
+    """Versión asíncrona de ``stream_webhook`` (cliente del event loop)"""
+    if not _permite():
+        return
+
+    inicio = time.perf_counter()
+    resultado = 'error'
+    try:
+        async with _cliente().stream(
+            'POST', settings.CHATBOT_WEBHOOK_URL, json={'message': mensaje}
+        ) as response:
+            if response.status_code != 200:
+                await response.aread()
+                resultado = 'http_error'
+                _registrar_status(response)
+                return
+
+            if _tipo(response) not in TIPOS_EN_STREAMING:
+                await response.aread()
+                circuito.registrar_exito()
+                resultado = 'ok'
+                CHATBOT_PRIMER_FRAGMENTO.observe(time.perf_counter() - inicio)
+                yield 'respuesta', extraer_respuesta(response)
+                return
+
+            fragmentos = _Fragmentos(response, inicio)
+            async for linea in _con_linea_final(response.aiter_lines()):
+                if texto := fragmentos.texto(linea):
+                    yield 'delta', texto
+            circuito.registrar_exito()
+            resultado = 'ok'
+    except httpx.HTTPError as error:
+        circuito.registrar_fallo()
+        resultado = 'timeout' if isinstance(error, httpx.TimeoutException) else 'error'
+    except (asyncio.CancelledError, GeneratorExit):
+        if circuito.estado != CERRADO:
+            circuito.registrar_fallo()
+        resultado = 'cancelado'
+        raise
+    finally:
+        CHATBOT_WEBHOOK.observe(time.perf_counter() - inicio, resultado)
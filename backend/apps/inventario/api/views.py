@@ -16,6 +16,7 @@ from django.conf import settings
 
 from apps.inventario.utils import generar_pdf_inventario
 from apps.users.api.permissions import IsAdminRole, IsAdminOrReadOnly
+from infrastructure.streaming import StreamingJSONResponse, acepta_streaming
 from application.use_cases import InventarioUseCases
 from domain.exceptions import (
     EntityNotFoundException,
@@ -26,7 +27,6 @@ from domain.exceptions import (
 from .serializers import (
     InventarioInputSerializer,
     InventarioOutputSerializer,
-    InventarioListOutputSerializer,
     EnviarPDFSerializer
 )
 
@@ -52,12 +52,13 @@ class InventarioViewSet(ViewSet):
     def list(self, request):
         """GET /api/inventario/ - Listar todo el inventario"""
         try:
-            inventarios = self._use_cases.listar_inventario()
-            serializer = InventarioListOutputSerializer(
-                [i.to_dict() for i in inventarios],
-                many=True
-            )
-            return Response(serializer.data)
+            # Ruta rápida: filas de confianza, sin validar campo por campo
+            if acepta_streaming(request):
+                return StreamingJSONResponse(
+                    request, (i.to_dict() for i in self._use_cases.iterar_filas())
+                )
+            inventarios = self._use_cases.listar_filas()
+            return Response([i.to_dict() for i in inventarios])
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -161,12 +162,8 @@ class InventarioViewSet(ViewSet):
             )
 
         try:
-            inventarios = self._use_cases.listar_por_empresa(empresa_nit)
-            serializer = InventarioListOutputSerializer(
-                [i.to_dict() for i in inventarios],
-                many=True
-            )
-            return Response(serializer.data)
+            inventarios = self._use_cases.listar_filas(empresa_nit)
+            return Response([i.to_dict() for i in inventarios])
         except ValidationException as e:
             return Response(
                 {'error': e.message},
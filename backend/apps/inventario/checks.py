@@ -0,0 +1,48 @@
+"""
+Chequeo de que el particionamiento del inventario coincide con la configuración.
+
+La migración 0003 particiona la tabla según INVENTARIO_PARTICIONES al
+aplicarse y no vuelve a correr: si después cambia el valor, la tabla ya no
+es la que describe la configuración y ``migrate`` (o ``check --database``)
+falla hasta que se reparticione con el comando particiones_inventario.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+from infrastructure import particiones
+
+MIGRACION = ('inventario', '0003_particionar_por_empresa')
+
+
+@register(Tags.database)
+def particiones_del_inventario(app_configs, databases=None, **kwargs):
+    from apps.inventario.models import Inventario
+
+    errores = []
+    tabla = Inventario._meta.db_table
+    for alias in databases or ():
+        connection = connections[alias]
+        if connection.vendor != 'postgresql':
+            continue
+        registro = MigrationRecorder(connection)
+        app, nombre = MIGRACION
+        if not registro.has_table() or not registro.migration_qs.filter(app=app, name=nombre).exists():
+            continue
+        actuales = (
+            len(particiones.listar_particiones(connection, tabla))
+            if particiones.esta_particionada(connection, tabla) else 0
+        )
+        if actuales != settings.INVENTARIO_PARTICIONES:
+            errores.append(Error(
+                f'La tabla {tabla} de la base "{alias}" tiene {actuales} particiones y '
+                f'INVENTARIO_PARTICIONES es {settings.INVENTARIO_PARTICIONES}.',
+                hint=(
+                    'La migración ya se aplicó y no vuelve a particionar. Restaure el valor '
+                    'anterior o ejecute "manage.py particiones_inventario --particiones '
+                    f'{settings.INVENTARIO_PARTICIONES}" (bloquea la tabla mientras copia).'
+                ),
+                id='inventario.E001',
+            ))
+    return errores
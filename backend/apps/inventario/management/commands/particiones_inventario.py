@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from apps.inventario.models import Inventario
+from infrastructure import particiones
+
+
+class Command(BaseCommand):
+    help = (
+        'Muestra las particiones hash por empresa del inventario o lo reparticiona '
+        '(solo PostgreSQL)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--particiones', type=int,
+            help='Reparticionar en N particiones (0 = sin particionar); bloquea la tabla mientras copia'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('El particionamiento solo está disponible en PostgreSQL')
+
+        tabla = Inventario._meta.db_table
+        modulo = options['particiones']
+        if modulo is not None:
+            self.reparticionar(tabla, modulo)
+
+        if not particiones.esta_particionada(connection, tabla):
+            self.stdout.write(f'La tabla {tabla} no está particionada')
+            return
+        for nombre, limites, filas, tamano in particiones.listar_particiones(connection, tabla):
+            self.stdout.write(f'{nombre}  {limites}  ~{filas} filas  {tamano // 1024} KB')
+
+    def reparticionar(self, tabla, modulo):
+        if modulo < 0:
+            raise CommandError('El número de particiones no puede ser negativo')
+        actuales = (
+            len(particiones.listar_particiones(connection, tabla))
+            if particiones.esta_particionada(connection, tabla) else 0
+        )
+        if modulo == actuales:
+            self.stdout.write(f'La tabla {tabla} ya tiene {modulo} particiones')
+            return
+
+        columna = Inventario._meta.get_field('empresa').column
+        with transaction.atomic():
+            if modulo:
+                particiones.particionar_por_hash(connection, tabla, columna, modulo)
+            else:
+                particiones.desparticionar(connection, tabla)
+        self.stdout.write(self.style.SUCCESS(f'Inventario reparticionado: {actuales} -> {modulo} particiones'))
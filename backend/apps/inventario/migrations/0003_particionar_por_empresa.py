@@ -0,0 +1,54 @@
+# Generated by Django 5.2.18 on 2026-10-19 18:05
+
+from django.conf import settings
+from django.db import migrations
+
+from infrastructure import particiones
+
+
+def particionar(apps, schema_editor):
+    """
+    Particiona el inventario por hash de la empresa (solo PostgreSQL y con
+    settings.INVENTARIO_PARTICIONES mayor que 0; por defecto es 0 y la
+    migración no hace nada).
+
+    Convertir la tabla la reescribe entera: crea una copia particionada,
+    copia las filas con INSERT ... SELECT, borra la original y renombra la
+    copia. Todo corre en la transacción de la migración con la tabla
+    bloqueada en ACCESS EXCLUSIVE, así que ni lecturas ni escrituras del
+    inventario avanzan hasta que termina (el tiempo crece con las filas):
+    en producción hay que aplicarla en una ventana de mantenimiento. La
+    llave primaria en la base pasa a ser (id, empresa_id).
+
+    El número de particiones se fija al aplicarla y después solo cambia con
+    el comando particiones_inventario; el chequeo inventario.E001 falla si
+    INVENTARIO_PARTICIONES ya no coincide con la tabla. El estado de los
+    modelos no cambia.
+    """
+    connection = schema_editor.connection
+    if connection.vendor != 'postgresql' or not settings.INVENTARIO_PARTICIONES:
+        return
+    Inventario = apps.get_model('inventario', 'Inventario')
+    tabla = Inventario._meta.db_table
+    if particiones.esta_particionada(connection, tabla):
+        return
+    columna = Inventario._meta.get_field('empresa').column
+    particiones.particionar_por_hash(connection, tabla, columna, settings.INVENTARIO_PARTICIONES)
+
+
+def desparticionar(apps, schema_editor):
+    connection = schema_editor.connection
+    tabla = apps.get_model('inventario', 'Inventario')._meta.db_table
+    if particiones.esta_particionada(connection, tabla):
+        particiones.desparticionar(connection, tabla)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0002_indices_cantidad'),
+    ]
+
+    operations = [
+        migrations.RunPython(particionar, desparticionar),
+    ]
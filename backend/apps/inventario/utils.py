@@ -1,4 +1,5 @@
 """Utilidades para generación de PDF del inventario"""
+import time
 from io import BytesIO
 from datetime import datetime
 from reportlab.lib import colors
@@ -9,6 +10,7 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 
 from apps.inventario.models import Inventario
+from apps.monitoring.metrics import PDF_RENDER
 
 
 def generar_pdf_inventario(empresa_nit=None):
@@ -19,6 +21,7 @@ def generar_pdf_inventario(empresa_nit=None):
     Returns:
         BytesIO buffer con el PDF generado
     """
+    inicio = time.perf_counter()
     buffer = BytesIO()
     doc = SimpleDocTemplate(
         buffer,
@@ -135,4 +138,5 @@ def generar_pdf_inventario(empresa_nit=None):
 
     doc.build(elements)
     buffer.seek(0)
+    PDF_RENDER.observe(time.perf_counter() - inicio)
     return buffer
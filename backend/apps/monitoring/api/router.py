@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import PerfilesView
+
+urlpatterns = [
+    path('monitoring/perfiles/', PerfilesView.as_view(), name='perfiles'),
+]
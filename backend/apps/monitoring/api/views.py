@@ -0,0 +1,31 @@
+from rest_framework import status
+from rest_framework.views import APIView
+from rest_framework.response import Response
+
+from apps.users.api.permissions import IsAdminRole
+from apps.monitoring.profiling import ORDENES, listar_perfiles, agregar_por_vista
+
+
+class PerfilesView(APIView):
+    """
+    Vista para consultar los perfiles de requests guardados.
+
+    GET /api/monitoring/perfiles/              - Resumen agregado por vista
+    GET /api/monitoring/perfiles/?vista=X      - pstats combinado de la vista X
+    GET /api/monitoring/perfiles/?listar=1     - Metadatos de cada perfil
+
+    ``orden`` acepta los criterios de pstats.SortKey (cumulative por defecto).
+    """
+    permission_classes = [IsAdminRole]
+
+    def get(self, request):
+        vista = request.query_params.get('vista')
+        if request.query_params.get('listar'):
+            return Response(listar_perfiles(vista))
+        orden = request.query_params.get('orden', 'cumulative')
+        if orden not in ORDENES:
+            return Response(
+                {'error': f'Orden inválido. Órdenes válidos: {list(ORDENES)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(agregar_por_vista(vista, orden=orden))
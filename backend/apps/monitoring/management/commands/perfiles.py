@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+
+from apps.monitoring.profiling import ORDENES, listar_perfiles, agregar_por_vista
+
+
+class Command(BaseCommand):
+    help = 'Lista y agrega por vista los perfiles de requests guardados por ProfilingMiddleware'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vista', help='Nombre de la vista a agregar')
+        parser.add_argument('--listar', action='store_true', help='Listar cada perfil guardado')
+        parser.add_argument('--orden', default='cumulative', choices=ORDENES, help='Criterio de ordenamiento de pstats')
+        parser.add_argument('--limite', type=int, default=30, help='Funciones a mostrar')
+
+    def handle(self, *args, **options):
+        vista = options['vista']
+
+        if options['listar']:
+            for p in listar_perfiles(vista):
+                self.stdout.write(
+                    f"{p['id']}  {p['metodo']:6} {p['status']}  {p['duracion_ms']:>9.2f} ms  "
+                    f"{p['vista']}  {p['ruta']}"
+                )
+            return
+
+        if vista:
+            resultado = agregar_por_vista(vista, orden=options['orden'], limite=options['limite'])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{resultado['vista']}: {resultado['perfiles']} perfiles, "
+                    f"{resultado['duracion_media_ms']} ms de media"
+                )
+            )
+            self.stdout.write(resultado['reporte'])
+            return
+
+        for fila in agregar_por_vista():
+            self.stdout.write(
+                f"{fila['vista']:40} {fila['perfiles']:>5}  "
+                f"media {fila['duracion_media_ms']:>9.2f} ms  max {fila['duracion_max_ms']:>9.2f} ms"
+            )
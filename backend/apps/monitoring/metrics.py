@@ -0,0 +1,373 @@
+"""
+Métricas en formato de exposición de Prometheus.
+
+Cada proceso acumula sus métricas en diccionarios en memoria (sin locks:
+una actualización es un par de operaciones sobre un dict). Cuando
+``settings.METRICS_DIR`` está configurado, cada worker vuelca
+periódicamente su estado a ``<METRICS_DIR>/<pid>-<id>.json`` y el
+endpoint ``/metrics`` suma los archivos de todos los workers al momento
+del scrape. El archivo de un proceso que ya no existe (un worker
+reciclado) se borra después de sumar sus contadores e histogramas a
+``<METRICS_DIR>/retirados.json``, que cada scrape también suma: así los
+``_total`` no bajan (Prometheus lo leería como un reinicio del contador) y
+solo se descartan sus gauges. Sin ``METRICS_DIR`` solo se exponen las
+métricas del proceso que atiende el scrape.
+"""
+import json
+import os
+import time
+import uuid
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - depende del entorno
+    fcntl = None
+
+BUCKETS_POR_DEFECTO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_METRICAS = {}
+_COLECTORES = []
+_ID_PROCESO = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+# Acumulado de los contadores e histogramas de los procesos terminados
+RETIRADOS = 'retirados.json'
+_ultimo_volcado = 0.0
+
+
+class _Metrica:
+    """Base de las métricas: nombre, ayuda y valores por etiquetas"""
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        _METRICAS[nombre] = self
+
+    def estado(self):
+        """Estado serializable de la métrica en este proceso"""
+        return {
+            'tipo': self.tipo,
+            'ayuda': self.ayuda,
+            'etiquetas': list(self.etiquetas),
+            'valores': [[list(k), v] for k, v in list(self._valores.items())],
+        }
+
+
+class Counter(_Metrica):
+    """Contador monótono"""
+    tipo = 'counter'
+
+    def inc(self, *etiquetas, valor=1):
+        self._valores[etiquetas] = self._valores.get(etiquetas, 0) + valor
+
+
+class Gauge(_Metrica):
+    """
+    Valor instantáneo.
+
+    ``modo`` dice cómo se combinan los valores de los procesos: ``max`` o
+    ``min`` para estados del proceso (el peor o el mejor) y ``sum`` para
+    cantidades que tiene cada proceso (buffers, colas). Los gauges de los
+    procesos terminados no se guardan, así que ``sum`` es la suma de los
+    vivos (el ``livesum`` de prometheus_client).
+    """
+    tipo = 'gauge'
+    MODOS = ('max', 'min', 'sum')
+
+    def __init__(self, nombre, ayuda, etiquetas=(), modo='max'):
+        if modo not in self.MODOS:
+            raise ValueError(f'Modo de gauge inválido: {modo!r} (válidos: {", ".join(self.MODOS)})')
+        super().__init__(nombre, ayuda, etiquetas)
+        self.modo = modo
+
+    def set(self, valor, *etiquetas):
+        self._valores[etiquetas] = valor
+
+    def estado(self):
+        datos = super().estado()
+        datos['modo'] = self.modo
+        return datos
+
+
+class Histogram(_Metrica):
+    """Histograma con buckets fijos (conteos por bucket + suma)"""
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_POR_DEFECTO):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(buckets)
+
+    def observe(self, valor, *etiquetas):
+        estado = self._valores.get(etiquetas)
+        if estado is None:
+            # Un conteo por bucket, uno para +Inf y la suma al final
+            estado = self._valores[etiquetas] = [0] * (len(self.buckets) + 1) + [0.0]
+        estado[bisect_left(self.buckets, valor)] += 1
+        estado[-1] += valor
+
+    def estado(self):
+        datos = super().estado()
+        datos['valores'] = [[k, list(v)] for k, v in datos['valores']]
+        datos['buckets'] = list(self.buckets)
+        return datos
+
+
+def registrar_colector(funcion):
+    """
+    Registra una función que se evalúa en cada scrape.
+
+    La función devuelve una lista de tuplas (nombre, tipo, ayuda, valor).
+    """
+    _COLECTORES.append(funcion)
+    return funcion
+
+
+def estado_local():
+    """Estado de todas las métricas del proceso actual"""
+    return {nombre: metrica.estado() for nombre, metrica in list(_METRICAS.items())}
+
+
+def volcar(forzar=False):
+    """
+    Escribe el estado del proceso en METRICS_DIR (si está configurado).
+
+    Sin ``forzar`` solo escribe si pasó METRICS_FLUSH_INTERVAL desde el
+    último volcado, para no tocar disco en cada request.
+    """
+    global _ultimo_volcado
+    directorio = settings.METRICS_DIR
+    if not directorio:
+        return
+    ahora = time.monotonic()
+    if not forzar and ahora - _ultimo_volcado < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _ultimo_volcado = ahora
+
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    destino = directorio / f'{_ID_PROCESO}.json'
+    temporal = destino.with_suffix('.tmp')
+    temporal.write_text(json.dumps(estado_local()))
+    os.replace(temporal, destino)
+
+
+def _estados_de_procesos():
+    """Estados de todos los procesos (o solo el local sin METRICS_DIR)"""
+    if not settings.METRICS_DIR:
+        return [estado_local()]
+
+    volcar(forzar=True)
+    directorio = Path(settings.METRICS_DIR)
+    estados, terminados = [], []
+    # Volcados de workers: <pid>-<id>.json
+    for archivo in directorio.glob('*-*.json'):
+        if not _proceso_vivo(archivo.name.split('-', 1)[0]):
+            terminados.append(archivo)
+            continue
+        estado = _leer(archivo)
+        if estado is not None:
+            estados.append(estado)
+    if terminados:
+        _retirar(directorio, terminados)
+    retirados = _leer(directorio / RETIRADOS)
+    if retirados is not None:
+        estados.append(retirados)
+    return estados
+
+
+def _leer(archivo):
+    try:
+        return json.loads(archivo.read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _retirar(directorio, terminados):
+    """
+    Suma los contadores e histogramas de los volcados de procesos terminados
+    a RETIRADOS y borra los volcados (sus gauges se descartan).
+
+    Con un lock sobre el directorio: dos scrapes simultáneos no suman dos
+    veces el mismo volcado.
+    """
+    with open(directorio / f'{RETIRADOS}.lock', 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        destino = directorio / RETIRADOS
+        estados = [_leer(destino) or {}]
+        borrar = []
+        for archivo in terminados:
+            # Otro scrape pudo haberlo retirado antes de tomar el lock
+            if not archivo.exists():
+                continue
+            borrar.append(archivo)
+            estado = _leer(archivo) or {}
+            estados.append({n: d for n, d in estado.items() if d['tipo'] != 'gauge'})
+        if not borrar:
+            return
+        temporal = destino.with_suffix('.tmp')
+        temporal.write_text(json.dumps(_serializable(agregar(estados))))
+        os.replace(temporal, destino)
+        for archivo in borrar:
+            archivo.unlink(missing_ok=True)
+
+
+def _proceso_vivo(pid):
+    """Si el proceso con ese PID sigue corriendo (False si el PID no es válido)"""
+    try:
+        pid = int(pid)
+        if pid <= 0:
+            return False
+        os.kill(pid, 0)
+    except PermissionError:
+        # Existe, pero es de otro usuario
+        return True
+    except (ValueError, OverflowError, OSError):
+        return False
+    return True
+
+
+_COMBINAR_GAUGE = {'max': max, 'min': min, 'sum': lambda previo, valor: previo + valor}
+
+
+def agregar(estados):
+    """Combina los estados de varios procesos en uno solo"""
+    total = {}
+    for estado in estados:
+        for nombre, datos in estado.items():
+            destino = total.setdefault(nombre, {**datos, 'valores': {}})
+            for etiquetas, valor in datos['valores']:
+                clave = tuple(etiquetas)
+                previo = destino['valores'].get(clave)
+                if previo is None:
+                    destino['valores'][clave] = valor
+                elif datos['tipo'] == 'histogram':
+                    destino['valores'][clave] = [a + b for a, b in zip(previo, valor)]
+                elif datos['tipo'] == 'gauge':
+                    destino['valores'][clave] = _COMBINAR_GAUGE[datos.get('modo', 'max')](previo, valor)
+                else:
+                    destino['valores'][clave] = previo + valor
+    return total
+
+
+def _serializable(total):
+    """Estado agregado con el formato de los volcados (etiquetas como listas)"""
+    return {
+        nombre: {**datos, 'valores': [[list(k), v] for k, v in datos['valores'].items()]}
+        for nombre, datos in total.items()
+    }
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(nombres, valores, extra=None):
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+def exponer():
+    """Texto en formato de exposición de Prometheus (versión 0.0.4)"""
+    lineas = []
+    for nombre, datos in sorted(agregar(_estados_de_procesos()).items()):
+        lineas.append(f"# HELP {nombre} {datos['ayuda']}")
+        lineas.append(f"# TYPE {nombre} {datos['tipo']}")
+        for etiquetas, valor in sorted(datos['valores'].items()):
+            if datos['tipo'] == 'histogram':
+                acumulado = 0
+                for limite, conteo in zip(datos['buckets'] + [float('inf')], valor[:-1]):
+                    acumulado += conteo
+                    le = f'le="{_numero(float(limite))}"'
+                    lineas.append(
+                        f"{nombre}_bucket{_etiquetas(datos['etiquetas'], etiquetas, le)} {acumulado}"
+                    )
+                lineas.append(f"{nombre}_sum{_etiquetas(datos['etiquetas'], etiquetas)} {_numero(valor[-1])}")
+                lineas.append(f"{nombre}_count{_etiquetas(datos['etiquetas'], etiquetas)} {acumulado}")
+            else:
+                lineas.append(f"{nombre}{_etiquetas(datos['etiquetas'], etiquetas)} {_numero(valor)}")
+
+    for colector in _COLECTORES:
+        for nombre, tipo, ayuda, valor in colector():
+            lineas.append(f'# HELP {nombre} {ayuda}')
+            lineas.append(f'# TYPE {nombre} {tipo}')
+            lineas.append(f'{nombre} {_numero(valor)}')
+
+    return '\n'.join(lineas) + '\n'
+
+
+# Métricas de la API
+HTTP_REQUESTS = Counter(
+    'http_requests_total', 'Requests atendidos por vista, método y status',
+    ('view', 'method', 'status')
+)
+HTTP_DURACION = Histogram(
+    'http_request_duration_seconds', 'Latencia de los requests por vista',
+    ('view', 'method')
+)
+DB_CONSULTAS = Counter(
+    'db_queries_total', 'Consultas SQL ejecutadas por vista', ('view',)
+)
+DB_DURACION = Counter(
+    'db_query_duration_seconds_total', 'Tiempo total en base de datos por vista', ('view',)
+)
+
+# Métricas de dominio
+BLOCKCHAIN_APPEND = Histogram(
+    'blockchain_append_duration_seconds', 'Tiempo para encadenar y guardar un bloque'
+)
+INVENTARIO_MOVIMIENTOS = Counter(
+    'inventory_stock_movements_total', 'Movimientos de inventario por tipo', ('tipo',)
+)
+CHATBOT_WEBHOOK = Histogram(
+    'chatbot_webhook_duration_seconds', 'Latencia del webhook del chatbot por resultado',
+    ('resultado',)
+)
+CHATBOT_PRIMER_FRAGMENTO = Histogram(
+    'chatbot_time_to_first_token_seconds',
+    'Tiempo hasta el primer fragmento de la respuesta del webhook (modo streaming)'
+)
+CHATBOT_CIRCUITO = Gauge(
+    'chatbot_webhook_circuit_state',
+    'Estado del circuit breaker del webhook (0 cerrado, 1 semiabierto, 2 abierto)'
+)
+CHATBOT_CIRCUITO_CAMBIOS = Counter(
+    'chatbot_webhook_circuit_transitions_total',
+    'Cambios de estado del circuit breaker del webhook', ('estado',)
+)
+CHATBOT_CIRCUITO_RECHAZOS = Counter(
+    'chatbot_webhook_short_circuited_total',
+    'Mensajes respondidos con el fallback sin llamar al webhook (circuito abierto)'
+)
+CHATBOT_CACHE = Counter(
+    'chatbot_cache_requests_total',
+    'Consultas a la caché de respuestas del chatbot (hit, miss o bypass)', ('resultado',)
+)
+CHATBOT_RESPUESTAS = Counter(
+    'chatbot_responses_total', 'Respuestas del chatbot por origen (datos, cache, webhook o fallback)',
+    ('origen',)
+)
+CHATBOT_BUFFER_PENDIENTES = Gauge(
+    'chatbot_message_buffer_pending', 'Mensajes del chatbot en el buffer esperando escribirse',
+    modo='sum'
+)
+CHATBOT_BUFFER_ESCRITOS = Counter(
+    'chatbot_message_buffer_written_total',
+    'Mensajes del chatbot escritos desde el buffer (guardados o descartados por error)', ('resultado',)
+)
+PDF_RENDER = Histogram(
+    'pdf_render_duration_seconds', 'Tiempo de generación del PDF de inventario'
+)
@@ -0,0 +1,171 @@
+import cProfile
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from apps.monitoring import metrics
+from apps.monitoring.queries import record_queries
+from apps.monitoring.profiling import debe_perfilar, guardar_perfil, nombre_de_vista
+
+
+class MetricsMiddleware:
+    """
+    Middleware que alimenta las métricas HTTP de /metrics.
+
+    Debe ir primero en MIDDLEWARE para medir el request completo; si
+    QueryCountMiddleware está activo también registra las consultas SQL
+    por vista. Funciona en modo síncrono y asíncrono.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        inicio = time.perf_counter()
+        response = self.get_response(request)
+        self._registrar(request, response, time.perf_counter() - inicio)
+        return response
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        response = await self.get_response(request)
+        self._registrar(request, response, time.perf_counter() - inicio)
+        return response
+
+    def _registrar(self, request, response, duracion):
+        vista = nombre_de_vista(request) if getattr(request, 'resolver_match', None) else 'no_resuelta'
+        metrics.HTTP_REQUESTS.inc(vista, request.method, str(response.status_code))
+        metrics.HTTP_DURACION.observe(duracion, vista, request.method)
+
+        stats = getattr(request, 'query_stats', None)
+        if stats is not None:
+            metrics.DB_CONSULTAS.inc(vista, valor=stats.count)
+            metrics.DB_DURACION.inc(vista, valor=stats.duration)
+
+        metrics.volcar()
+
+
+class QueryCountMiddleware:
+    """
+    Middleware que registra las consultas SQL de cada request.
+
+    Deja las estadísticas en ``request.query_stats`` y, con DEBUG activo,
+    las expone en las cabeceras de la respuesta:
+        X-DB-Query-Count: Número de consultas
+        X-DB-Query-Time-Ms: Tiempo total en base de datos
+        X-DB-Duplicate-Queries: Ejecuciones repetidas con la misma huella
+
+    En respuestas en streaming solo se cuentan las consultas hechas antes
+    de enviar el cuerpo. Funciona en modo síncrono y asíncrono; en modo
+    asíncrono las conexiones son del hilo donde corre el ORM del request
+    (``sync_to_async``), así que el registro se instala en ese hilo y no
+    incluye lo que corre con ``thread_sensitive=False``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'QUERY_INSTRUMENTATION', settings.DEBUG):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with record_queries() as recorder:
+            request.query_stats = recorder
+            response = self.get_response(request)
+        return self._cabeceras(response, recorder)
+
+    async def __acall__(self, request):
+        pila = ExitStack()
+        recorder = await sync_to_async(pila.enter_context)(record_queries())
+        try:
+            request.query_stats = recorder
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(pila.close)()
+        return self._cabeceras(response, recorder)
+
+    def _cabeceras(self, response, recorder):
+        if settings.DEBUG:
+            response['X-DB-Query-Count'] = str(recorder.count)
+            response['X-DB-Query-Time-Ms'] = f"{recorder.duration * 1000:.2f}"
+            response['X-DB-Duplicate-Queries'] = str(recorder.duplicate_count)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Middleware que ejecuta una muestra de requests bajo cProfile.
+
+    Se activa con PROFILING_SAMPLE_RATE > 0 o con PROFILING_SECRET
+    (enviado en la cabecera X-Profile o en ?_profile=). Los perfiles
+    se guardan en PROFILING_DIR y la respuesta incluye X-Profile-Id.
+    Funciona en modo síncrono y asíncrono; cProfile mide un solo hilo, así
+    que bajo ASGI el perfil es el del event loop mientras dura el request
+    (incluye lo que otros requests ejecutan en el loop y no el código que
+    corre en hilos con ``sync_to_async``).
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_SAMPLE_RATE and not settings.PROFILING_SECRET:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profiler = self._iniciar(request)
+        if profiler is None:
+            return self.get_response(request)
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        return self._guardar(profiler, request, response, time.perf_counter() - inicio)
+
+    async def __acall__(self, request):
+        profiler = self._iniciar(request)
+        if profiler is None:
+            return await self.get_response(request)
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        return self._guardar(profiler, request, response, time.perf_counter() - inicio)
+
+    def _iniciar(self, request):
+        """Profiler ya activo si el request va en la muestra, o None"""
+        if not debe_perfilar(request):
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Ya hay otro profiler activo en este hilo
+            return None
+        return profiler
+
+    def _guardar(self, profiler, request, response, duracion):
+        response['X-Profile-Id'] = guardar_perfil(profiler, request, response, duracion)
+        return response
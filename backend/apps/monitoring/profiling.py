@@ -0,0 +1,157 @@
+"""
+Perfilado de requests con cProfile.
+
+Cada perfil se guarda como un archivo ``.prof`` (formato pstats) junto a
+un ``.json`` con los metadatos del request, en ``settings.PROFILING_DIR``.
+Los perfiles de una misma vista se pueden agregar para ver dónde se
+concentra el tiempo entre DRF, DTOs, serializers y signals.
+"""
+import hmac
+import io
+import json
+import pstats
+import random
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+
+# Criterios de ordenamiento que acepta pstats.Stats.sort_stats
+ORDENES = tuple(orden.value for orden in pstats.SortKey)
+
+
+def directorio_perfiles():
+    """Directorio donde se guardan los perfiles"""
+    return Path(settings.PROFILING_DIR)
+
+
+def debe_perfilar(request):
+    """
+    Decide si el request se perfila.
+
+    Se perfila cuando trae el secreto configurado (cabecera X-Profile o
+    parámetro ?_profile=) o, en otro caso, según la tasa de muestreo.
+    """
+    secreto = settings.PROFILING_SECRET
+    if secreto:
+        enviado = request.headers.get('X-Profile') or request.GET.get('_profile')
+        if enviado and hmac.compare_digest(enviado, secreto):
+            return True
+    tasa = settings.PROFILING_SAMPLE_RATE
+    return tasa > 0 and random.random() < tasa
+
+
+def nombre_de_vista(request):
+    """Nombre de la vista resuelta para el request (o la ruta si no resolvió)"""
+    match = getattr(request, 'resolver_match', None)
+    if match:
+        return match.view_name or match._func_path
+    return request.path
+
+
+def guardar_perfil(profiler, request, response, duracion):
+    """Guarda el perfil y sus metadatos; devuelve el identificador"""
+    directorio = directorio_perfiles()
+    directorio.mkdir(parents=True, exist_ok=True)
+
+    ahora = datetime.now()
+    perfil_id = f"{ahora.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    user = getattr(request, 'user', None)
+
+    profiler.dump_stats(directorio / f'{perfil_id}.prof')
+    metadatos = {
+        'id': perfil_id,
+        'vista': nombre_de_vista(request),
+        'metodo': request.method,
+        'ruta': request.get_full_path(),
+        'status': response.status_code,
+        'duracion_ms': round(duracion * 1000, 2),
+        'usuario': user.email if user and user.is_authenticated else None,
+        'timestamp': ahora.isoformat(),
+    }
+    (directorio / f'{perfil_id}.json').write_text(json.dumps(metadatos))
+
+    _podar(directorio)
+    return perfil_id
+
+
+def _podar(directorio):
+    """Elimina los perfiles más antiguos por encima de PROFILING_MAX_FILES"""
+    limite = settings.PROFILING_MAX_FILES
+    archivos = sorted(directorio.glob('*.json'))
+    if not limite or len(archivos) <= limite:
+        return
+    for metadatos in archivos[:len(archivos) - limite]:
+        metadatos.with_suffix('.prof').unlink(missing_ok=True)
+        metadatos.unlink(missing_ok=True)
+
+
+def listar_perfiles(vista=None):
+    """Lista los metadatos de los perfiles guardados (más recientes primero)"""
+    directorio = directorio_perfiles()
+    if not directorio.exists():
+        return []
+
+    perfiles = []
+    for archivo in sorted(directorio.glob('*.json'), reverse=True):
+        try:
+            metadatos = json.loads(archivo.read_text())
+        except (OSError, ValueError):
+            continue
+        if vista is None or metadatos.get('vista') == vista:
+            perfiles.append(metadatos)
+    return perfiles
+
+
+def agregar_por_vista(vista=None, orden='cumulative', limite=30):
+    """
+    Agrega los perfiles guardados.
+
+    Args:
+        vista: Nombre de vista a agregar (None agrupa un resumen por vista)
+        orden: Criterio de pstats para ordenar funciones
+        limite: Número de funciones a incluir en el reporte
+
+    Returns:
+        Sin vista: lista de {vista, perfiles, duracion_media_ms, duracion_max_ms}
+        Con vista: dict con el resumen y el reporte de pstats combinado
+    """
+    perfiles = listar_perfiles(vista)
+
+    if vista is None:
+        por_vista = {}
+        for p in perfiles:
+            por_vista.setdefault(p['vista'], []).append(p['duracion_ms'])
+        return sorted(
+            (
+                {
+                    'vista': nombre,
+                    'perfiles': len(duraciones),
+                    'duracion_media_ms': round(sum(duraciones) / len(duraciones), 2),
+                    'duracion_max_ms': max(duraciones),
+                }
+                for nombre, duraciones in por_vista.items()
+            ),
+            key=lambda r: r['duracion_media_ms'] * r['perfiles'],
+            reverse=True
+        )
+
+    directorio = directorio_perfiles()
+    archivos = [
+        str(directorio / f"{p['id']}.prof")
+        for p in perfiles
+        if (directorio / f"{p['id']}.prof").exists()
+    ]
+    salida = io.StringIO()
+    if archivos:
+        stats = pstats.Stats(*archivos, stream=salida)
+        stats.strip_dirs().sort_stats(orden).print_stats(limite)
+
+    duraciones = [p['duracion_ms'] for p in perfiles]
+    return {
+        'vista': vista,
+        'perfiles': len(perfiles),
+        'duracion_media_ms': round(sum(duraciones) / len(duraciones), 2) if duraciones else 0,
+        'reporte': salida.getvalue(),
+    }
@@ -0,0 +1,94 @@
+"""
+Instrumentación de consultas SQL.
+
+Registra, mediante ``connection.execute_wrapper``, cuántas consultas
+ejecuta un bloque de código, cuánto tiempo pasan en la base de datos y
+qué consultas se repiten con la misma forma (huellas duplicadas, el
+síntoma típico de un N+1).
+"""
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+
+from django.db import connections
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST_RE = re.compile(r'\bIN\s*\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)', re.IGNORECASE)
+_SPACES_RE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normaliza una consulta SQL quitando literales, listas IN y espacios"""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACES_RE.sub(' ', sql).strip()
+
+
+class QueryRecorder:
+    """
+    Wrapper de ejecución que acumula estadísticas de las consultas.
+
+    Atributos:
+        count: Número de consultas ejecutadas
+        duration: Tiempo total en base de datos (segundos)
+        queries: Lista de tuplas (sql, duración)
+        fingerprints: Contador de consultas por huella normalizada
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.queries = []
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.duration += elapsed
+            self.queries.append((sql, elapsed))
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        """Huellas que se ejecutaron más de una vez y cuántas veces"""
+        return {fp: total for fp, total in self.fingerprints.items() if total > 1}
+
+    @property
+    def duplicate_count(self):
+        """Número de ejecuciones repetidas (las que sobran de cada huella)"""
+        return sum(total - 1 for total in self.fingerprints.values())
+
+    def report(self):
+        """Resumen legible de las consultas registradas"""
+        lines = [
+            f"{self.count} consultas en {self.duration * 1000:.1f} ms "
+            f"({self.duplicate_count} repetidas)"
+        ]
+        for i, (sql, elapsed) in enumerate(self.queries, start=1):
+            lines.append(f"  {i}. [{elapsed * 1000:.2f} ms] {sql}")
+        for fp, total in self.duplicates.items():
+            lines.append(f"  x{total}: {fp}")
+        return "\n".join(lines)
+
+
+@contextmanager
+def record_queries(using=None):
+    """
+    Registra las consultas ejecutadas dentro del bloque.
+
+    Args:
+        using: Alias de la base de datos (por defecto todas las configuradas)
+    """
+    recorder = QueryRecorder()
+    aliases = [using] if using else list(connections)
+    with ExitStack() as stack:
+        for alias in aliases:
+            stack.enter_context(connections[alias].execute_wrapper(recorder))
+        yield recorder
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.inventario.models import Inventario
+from apps.blockchain.models import RegistroBlockchain
+from apps.monitoring.metrics import INVENTARIO_MOVIMIENTOS, registrar_colector
+
+
+@receiver(post_save, sender=Inventario)
+def contar_movimiento_inventario(sender, instance, created, **kwargs):
+    """Cuenta altas y actualizaciones de inventario"""
+    INVENTARIO_MOVIMIENTOS.inc('alta' if created else 'actualizacion')
+
+
+@receiver(post_delete, sender=Inventario)
+def contar_baja_inventario(sender, instance, **kwargs):
+    """Cuenta bajas de inventario"""
+    INVENTARIO_MOVIMIENTOS.inc('baja')
+
+
+@registrar_colector
+def longitud_cadena():
+    """Longitud actual de la blockchain, leída en cada scrape"""
+    return [(
+        'blockchain_chain_length',
+        'gauge',
+        'Bloques en la cadena',
+        RegistroBlockchain.objects.count(),
+    )]
@@ -0,0 +1,27 @@
+"""
+Endpoint /metrics para Prometheus.
+
+No pasa por DRF para que el scrape no dependa de autenticación JWT ni de
+renderers. Responde 404 salvo con METRICS_ENABLED; si METRICS_TOKEN está
+configurado se exige como Bearer.
+"""
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden, Http404
+
+from apps.monitoring.metrics import exponer
+
+
+def metrics_view(request):
+    """GET /metrics - Métricas en formato de exposición de Prometheus"""
+    if not settings.METRICS_ENABLED:
+        raise Http404
+
+    token = settings.METRICS_TOKEN
+    if token:
+        enviado = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(enviado, token):
+            return HttpResponseForbidden()
+
+    return HttpResponse(exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
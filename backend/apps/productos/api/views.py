@@ -11,6 +11,7 @@ from rest_framework.permissions import AllowAny
 from rest_framework.decorators import action
 
 from apps.users.api.permissions import IsAdminOrReadOnly, IsAdminRole
+from infrastructure.streaming import StreamingJSONResponse, acepta_streaming
 from application.use_cases import ProductoUseCases
 from domain.exceptions import (
     EntityNotFoundException,
@@ -21,7 +22,6 @@ from domain.exceptions import (
 from .serializers import (
     ProductoInputSerializer,
     ProductoOutputSerializer,
-    ProductoListOutputSerializer,
     PrecioInputSerializer
 )
 
@@ -47,12 +47,13 @@ class ProductoViewSet(ViewSet):
     def list(self, request):
         """GET /api/productos/ - Listar todos los productos"""
         try:
-            productos = self._use_cases.listar_productos()
-            serializer = ProductoListOutputSerializer(
-                [p.to_dict() for p in productos],
-                many=True
-            )
-            return Response(serializer.data)
+            # Ruta rápida: filas de confianza, sin validar campo por campo
+            if acepta_streaming(request):
+                return StreamingJSONResponse(
+                    request, (p.to_dict() for p in self._use_cases.iterar_filas())
+                )
+            productos = self._use_cases.listar_filas()
+            return Response([p.to_dict() for p in productos])
         except Exception as e:
             return Response(
                 {'error': str(e)},
@@ -177,12 +178,8 @@ class ProductoViewSet(ViewSet):
             )
 
         try:
-            productos = self._use_cases.listar_por_empresa(empresa_nit)
-            serializer = ProductoListOutputSerializer(
-                [p.to_dict() for p in productos],
-                many=True
-            )
-            return Response(serializer.data)
+            productos = self._use_cases.listar_filas(empresa_nit)
+            return Response([p.to_dict() for p in productos])
         except ValidationException as e:
             return Response(
                 {'error': e.message},
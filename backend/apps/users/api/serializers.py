@@ -1,5 +1,10 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
 from apps.users.models import User
+from apps.users.authentication import agregar_claims, verificar_version
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -46,3 +51,53 @@ class RegisterSerializer(serializers.ModelSerializer):
         validated_data.pop('password_confirm')
         user = User.objects.create_user(**validated_data)
         return user
+
+
+class TokenConClaimsSerializer(TokenObtainPairSerializer):
+    """Login que embebe los datos del usuario en modo sin estado"""
+
+    @classmethod
+    def get_token(cls, user):
+        return agregar_claims(super().get_token(user), user)
+
+
+class TokenRefreshConClaimsSerializer(TokenRefreshSerializer):
+    """
+    Refresh que valida la versión de tokens del usuario y renueva sus claims.
+
+    Así un refresh emitido antes de un cambio de rol o contraseña deja de
+    servir y los access tokens nuevos llevan los datos actuales.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+
+        user = User.objects.filter(**{
+            api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)
+        }).first()
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(
+                self.error_messages['no_active_account'],
+                'no_active_account',
+            )
+        verificar_version(refresh, user.token_version)
+        agregar_claims(refresh, user)
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                try:
+                    refresh.blacklist()
+                except AttributeError:
+                    # Sin la app token_blacklist no existe blacklist()
+                    pass
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+
+            data['refresh'] = str(refresh)
+
+        return data
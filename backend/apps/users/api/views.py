@@ -7,6 +7,7 @@ from rest_framework.decorators import action
 from django.contrib.auth.hashers import make_password
 
 from apps.users.models import User
+from apps.users.authentication import usuario_completo
 from .serializers import UserSerializer, UserDetailSerializer, RegisterSerializer
 from .permissions import IsAdminRole
 
@@ -51,7 +52,7 @@ class MeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        serializer = UserDetailSerializer(request.user)
+        serializer = UserDetailSerializer(usuario_completo(request.user))
         return Response(serializer.data)
 
 
@@ -0,0 +1,187 @@
+"""
+Autenticación JWT con una sola validación por request.
+
+CurrentUserMiddleware y DRF comparten el resultado: la primera llamada a
+``CachedJWTAuthentication.authenticate`` valida el token y lo deja en el
+HttpRequest; las siguientes lo reutilizan (también el error, si el token
+es inválido). Los usuarios se sirven desde una caché por proceso con TTL
+corto (JWT_USER_CACHE_TTL) indexada por id de usuario y ``jti`` del
+token. Cada request recibe una copia, así que lo que una vista le asigne
+al usuario no se ve en otros requests. Guardar o eliminar un usuario
+invalida sus entradas en el proceso; en los demás, una entrada solo se
+usa si su ``token_version`` coincide con ``version_de_tokens`` (caché de
+Django), que cambia al desactivar al usuario o cambiarle el rol.
+
+Modo sin estado (JWT_STATELESS_USER): los tokens llevan ``email``,
+``role`` e ``is_superuser`` como claims y el request se autentica con un
+``UsuarioToken`` construido desde el token, sin leer el usuario. El
+claim ``ver`` se compara con ``User.token_version`` (cacheado en la
+caché de Django) para que un cambio de rol o de contraseña revoque los
+tokens emitidos.
+"""
+import copy
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+_RESULTADO = '_jwt_autenticacion'
+
+CLAIM_VERSION = 'ver'
+CLAIMS_DE_USUARIO = ('email', 'role', 'is_superuser')
+
+# (user_id, jti) -> (vence, user)
+_usuarios = {}
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication que valida una vez por request y cachea usuarios"""
+
+    def authenticate(self, request):
+        # DRF envuelve el HttpRequest; el resultado se guarda en el original
+        http_request = getattr(request, '_request', request)
+        if _RESULTADO not in vars(http_request):
+            try:
+                resultado = super().authenticate(http_request)
+            except AuthenticationFailed as e:
+                resultado = e
+            setattr(http_request, _RESULTADO, resultado)
+
+        resultado = getattr(http_request, _RESULTADO)
+        if isinstance(resultado, AuthenticationFailed):
+            raise resultado
+        return resultado
+
+    def get_user(self, validated_token):
+        if settings.JWT_STATELESS_USER and all(
+            claim in validated_token for claim in (CLAIM_VERSION, *CLAIMS_DE_USUARIO)
+        ):
+            user = UsuarioToken(validated_token)
+            verificar_version(validated_token, version_de_tokens(user.id))
+            return user
+
+        ttl = settings.JWT_USER_CACHE_TTL
+        if not ttl:
+            return self._cargar_usuario(validated_token)
+
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        clave = (str(user_id), validated_token.get(api_settings.JTI_CLAIM))
+        ahora = time.monotonic()
+        entrada = _usuarios.get(clave)
+        # Otro worker pudo haber modificado al usuario: su versión lo delata
+        if entrada is not None and entrada[0] > ahora and (
+            entrada[1].token_version == version_de_tokens(user_id)
+        ):
+            return copy.copy(entrada[1])
+
+        user = self._cargar_usuario(validated_token)
+        cache.add(_clave_version(user.pk), user.token_version, settings.JWT_VERSION_CACHE_TTL)
+        if len(_usuarios) >= settings.JWT_USER_CACHE_MAX:
+            _purgar(ahora)
+        _usuarios[clave] = (ahora + ttl, copy.copy(user))
+        return user
+
+    def _cargar_usuario(self, validated_token):
+        user = super().get_user(validated_token)
+        verificar_version(validated_token, user.token_version)
+        return user
+
+
+class UsuarioToken(TokenUser):
+    """Usuario construido desde los claims del token, sin consultar la base de datos"""
+
+    @cached_property
+    def email(self):
+        return self.token.get('email', '')
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', '')
+
+    @property
+    def is_admin(self):
+        return self.role == 'admin' or self.is_superuser
+
+    @property
+    def is_externo(self):
+        return self.role == 'externo'
+
+    def get_username(self):
+        return self.email
+
+    def __str__(self):
+        return self.email
+
+
+def agregar_claims(token, user):
+    """En modo sin estado agrega al token la versión y los datos del usuario"""
+    if settings.JWT_STATELESS_USER:
+        token[CLAIM_VERSION] = user.token_version
+        for claim in CLAIMS_DE_USUARIO:
+            token[claim] = getattr(user, claim)
+    return token
+
+
+def verificar_version(token, version_actual):
+    """Rechaza tokens emitidos antes del último cambio de datos del usuario"""
+    if CLAIM_VERSION in token and token[CLAIM_VERSION] != version_actual:
+        raise AuthenticationFailed('El token fue revocado', code='token_revoked')
+
+
+def _clave_version(user_id):
+    return f'users:token_version:{user_id}'
+
+
+def version_de_tokens(user_id):
+    """
+    ``token_version`` actual del usuario (None si no existe).
+
+    Se lee de la caché de Django; con una caché compartida (Redis,
+    Memcached) los cambios se ven en todos los workers al instante y con
+    la caché local por proceso, a más tardar en JWT_VERSION_CACHE_TTL.
+    """
+    clave = _clave_version(user_id)
+    version = cache.get(clave)
+    if version is None:
+        version = get_user_model().objects.filter(pk=user_id).values_list(
+            'token_version', flat=True
+        ).first()
+        # -1 marca usuarios inexistentes para no consultarlos en cada request
+        version = -1 if version is None else version
+        cache.set(clave, version, settings.JWT_VERSION_CACHE_TTL)
+    return None if version == -1 else version
+
+
+def usuario_completo(user):
+    """Devuelve el modelo User del request (lo carga si es un UsuarioToken)"""
+    if isinstance(user, TokenUser):
+        return get_user_model().objects.get(pk=user.id)
+    return user
+
+
+def autenticar_request(request):
+    """Autentica el request con JWT (memorizado); devuelve (user, token) o None"""
+    return CachedJWTAuthentication().authenticate(request)
+
+
+def _purgar(ahora):
+    """Elimina las entradas vencidas; si no alcanza, vacía la caché"""
+    for clave, (vence, _) in list(_usuarios.items()):
+        if vence <= ahora:
+            _usuarios.pop(clave, None)
+    if len(_usuarios) >= settings.JWT_USER_CACHE_MAX:
+        _usuarios.clear()
+
+
+def invalidar_usuario(user):
+    """Quita de las cachés los datos del usuario modificado o eliminado"""
+    user_id = str(user.pk)
+    for clave in [c for c in list(_usuarios) if c[0] == user_id]:
+        _usuarios.pop(clave, None)
+    cache.delete(_clave_version(user.pk))
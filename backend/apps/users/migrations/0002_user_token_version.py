@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='token_version',
+            field=models.PositiveIntegerField(default=0, help_text='Se incrementa al cambiar datos embebidos en los tokens; invalida los emitidos', verbose_name='Versión de tokens'),
+        ),
+    ]
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from apps.users.models import User
+from apps.users.authentication import invalidar_usuario
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidar_cache_de_usuario(sender, instance, **kwargs):
+    """Un usuario guardado o eliminado no debe servirse desde la caché"""
+    invalidar_usuario(instance)
@@ -0,0 +1,198 @@
+"""
+Prueba de carga: chatbot asíncrono contra un webhook simulado.
+
+Levanta un webhook local que tarda ``--latencia`` segundos en responder
+y envía ``--mensajes`` mensajes a /api/chatbot/ a través de la aplicación
+ASGI en un solo proceso (un worker). Compara el envío secuencial (lo que
+hace un worker síncrono: un mensaje a la vez) con el envío concurrente.
+
+Con ``--fragmentos N`` el webhook responde en streaming (líneas JSON de
+n8n repartidas a lo largo de la latencia) y se mide además el tiempo
+hasta el primer evento del modo SSE frente a la respuesta completa.
+
+    python -m benchmarks.bench_chatbot --mensajes 200 --latencia 0.5
+    python -m benchmarks.bench_chatbot --mensajes 50 --latencia 2 --fragmentos 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.comun import base_de_datos_de_prueba
+
+
+class WebhookSimulado:
+    """Servidor HTTP mínimo que responde JSON tras una demora fija"""
+
+    def __init__(self, latencia, fragmentos=1):
+        self.latencia = latencia
+        self.fragmentos = fragmentos
+        self.atendidos = 0
+        self.conexiones = 0
+        self.en_curso = 0
+        self.max_en_curso = 0
+
+    async def iniciar(self):
+        self.servidor = await asyncio.start_server(self._atender, '127.0.0.1', 0)
+        puerto = self.servidor.sockets[0].getsockname()[1]
+        return f'http://127.0.0.1:{puerto}/webhook'
+
+    async def _atender(self, reader, writer):
+        self.conexiones += 1
+        try:
+            while True:
+                cabecera = await reader.readuntil(b'\r\n\r\n')
+                largo = 0
+                for linea in cabecera.decode('latin1').split('\r\n'):
+                    nombre, _, valor = linea.partition(':')
+                    if nombre.lower() == 'content-length':
+                        largo = int(valor)
+                mensaje = json.loads(await reader.readexactly(largo))['message']
+
+                self.en_curso += 1
+                self.max_en_curso = max(self.max_en_curso, self.en_curso)
+                if self.fragmentos > 1:
+                    await self._responder_en_streaming(writer, mensaje)
+                else:
+                    await asyncio.sleep(self.latencia)
+                    cuerpo = json.dumps({'response': f'eco: {mensaje}'}).encode()
+                    writer.write(
+                        b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+                        b'Content-Length: ' + str(len(cuerpo)).encode() + b'\r\n\r\n' + cuerpo
+                    )
+                    await writer.drain()
+                self.en_curso -= 1
+                self.atendidos += 1
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _responder_en_streaming(self, writer, mensaje):
+        """Líneas JSON de n8n con transfer-encoding chunked"""
+        writer.write(
+            b'HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n'
+            b'Transfer-Encoding: chunked\r\n\r\n'
+        )
+        textos = ['eco: '] + [f'{mensaje} ' for _ in range(self.fragmentos - 1)]
+        for texto in textos:
+            await asyncio.sleep(self.latencia / self.fragmentos)
+            linea = json.dumps({'type': 'item', 'content': texto}).encode() + b'\n'
+            writer.write(f'{len(linea):x}\r\n'.encode() + linea + b'\r\n')
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    async def detener(self):
+        self.servidor.close()
+        await self.servidor.wait_closed()
+
+
+async def enviar(client, i):
+    response = await client.post('/api/chatbot/', json={'message': f'mensaje {i}'})
+    assert response.status_code == 200, response.text
+    return response.json()['response']
+
+
+async def enviar_sse(app, i):
+    """
+    POST en modo SSE directo a la aplicación ASGI.
+
+    httpx.ASGITransport acumula el cuerpo completo, así que se habla ASGI
+    a mano para registrar cuándo llega el primer evento. Devuelve los
+    segundos hasta el primer chunk del cuerpo y hasta el final.
+    """
+    cuerpo = json.dumps({'message': f'mensaje {i}'}).encode()
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'POST', 'scheme': 'http', 'path': '/api/chatbot/',
+        'raw_path': b'/api/chatbot/', 'query_string': b'', 'root_path': '',
+        'headers': [
+            (b'host', b'testserver'), (b'content-type', b'application/json'),
+            (b'accept', b'text/event-stream'), (b'content-length', str(len(cuerpo)).encode()),
+        ],
+        'client': ('127.0.0.1', 50000), 'server': ('testserver', 80),
+    }
+    pendiente = [{'type': 'http.request', 'body': cuerpo, 'more_body': False}]
+    desconexion = asyncio.Event()
+
+    async def receive():
+        if pendiente:
+            return pendiente.pop()
+        await desconexion.wait()
+        return {'type': 'http.disconnect'}
+
+    inicio = time.perf_counter()
+    primero = None
+
+    async def send(mensaje):
+        nonlocal primero
+        if mensaje['type'] == 'http.response.body' and mensaje.get('body') and primero is None:
+            primero = time.perf_counter() - inicio
+
+    await app(scope, receive, send)
+    desconexion.set()
+    return primero, time.perf_counter() - inicio
+
+
+async def correr(args):
+    import httpx
+    from django.conf import settings
+    from django.core.asgi import get_asgi_application
+
+    from apps.chatbot.webhook import cerrar_cliente
+
+    webhook = WebhookSimulado(args.latencia, args.fragmentos)
+    settings.CHATBOT_WEBHOOK_URL = await webhook.iniciar()
+
+    app = get_asgi_application()
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url='http://testserver') as client:
+        secuenciales = min(args.mensajes, args.secuenciales)
+        inicio = time.perf_counter()
+        for i in range(secuenciales):
+            await enviar(client, i)
+        secuencial = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        respuestas = await asyncio.gather(*(enviar(client, i) for i in range(args.mensajes)))
+        concurrente = time.perf_counter() - inicio
+
+    if args.fragmentos > 1:
+        tiempos = await asyncio.gather(*(enviar_sse(app, i) for i in range(args.mensajes)))
+
+    await cerrar_cliente()
+    await webhook.detener()
+    assert respuestas[0].startswith('eco: mensaje 0')
+
+    print(f'\nChatbot ASGI, webhook con {args.latencia * 1000:.0f} ms de latencia (1 worker)')
+    print(f'  secuencial   {secuenciales:5d} mensajes  {secuencial:7.2f} s  '
+          f'{secuenciales / secuencial:8.1f} msg/s')
+    print(f'  concurrente  {args.mensajes:5d} mensajes  {concurrente:7.2f} s  '
+          f'{args.mensajes / concurrente:8.1f} msg/s  '
+          f'(máximo {webhook.max_en_curso} llamadas al webhook en curso)')
+    print(f'  {webhook.atendidos} llamadas al webhook sobre {webhook.conexiones} conexiones TCP')
+    if args.fragmentos > 1:
+        primeros = sorted(primero for primero, _ in tiempos)
+        totales = sorted(total for _, total in tiempos)
+        print(f'  SSE ({args.fragmentos} fragmentos)  primer evento p50 '
+              f'{primeros[len(primeros) // 2] * 1000:6.0f} ms  respuesta completa p50 '
+              f'{totales[len(totales) // 2] * 1000:6.0f} ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--mensajes', type=int, default=200)
+    parser.add_argument('--latencia', type=float, default=0.5)
+    parser.add_argument('--secuenciales', type=int, default=10,
+                        help='Mensajes del envío secuencial (es lento por diseño)')
+    parser.add_argument('--fragmentos', type=int, default=1,
+                        help='Fragmentos de la respuesta del webhook (>1: streaming)')
+    args = parser.parse_args()
+
+    with base_de_datos_de_prueba(en_archivo=True):
+        asyncio.run(correr(args))
+
+
+if __name__ == '__main__':
+    main()
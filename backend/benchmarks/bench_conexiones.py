@@ -0,0 +1,131 @@
+"""
+Benchmark: conexiones a la base de datos por request vs persistentes.
+
+Envía ``--requests`` GET a /api/inventario/ directo al WSGIHandler de
+Django desde ``--hilos`` hilos, como lo haría un servidor WSGI con un hilo
+por request en curso (el cliente de pruebas no sirve: nunca cierra la
+conexión al terminar el request), y compara:
+
+* una conexión por request (CONN_MAX_AGE=0, lo que había antes),
+* conexiones persistentes con verificación de salud (CONN_MAX_AGE=60),
+* el pool de psycopg 3 (solo con PostgreSQL y psycopg[pool] instalado).
+
+El costo de conectar depende del motor: con SQLite es casi nulo, así que
+la diferencia se ve contra PostgreSQL (mejor aún si está en otro host):
+
+    USE_SQLITE=False DB_HOST=... python -m benchmarks.bench_conexiones --requests 2000 --hilos 8
+    python -m benchmarks.bench_conexiones --requests 500 --filas 50
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from benchmarks.bench_listados import poblar
+from benchmarks.comun import base_de_datos_de_prueba
+
+
+def configurar(modo):
+    """Aplica el modo a la configuración compartida por las conexiones de todos los hilos"""
+    from django.db import connections
+
+    config = connections.settings['default']
+    config['OPTIONS'].pop('pool', None)
+    if modo == 'por request':
+        config['CONN_MAX_AGE'] = 0
+    elif modo == 'persistente':
+        config['CONN_MAX_AGE'] = 60
+        config['CONN_HEALTH_CHECKS'] = True
+    else:
+        from psycopg_pool import ConnectionPool
+        config['CONN_MAX_AGE'] = 0
+        config['OPTIONS']['pool'] = {
+            'min_size': 2, 'max_size': 20, 'check': ConnectionPool.check_connection
+        }
+
+
+def correr(modo, total, hilos):
+    """(segundos, conexiones abiertas) para ``total`` requests repartidos en ``hilos``"""
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connections
+    from django.db.backends.signals import connection_created
+
+    configurar(modo)
+    aplicacion = WSGIHandler()
+    abiertas = []
+
+    def contar(**kwargs):
+        abiertas.append(1)
+
+    connection_created.connect(contar)
+
+    def pedir():
+        environ = {'REQUEST_METHOD': 'GET', 'PATH_INFO': '/api/inventario/', 'HTTP_HOST': 'testserver'}
+        setup_testing_defaults(environ)
+        estados = []
+        cuerpo = aplicacion(environ, lambda estado, cabeceras, exc_info=None: estados.append(estado))
+        try:
+            # El listado es streaming: las consultas corren al leer el cuerpo
+            b''.join(cuerpo)
+        finally:
+            # Dispara request_finished (cierra la conexión según CONN_MAX_AGE)
+            cuerpo.close()
+        assert estados[0].startswith('200'), estados[0]
+
+    def trabajador(cantidad):
+        for _ in range(cantidad):
+            pedir()
+        # Las conexiones son por hilo
+        connections.close_all()
+
+    por_hilo = [total // hilos + (1 if i < total % hilos else 0) for i in range(hilos)]
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(hilos) as ejecutor:
+        list(ejecutor.map(trabajador, por_hilo))
+    duracion = time.perf_counter() - inicio
+
+    connection_created.disconnect(contar)
+    if modo == 'pool':
+        connections['default'].close_pool()
+    return duracion, len(abiertas)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--hilos', type=int, default=4)
+    parser.add_argument('--filas', type=int, default=50, help='Registros de inventario del listado')
+    args = parser.parse_args()
+
+    # En archivo: los hilos abren sus propias conexiones a la misma base
+    with base_de_datos_de_prueba(en_archivo=True):
+        from django.db import connection
+
+        poblar(args.filas)
+        connection.close()
+
+        modos = ['por request', 'persistente']
+        if connection.vendor == 'postgresql':
+            try:
+                import psycopg_pool  # noqa: F401
+                modos.append('pool')
+            except ImportError:
+                print('(psycopg_pool no está instalado: se omite el modo pool)')
+
+        # Calentamiento: imports, URLconf y caches de consultas
+        correr('persistente', args.hilos * 5, args.hilos)
+
+        print(f'\nGET /api/inventario/ ({args.filas} filas, {connection.vendor}), '
+              f'{args.requests} requests en {args.hilos} hilos')
+        base = None
+        for modo in modos:
+            duracion, abiertas = correr(modo, args.requests, args.hilos)
+            rps = args.requests / duracion
+            base = base or rps
+            latencia = duracion * 1000 * args.hilos / args.requests
+            print(f'  {modo:12} {rps:8.1f} req/s  {latencia:7.2f} ms/req  '
+                  f'{abiertas:6d} conexiones abiertas  x{rps / base:5.2f}')
+
+
+if __name__ == '__main__':
+    main()
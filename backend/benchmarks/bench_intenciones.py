@@ -0,0 +1,109 @@
+"""
+Benchmark: respuestas locales del chatbot con el motor de intenciones.
+
+Compara las reglas originales (``any(palabra in mensaje ...)`` por tema)
+con ``MotorIntenciones`` sobre un corpus de mensajes de usuarios
+(benchmarks/datos/mensajes_chatbot.txt) y cuenta en cuántos mensajes
+cambia la intención elegida. Con ``--intenciones-extra N`` agrega N
+intenciones sintéticas de 8 palabras a ambos lados para ver cómo escala
+cada enfoque con el tamaño del archivo de intenciones.
+
+    python -m benchmarks.bench_intenciones --repeticiones 2000
+    python -m benchmarks.bench_intenciones --repeticiones 200 --intenciones-extra 200
+"""
+import argparse
+import time
+from pathlib import Path
+
+from benchmarks.comun import medir, reportar
+
+CORPUS = Path(__file__).parent / 'datos' / 'mensajes_chatbot.txt'
+
+# Reglas originales de respuesta_local, en su orden (la primera que coincide gana)
+REGLAS_ORIGINALES = [
+    ('saludo', ['hola', 'buenos', 'buenas', 'hey', 'hi']),
+    ('empresas', ['empresa', 'empresas', 'compañía', 'nit']),
+    ('productos', ['producto', 'productos', 'catálogo', 'precio']),
+    ('inventario', ['inventario', 'stock', 'cantidad', 'pdf', 'email']),
+    ('blockchain', ['blockchain', 'integridad', 'hash', 'verificar']),
+    ('usuarios', ['usuario', 'admin', 'rol', 'permiso', 'login']),
+    ('ayuda', ['ayuda', 'help', 'qué puedes', 'funciones']),
+    ('agradecimiento', ['gracias', 'thanks', 'genial', 'perfecto']),
+    ('despedida', ['adiós', 'chao', 'bye', 'hasta luego']),
+]
+
+
+def intencion_original(mensaje, reglas=REGLAS_ORIGINALES):
+    mensaje_lower = mensaje.lower()
+    for nombre, palabras in reglas:
+        if any(word in mensaje_lower for word in palabras):
+            return nombre
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeticiones', type=int, default=2000,
+                        help='Veces que se recorre el corpus por medición')
+    parser.add_argument('--intenciones-extra', type=int, default=0,
+                        help='Intenciones sintéticas agregadas a las reglas y al motor')
+    parser.add_argument('--diferencias', action='store_true',
+                        help='Lista los mensajes cuya intención cambia')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from apps.chatbot.intenciones import Intencion, MotorIntenciones
+
+    base = MotorIntenciones.desde_archivo(settings.CHATBOT_INTENTS_FILE)
+    extra = [
+        (f'extra{i}', [f'termino{i}x{k}' for k in range(8)]) for i in range(args.intenciones_extra)
+    ]
+    reglas = REGLAS_ORIGINALES + extra
+    inicio = time.perf_counter()
+    motor = MotorIntenciones(
+        list(base.intenciones) + [Intencion(nombre, '', tuple(palabras)) for nombre, palabras in extra],
+        base.por_defecto, base.max_respuestas,
+    )
+    compilacion = time.perf_counter() - inicio
+
+    mensajes = [linea for linea in CORPUS.read_text(encoding='utf-8').splitlines() if linea.strip()]
+    total = len(mensajes) * args.repeticiones
+
+    def original():
+        for _ in range(args.repeticiones):
+            for mensaje in mensajes:
+                intencion_original(mensaje, reglas)
+
+    def compilado():
+        for _ in range(args.repeticiones):
+            for mensaje in mensajes:
+                motor.responder(mensaje)
+
+    resultados = [('reglas originales', medir(original)), ('motor de intenciones', medir(compilado))]
+    reportar(f'Respuestas locales: {total} mensajes ({len(mensajes)} distintos), '
+             f'{len(reglas)} intenciones', resultados)
+    for nombre, (mediana, _) in resultados:
+        print(f'  {nombre:32} {mediana / total * 1e6:6.2f} us/mensaje')
+    print(f'  compilación del motor: {compilacion * 1000:.1f} ms')
+    if extra:
+        return
+
+    diferencias = []
+    for mensaje in mensajes:
+        clasificacion = motor.clasificar(mensaje)
+        nueva = clasificacion[0][0].nombre if clasificacion else None
+        anterior = intencion_original(mensaje)
+        if nueva != anterior:
+            diferencias.append((mensaje, anterior, nueva))
+    sin_intencion = sum(1 for mensaje in mensajes if not motor.clasificar(mensaje))
+    print(f'  intención distinta en {len(diferencias)} de {len(mensajes)} mensajes; '
+          f'sin intención: {sin_intencion} (antes {sum(1 for m in mensajes if intencion_original(m) is None)})')
+    if args.diferencias:
+        for mensaje, anterior, nueva in diferencias:
+            print(f'    {mensaje!r}: {anterior} -> {nueva}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Benchmark: ruta de listados con DTOs vs filas livianas.
+
+Compara, para inventario y productos, el camino original
+(modelo -> DTO dataclass -> to_dict -> Serializer(many=True)) con la ruta
+rápida (values_list -> NamedTuple -> to_dict compilado), verificando que
+ambos producen exactamente el mismo JSON.
+
+    python -m benchmarks.bench_listados --filas 100000
+"""
+import argparse
+import json
+
+from benchmarks.comun import base_de_datos_de_prueba, medir, reportar
+
+
+def poblar(filas):
+    """Crea empresas, productos con dos precios e inventario con bulk_create"""
+    from domain.models import Empresa, Producto, PrecioProducto, Inventario
+
+    empresas = Empresa.objects.bulk_create([
+        Empresa(nit=f'900{i:06d}-1', nombre=f'Empresa {i}', direccion='Calle 1', telefono='300')
+        for i in range(max(1, filas // 1000))
+    ])
+    productos = Producto.objects.bulk_create([
+        Producto(
+            codigo=f'P-{i:07d}', nombre=f'Producto {i}', caracteristicas='Caracteristicas',
+            empresa=empresas[i % len(empresas)]
+        )
+        for i in range(filas)
+    ])
+    PrecioProducto.objects.bulk_create(
+        [PrecioProducto(producto=p, moneda='COP', precio=1000) for p in productos]
+        + [PrecioProducto(producto=p, moneda='USD', precio='2.50') for p in productos]
+    )
+    Inventario.objects.bulk_create([
+        Inventario(empresa_id=p.empresa_id, producto=p, cantidad=i % 50, ubicacion='Bodega')
+        for i, p in enumerate(productos)
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--filas', type=int, default=20000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    with base_de_datos_de_prueba():
+        from application.use_cases import InventarioUseCases, ProductoUseCases
+        from apps.inventario.api.serializers import InventarioListOutputSerializer
+        from apps.productos.api.serializers import ProductoListOutputSerializer
+
+        poblar(args.filas)
+        inventario = InventarioUseCases()
+        productos = ProductoUseCases()
+
+        casos = {
+            'inventario': (
+                lambda: InventarioListOutputSerializer(
+                    [i.to_dict() for i in inventario.listar_inventario()], many=True
+                ).data,
+                lambda: [i.to_dict() for i in inventario.listar_filas()],
+            ),
+            'productos': (
+                lambda: ProductoListOutputSerializer(
+                    [p.to_dict() for p in productos.listar_productos()], many=True
+                ).data,
+                lambda: [p.to_dict() for p in productos.listar_filas()],
+            ),
+        }
+
+        for nombre, (original, rapida) in casos.items():
+            assert json.dumps(original()) == json.dumps(rapida()), f'{nombre}: salida distinta'
+            reportar(f'{nombre} ({args.filas} filas, salida idéntica)', [
+                ('DTO + Serializer(many=True)', medir(original, args.repeticiones)),
+                ('values_list + fila compilada', medir(rapida, args.repeticiones)),
+            ])
+
+
+if __name__ == '__main__':
+    main()
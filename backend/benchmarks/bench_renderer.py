@@ -0,0 +1,83 @@
+"""
+Benchmark: JSONRenderer de DRF vs FastJSONRenderer.
+
+Renderiza payloads realistas (listado de productos con precios y
+listado de la blockchain con el JSONField ``datos`` de cada bloque) y
+verifica que ambos renderers producen los mismos bytes.
+
+    python -m benchmarks.bench_renderer --filas 20000
+"""
+import argparse
+import datetime
+
+from benchmarks.comun import medir, reportar
+
+
+def payload_productos(filas):
+    """Forma de /api/productos/ (ver ProductoFila.to_dict)"""
+    return [
+        {
+            'id': i,
+            'codigo': f'P-{i:07d}',
+            'nombre': f'Producto {i}',
+            'caracteristicas': 'Características del producto con tildes y ñ',
+            'empresa': f'900{i % 100:06d}-1',
+            'empresa_nombre': f'Empresa {i % 100}',
+            'precios': [
+                {'id': 2 * i, 'moneda': 'COP', 'precio': 50000.0},
+                {'id': 2 * i + 1, 'moneda': 'USD', 'precio': 12.5},
+            ],
+        }
+        for i in range(filas)
+    ]
+
+
+def payload_blockchain(filas):
+    """Forma de /api/blockchain/ (RegistroBlockchainSerializer)"""
+    inicio = datetime.datetime(2025, 1, 1, tzinfo=datetime.timezone.utc)
+    return [
+        {
+            'indice': i,
+            'tipo': 'inventario_actualizado',
+            'datos': {
+                'id': i, 'empresa': f'900{i % 100:06d}-1', 'producto': f'Producto {i}',
+                'cantidad': i % 50, 'ubicacion': 'Bodega Central',
+            },
+            'timestamp': (inicio + datetime.timedelta(seconds=i)).isoformat().replace('+00:00', 'Z'),
+            'hash_anterior': f'{i:064x}',
+            'hash_actual': f'{i + 1:064x}',
+            'usuario': 'admin@litethinking.com',
+        }
+        for i in range(filas)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--filas', type=int, default=20000)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+    from rest_framework.renderers import JSONRenderer
+    from infrastructure.renderers import FastJSONRenderer, orjson
+
+    if orjson is None:
+        print('orjson no está instalado: FastJSONRenderer usa el encoder estándar')
+
+    estandar, rapido = JSONRenderer(), FastJSONRenderer()
+    for nombre, datos in (
+        ('productos', payload_productos(args.filas)),
+        ('blockchain', payload_blockchain(args.filas)),
+    ):
+        salida = estandar.render(datos)
+        assert salida == rapido.render(datos), f'{nombre}: salida distinta'
+        reportar(f'{nombre} ({args.filas} filas, {len(salida) / 1e6:.1f} MB, salida idéntica)', [
+            ('JSONRenderer (json stdlib)', medir(lambda: estandar.render(datos), args.repeticiones)),
+            ('FastJSONRenderer', medir(lambda: rapido.render(datos), args.repeticiones)),
+        ])
+
+
+if __name__ == '__main__':
+    main()
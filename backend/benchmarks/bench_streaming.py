@@ -0,0 +1,63 @@
+"""
+Benchmark: listado completo en memoria vs streaming.
+
+Para /api/productos/ e /api/inventario/ compara la respuesta normal
+(lista completa renderizada de una vez) con la respuesta en streaming,
+midiendo tiempo hasta el primer byte, tiempo total y memoria máxima
+(tracemalloc) mientras se consume el cuerpo.
+
+    python -m benchmarks.bench_streaming --filas 100000
+"""
+import argparse
+import time
+import tracemalloc
+
+from benchmarks.bench_listados import poblar
+from benchmarks.comun import base_de_datos_de_prueba
+
+
+def consumir(response):
+    """Recorre el cuerpo y devuelve (primer byte, total, bytes)"""
+    inicio = time.perf_counter()
+    primer_byte = None
+    total = 0
+    for chunk in response:
+        if primer_byte is None:
+            primer_byte = time.perf_counter() - inicio
+        total += len(chunk)
+    return primer_byte, time.perf_counter() - inicio, total
+
+
+def medir(client, url):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    response = client.get(url)
+    vista = time.perf_counter() - inicio
+    primer_byte, cuerpo, tamano = consumir(response)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return vista + primer_byte, vista + cuerpo, pico, tamano
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--filas', type=int, default=20000)
+    args = parser.parse_args()
+
+    with base_de_datos_de_prueba():
+        from rest_framework.test import APIClient
+
+        poblar(args.filas)
+        client = APIClient()
+
+        for url in ('/api/productos/', '/api/inventario/'):
+            print(f'\n{url} ({args.filas} filas)')
+            for nombre, sufijo in (('completo', '?stream=false'), ('streaming', '')):
+                primer_byte, total, pico, tamano = medir(client, url + sufijo)
+                print(f'  {nombre:10} primer byte {primer_byte * 1000:8.1f} ms  '
+                      f'total {total * 1000:8.1f} ms  pico {pico / 2 ** 20:7.1f} MiB  '
+                      f'cuerpo {tamano / 2 ** 20:6.1f} MiB')
+
+
+if __name__ == '__main__':
+    main()
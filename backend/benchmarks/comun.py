@@ -0,0 +1,67 @@
+"""
+Utilidades compartidas por los benchmarks.
+
+Los benchmarks se ejecutan desde backend/ como módulos:
+
+    python -m benchmarks.bench_listados --filas 100000
+
+Crean una base de datos de prueba desechable (la misma que usa pytest)
+y la eliminan al terminar.
+"""
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+
+
+@contextmanager
+def base_de_datos_de_prueba(en_archivo=False):
+    """
+    Configura Django y crea/destruye una base de datos de prueba.
+
+    Con SQLite la base de prueba vive en memoria; ``en_archivo`` la crea
+    en disco para que la usen conexiones de varios hilos (ASGI).
+    """
+    import django
+    django.setup()
+
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    if en_archivo and connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = str(
+            Path(connection.settings_dict['NAME']).with_name('benchmark.sqlite3')
+        )
+
+    setup_test_environment()
+    nombre_original = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(nombre_original, verbosity=0)
+        teardown_test_environment()
+
+
+def medir(funcion, repeticiones=5):
+    """Ejecuta la función varias veces y devuelve (mediana, mínimo) en segundos"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return statistics.median(tiempos), min(tiempos)
+
+
+def reportar(titulo, resultados):
+    """Imprime una tabla con los tiempos y la aceleración contra el primero"""
+    print(f'\n{titulo}')
+    base = resultados[0][1][0]
+    for nombre, (mediana, minimo) in resultados:
+        print(f'  {nombre:32} mediana {mediana * 1000:9.1f} ms  '
+              f'min {minimo * 1000:9.1f} ms  x{base / mediana:5.2f}')
@@ -1,8 +1,38 @@
 """
 ASGI config for Lite Thinking project.
+
+Django no atiende el protocolo lifespan del servidor ASGI; ``application``
+lo responde y al apagar cierra el cliente HTTP del webhook del chatbot y
+escribe los mensajes del chatbot que quedaron en el buffer.
 """
 import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+
+# Requieren django.setup()
+from apps.chatbot.persistencia import vaciar_al_salir  # noqa: E402
+from apps.chatbot.webhook import cerrar_cliente  # noqa: E402
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await ciclo_de_vida(receive, send)
+        return
+    await django_application(scope, receive, send)
+
+
+async def ciclo_de_vida(receive, send):
+    """Atiende los eventos lifespan de arranque y apagado"""
+    while True:
+        mensaje = await receive()
+        if mensaje['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif mensaje['type'] == 'lifespan.shutdown':
+            await cerrar_cliente()
+            await sync_to_async(vaciar_al_salir)()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
@@ -39,16 +39,22 @@ INSTALLED_APPS = [
     'apps.inventario',
     'apps.blockchain',
     'apps.chatbot',
+    'apps.monitoring',
 ]
 
 MIDDLEWARE = [
+    'apps.monitoring.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'infrastructure.compression.CompressionMiddleware',
+    'apps.monitoring.middleware.QueryCountMiddleware',
+    'infrastructure.replicas.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'apps.blockchain.middleware.CurrentUserMiddleware',
+    'apps.monitoring.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -92,9 +98,82 @@ else:
             'PASSWORD': os.environ.get('DB_PASSWORD'),
             'HOST': os.environ.get('DB_HOST', 'localhost'),
             'PORT': os.environ.get('DB_PORT', '5432'),
+            # Conexiones persistentes: se reutilizan DB_CONN_MAX_AGE segundos
+            # (0 = una conexión por request) y se verifican antes de reutilizarlas
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+            'CONN_HEALTH_CHECKS': True,
+            # Detrás de PgBouncer en modo transacción los cursores con nombre fallan
+            'DISABLE_SERVER_SIDE_CURSORS': os.environ.get('DB_DISABLE_SERVER_SIDE_CURSORS', 'False') == 'True',
         }
     }
 
+    # Pool de conexiones de psycopg 3 (requiere psycopg[pool]). Bajo ASGI las
+    # conexiones persistentes no se comparten entre hilos: conviene el pool.
+    if os.environ.get('DB_POOL', 'False') == 'True':
+        from psycopg_pool import ConnectionPool
+
+        DATABASES['default']['CONN_MAX_AGE'] = 0  # Django no admite ambas cosas
+        DATABASES['default']['OPTIONS'] = {
+            'pool': {
+                'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                # Segundos de espera por una conexión libre antes de fallar
+                'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                # Segundos que una conexión ociosa (sobre min_size) sigue abierta
+                'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 600)),
+                'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+                # Verificación de salud al entregar cada conexión
+                'check': ConnectionPool.check_connection,
+            },
+        }
+
+# Réplicas de lectura (opcional): hosts separados por coma con la misma base,
+# usuario y contraseña del primario salvo DB_REPLICA_PORT/USER/PASSWORD. En
+# desarrollo DB_REPLICA_SQLITE acepta archivos SQLite (p. ej. una copia de
+# db.sqlite3). Los casos de uso de solo lectura consultan las réplicas por
+# turnos (ver infrastructure.replicas)
+if USE_SQLITE:
+    _replicas = [
+        {**DATABASES['default'], 'NAME': nombre.strip()}
+        for nombre in os.environ.get('DB_REPLICA_SQLITE', '').split(',') if nombre.strip()
+    ]
+else:
+    _replicas = [
+        {
+            **DATABASES['default'],
+            'HOST': host.strip(),
+            'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+            'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+            # Cada réplica tiene su propio pool
+            'OPTIONS': dict(DATABASES['default'].get('OPTIONS', {})),
+        }
+        for host in os.environ.get('DB_REPLICA_HOST', '').split(',') if host.strip()
+    ]
+DATABASE_REPLICAS = []
+for _numero, _replica in enumerate(_replicas, start=1):
+    # En los tests la réplica es la misma base de pruebas del primario
+    _replica['TEST'] = {'MIRROR': 'default'}
+    DATABASES[f'replica_{_numero}'] = _replica
+    DATABASE_REPLICAS.append(f'replica_{_numero}')
+DATABASE_ROUTERS = ['infrastructure.replicas.RouterReplicas'] if DATABASE_REPLICAS else []
+# Segundos que un cliente lee del primario después de escribir (read-your-writes)
+DB_REPLICA_PIN_SECONDS = int(os.environ.get('DB_REPLICA_PIN_SECONDS', 5))
+# Segundos fuera de servicio de una réplica que no acepta conexiones
+DB_REPLICA_RETRY = float(os.environ.get('DB_REPLICA_RETRY', 30))
+
+# Particionamiento declarativo (solo PostgreSQL; lo aplican las migraciones
+# y los comandos particiones_inventario / particiones_blockchain). Es opcional:
+# convertir una tabla existente la reescribe bloqueada (ver la migración)
+# Particiones hash del inventario por empresa (0 = sin particionar). Tras
+# migrar, cambiarlo exige reparticionar con particiones_inventario (lo
+# verifica el chequeo inventario.E001)
+INVENTARIO_PARTICIONES = int(os.environ.get('INVENTARIO_PARTICIONES', 0))
+# Registro de la blockchain particionado por mes de timestamp
+BLOCKCHAIN_PARTICIONAR_POR_MES = os.environ.get('BLOCKCHAIN_PARTICIONAR_POR_MES', 'False') == 'True'
+# Meses futuros con partición creada de antemano
+BLOCKCHAIN_MESES_ADELANTE = int(os.environ.get('BLOCKCHAIN_MESES_ADELANTE', 3))
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -124,11 +203,16 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.users.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # orjson si está instalado; si no, idéntico al JSONRenderer de DRF
+    'DEFAULT_RENDERER_CLASSES': [
+        'infrastructure.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # JWT Configuration
@@ -136,8 +220,23 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
+    'TOKEN_OBTAIN_SERIALIZER': 'apps.users.api.serializers.TokenConClaimsSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'apps.users.api.serializers.TokenRefreshConClaimsSerializer',
 }
 
+# Caché por proceso de usuarios autenticados por JWT (segundos; 0 = desactivada).
+# Cada uso compara token_version con la caché de Django: un cambio hecho en otro
+# worker se ve al instante con una caché compartida o tras JWT_VERSION_CACHE_TTL
+JWT_USER_CACHE_TTL = float(os.environ.get('JWT_USER_CACHE_TTL', 30))
+JWT_USER_CACHE_MAX = int(os.environ.get('JWT_USER_CACHE_MAX', 10000))
+
+# Tokens sin estado: email, rol e is_superuser viajan en el token y los
+# permisos no consultan el usuario. Un cambio de rol o contraseña revoca los
+# tokens emitidos (visible en todos los workers con una caché compartida, o
+# tras JWT_VERSION_CACHE_TTL segundos con la caché local por defecto)
+JWT_STATELESS_USER = os.environ.get('JWT_STATELESS_USER', 'False') == 'True'
+JWT_VERSION_CACHE_TTL = int(os.environ.get('JWT_VERSION_CACHE_TTL', 60))
+
 # CORS Configuration
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -149,5 +248,69 @@ EMAIL_USE_TLS = True
 EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 
+# Compression Configuration
+# Codificaciones en orden de preferencia (br y zstd solo si están instalados
+# brotli / zstandard) y tamaño mínimo en bytes para comprimir
+COMPRESSION_ENCODINGS = os.environ.get('COMPRESSION_ENCODINGS', 'zstd,br,gzip').split(',')
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+
+# Monitoring Configuration
+# Registra las consultas SQL por request (cabeceras X-DB-* solo con DEBUG)
+QUERY_INSTRUMENTATION = os.environ.get('QUERY_INSTRUMENTATION', str(DEBUG)) == 'True'
+
+# Perfilado con cProfile: fracción de requests muestreados (0 = desactivado)
+# y secreto para forzarlo con la cabecera X-Profile o ?_profile=
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', '0'))
+PROFILING_SECRET = os.environ.get('PROFILING_SECRET', '')
+PROFILING_DIR = os.environ.get('PROFILING_DIR', BASE_DIR / 'profiles')
+PROFILING_MAX_FILES = int(os.environ.get('PROFILING_MAX_FILES', 500))
+
+# Métricas Prometheus en /metrics (desactivadas por defecto: exponen rutas,
+# consultas y estado del chatbot; al activarlas conviene definir
+# METRICS_TOKEN). Con varios workers (gunicorn) definir METRICS_DIR para que
+# cada proceso vuelque su estado y el scrape los sume; de los procesos que
+# ya terminaron se conservan contadores e histogramas (no sus gauges).
+# Las métricas de consultas SQL requieren QUERY_INSTRUMENTATION=True.
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'False') == 'True'
+METRICS_DIR = os.environ.get('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
 # Chatbot Configuration
 CHATBOT_WEBHOOK_URL = os.environ.get('CHATBOT_WEBHOOK_URL', 'http://localhost:5678/webhook/emily-tech-chatbot')
+# Timeouts en segundos: total de lectura y de conexión
+CHATBOT_WEBHOOK_TIMEOUT = float(os.environ.get('CHATBOT_WEBHOOK_TIMEOUT', 10))
+CHATBOT_WEBHOOK_CONNECT_TIMEOUT = float(os.environ.get('CHATBOT_WEBHOOK_CONNECT_TIMEOUT', 2))
+# Pool de conexiones keep-alive por worker
+CHATBOT_WEBHOOK_MAX_CONNECTIONS = int(os.environ.get('CHATBOT_WEBHOOK_MAX_CONNECTIONS', 100))
+CHATBOT_WEBHOOK_MAX_KEEPALIVE = int(os.environ.get('CHATBOT_WEBHOOK_MAX_KEEPALIVE', 20))
+# Circuit breaker: fallos consecutivos para abrirlo y segundos hasta la prueba
+CHATBOT_CIRCUIT_FAILURES = int(os.environ.get('CHATBOT_CIRCUIT_FAILURES', 5))
+CHATBOT_CIRCUIT_RESET = float(os.environ.get('CHATBOT_CIRCUIT_RESET', 30))
+# Intenciones y respuestas locales del chatbot (cuando n8n no responde)
+CHATBOT_INTENTS_FILE = os.environ.get('CHATBOT_INTENTS_FILE', BASE_DIR / 'apps' / 'chatbot' / 'intenciones.json')
+# Respuestas con datos del sistema (stock, precios, productos) sin llamar al webhook
+CHATBOT_DATA_ANSWERS = os.environ.get('CHATBOT_DATA_ANSWERS', 'True') == 'True'
+# Segundos que vive el índice en memoria de NIT, códigos y nombres
+CHATBOT_DATA_INDEX_TTL = float(os.environ.get('CHATBOT_DATA_INDEX_TTL', 300))
+# Caché de respuestas por pregunta normalizada (por proceso)
+CHATBOT_CACHE_ENABLED = os.environ.get('CHATBOT_CACHE_ENABLED', 'True') == 'True'
+CHATBOT_CACHE_TTL = float(os.environ.get('CHATBOT_CACHE_TTL', 300))
+CHATBOT_CACHE_MAX = int(os.environ.get('CHATBOT_CACHE_MAX', 1000))
+# Similitud mínima (Jaccard de palabras) para reutilizar una respuesta; 1 = solo iguales
+CHATBOT_CACHE_SIMILARITY = float(os.environ.get('CHATBOT_CACHE_SIMILARITY', 0.8))
+# Mensajes por página del historial de una sesión (por defecto y máximo con ?limit=)
+CHATBOT_HISTORY_PAGE_SIZE = int(os.environ.get('CHATBOT_HISTORY_PAGE_SIZE', 50))
+CHATBOT_HISTORY_MAX_PAGE_SIZE = int(os.environ.get('CHATBOT_HISTORY_MAX_PAGE_SIZE', 200))
+# Retención: días sin actividad antes de archivar una conversación y
+# directorio de los archivos (relativo a MEDIA_ROOT)
+CHATBOT_RETENTION_DAYS = int(os.environ.get('CHATBOT_RETENTION_DAYS', 90))
+CHATBOT_ARCHIVE_DIR = os.environ.get('CHATBOT_ARCHIVE_DIR', 'chatbot/archivo')
+# Mensajes por sesión antes de resumir los más antiguos; 0 = sin límite
+CHATBOT_SESSION_MAX_MESSAGES = int(os.environ.get('CHATBOT_SESSION_MAX_MESSAGES', 200))
+# Write-behind de mensajes (opcional): se escriben por lotes al llegar a SIZE
+# pendientes o a INTERVAL segundos; un proceso que muere sin terminar normalmente
+# pierde lo pendiente. Por defecto cada respuesta se escribe antes de responder
+CHATBOT_WRITE_BEHIND = os.environ.get('CHATBOT_WRITE_BEHIND', 'False') == 'True'
+CHATBOT_WRITE_BEHIND_SIZE = int(os.environ.get('CHATBOT_WRITE_BEHIND_SIZE', 100))
+CHATBOT_WRITE_BEHIND_INTERVAL = float(os.environ.get('CHATBOT_WRITE_BEHIND_INTERVAL', 2))
@@ -9,6 +9,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from apps.monitoring.views import metrics_view
+
 # Swagger documentation
 schema_view = get_schema_view(
     openapi.Info(
@@ -31,6 +33,10 @@ urlpatterns = [
     path('api/', include('apps.inventario.api.router')),
     path('api/', include('apps.blockchain.api.router')),
     path('api/', include('apps.chatbot.api.router')),
+    path('api/', include('apps.monitoring.api.router')),
+
+    # Monitoring
+    path('metrics', metrics_view, name='metrics'),
 
     # Documentation
     path('docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
@@ -14,8 +14,11 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 django.setup()
 
 import pytest
+from contextlib import contextmanager
 from django.contrib.auth import get_user_model
 
+from apps.monitoring.queries import record_queries
+
 
 @pytest.fixture
 def user_admin(db):
@@ -62,3 +65,24 @@ def producto_data():
             {'moneda': 'USD', 'precio': 12.50}
         ]
     }
+
+
+@pytest.fixture
+def query_budget(db):
+    """
+    Fixture que falla si un bloque ejecuta más consultas SQL de las permitidas.
+
+    Uso:
+        with query_budget(3):
+            client.get('/api/empresas/')
+    """
+    @contextmanager
+    def _budget(max_queries):
+        with record_queries() as recorder:
+            yield recorder
+        if recorder.count > max_queries:
+            pytest.fail(
+                f"Presupuesto de {max_queries} consultas excedido\n{recorder.report()}",
+                pytrace=False
+            )
+    return _budget
@@ -0,0 +1,3 @@
+# Infrastructure Layer - Clean Architecture
+# Implementaciones técnicas transversales (renderers, conexiones, etc.)
+# que la capa de presentación usa sin acoplarse a una librería concreta.
@@ -0,0 +1,74 @@
+"""
+Circuit breaker para dependencias externas.
+
+Tras ``umbral_fallos`` fallos consecutivos el circuito se abre y las
+llamadas se rechazan de inmediato durante ``tiempo_apertura`` segundos.
+Pasado ese tiempo queda semiabierto: se deja pasar una sola llamada de
+prueba; si tiene éxito el circuito se cierra y si falla se vuelve a
+abrir. El estado es por proceso.
+"""
+import threading
+import time
+
+CERRADO = 'cerrado'
+SEMIABIERTO = 'semiabierto'
+ABIERTO = 'abierto'
+
+
+class CircuitBreaker:
+    """Circuit breaker de tres estados (cerrado, abierto, semiabierto)"""
+
+    def __init__(self, umbral_fallos=5, tiempo_apertura=30.0, al_cambiar=None, reloj=time.monotonic):
+        self.umbral_fallos = umbral_fallos
+        self.tiempo_apertura = tiempo_apertura
+        self._al_cambiar = al_cambiar
+        self._reloj = reloj
+        self._lock = threading.Lock()
+        self.estado = CERRADO
+        self._fallos = 0
+        self._abierto_desde = None
+        self._prueba_en_curso = False
+
+    def reiniciar(self):
+        """Vuelve al estado cerrado sin fallos"""
+        with self._lock:
+            self._fallos = 0
+            self._abierto_desde = None
+            self._prueba_en_curso = False
+            self._cambiar(CERRADO)
+
+    def _cambiar(self, estado):
+        if estado == self.estado:
+            return
+        self.estado = estado
+        if self._al_cambiar is not None:
+            self._al_cambiar(estado)
+
+    def permite(self):
+        """True si la llamada puede intentarse (False: usar el fallback ya)"""
+        with self._lock:
+            if self.estado == CERRADO:
+                return True
+            if self.estado == ABIERTO:
+                if self._reloj() - self._abierto_desde < self.tiempo_apertura:
+                    return False
+                self._cambiar(SEMIABIERTO)
+            # Semiabierto: solo una llamada de prueba a la vez
+            if self._prueba_en_curso:
+                return False
+            self._prueba_en_curso = True
+            return True
+
+    def registrar_exito(self):
+        with self._lock:
+            self._fallos = 0
+            self._prueba_en_curso = False
+            self._cambiar(CERRADO)
+
+    def registrar_fallo(self):
+        with self._lock:
+            self._fallos += 1
+            self._prueba_en_curso = False
+            if self.estado == SEMIABIERTO or self._fallos >= self.umbral_fallos:
+                self._abierto_desde = self._reloj()
+                self._cambiar(ABIERTO)
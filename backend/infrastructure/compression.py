@@ -0,0 +1,197 @@
+"""
+Compresión negociada de respuestas HTTP.
+
+Elige la mejor codificación que acepte el cliente (``Accept-Encoding``)
+entre las disponibles en el servidor, en el orden de
+``settings.COMPRESSION_ENCODINGS``: zstd (requiere ``zstandard``), br
+(requiere ``brotli``) y gzip (siempre disponible). Solo se comprimen
+respuestas JSON/texto; las normales a partir de COMPRESSION_MIN_SIZE
+bytes y las de streaming chunk a chunk, sin acumular el cuerpo.
+"""
+import zlib
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depende del entorno
+    zstandard = None
+
+TIPOS_COMPRIMIBLES = {
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml',
+}
+# Server-Sent Events: cada evento debe llegar sin esperar al compresor
+TIPOS_EXCLUIDOS = {'text/event-stream'}
+
+
+class _Gzip:
+    def __init__(self):
+        self._c = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self._c.compress(data)
+
+    def flush(self):
+        return self._c.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._c.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        # Calidad 4: buen ratio sin el coste de las calidades altas
+        self._c = brotli.Compressor(quality=4)
+
+    def compress(self, data):
+        return self._c.process(data)
+
+    def flush(self):
+        return self._c.flush()
+
+    def finish(self):
+        return self._c.finish()
+
+
+class _Zstd:
+    def __init__(self):
+        self._c = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data):
+        return self._c.compress(data)
+
+    def flush(self):
+        return self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._c.flush()
+
+
+COMPRESORES = {'gzip': _Gzip}
+if brotli is not None:
+    COMPRESORES['br'] = _Brotli
+if zstandard is not None:
+    COMPRESORES['zstd'] = _Zstd
+
+
+def elegir_codificacion(accept_encoding):
+    """
+    Codificación preferida por el servidor entre las que acepta el cliente.
+
+    Respeta los valores q (``gzip;q=0`` la excluye) y el comodín ``*``.
+    Devuelve None si no hay ninguna aceptable.
+    """
+    aceptadas = {}
+    for parte in accept_encoding.split(','):
+        nombre, _, parametros = parte.partition(';')
+        nombre = nombre.strip().lower()
+        if not nombre:
+            continue
+        q = 1.0
+        parametros = parametros.strip()
+        if parametros.startswith('q='):
+            try:
+                q = float(parametros[2:])
+            except ValueError:
+                q = 0.0
+        aceptadas[nombre] = q
+
+    for nombre in settings.COMPRESSION_ENCODINGS:
+        if nombre in COMPRESORES and aceptadas.get(nombre, aceptadas.get('*', 0)) > 0:
+            return nombre
+    return None
+
+
+def _es_comprimible(response):
+    tipo = response.get('Content-Type', '').split(';')[0].strip().lower()
+    if tipo in TIPOS_EXCLUIDOS:
+        return False
+    return tipo in TIPOS_COMPRIMIBLES or tipo.startswith('text/')
+
+
+def _comprimir_stream(chunks, compresor):
+    for chunk in chunks:
+        datos = compresor.compress(chunk) + compresor.flush()
+        if datos:
+            yield datos
+    yield compresor.finish()
+
+
+async def _comprimir_stream_async(chunks, compresor):
+    async for chunk in chunks:
+        datos = compresor.compress(chunk) + compresor.flush()
+        if datos:
+            yield datos
+    yield compresor.finish()
+
+
+class CompressionMiddleware:
+    """
+    Middleware que comprime las respuestas con gzip, brotli o zstd.
+
+    Reemplaza a GZipMiddleware de Django: agrega negociación entre varias
+    codificaciones y un umbral de tamaño configurable. Funciona en modo
+    síncrono y asíncrono.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.comprimir(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.comprimir(request, await self.get_response(request))
+
+    def comprimir(self, request, response):
+        if response.has_header('Content-Encoding') or not _es_comprimible(response):
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        codificacion = elegir_codificacion(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificacion is None:
+            return response
+
+        compresor = COMPRESORES[codificacion]()
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = _comprimir_stream_async(
+                    response.streaming_content, compresor
+                )
+            else:
+                response.streaming_content = _comprimir_stream(
+                    response.streaming_content, compresor
+                )
+            del response['Content-Length']
+        else:
+            comprimido = compresor.compress(response.content) + compresor.finish()
+            if len(comprimido) >= len(response.content):
+                return response
+            response.content = comprimido
+            response['Content-Length'] = str(len(comprimido))
+
+        # El cuerpo cambió: el ETag fuerte pasa a ser débil (igual que GZipMiddleware)
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+
+        response['Content-Encoding'] = codificacion
+        return response
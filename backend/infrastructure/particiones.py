@@ -0,0 +1,219 @@
+"""
+Particionamiento declarativo de PostgreSQL.
+
+El inventario se particiona por hash de la empresa. Cada empresa cae entera
+en una partición, así que las consultas filtradas por NIT (los endpoints
+``por_empresa``) solo recorren esa partición (partition pruning). El
+inventario de las empresas grandes no degrada las consultas de las demás.
+El registro de la blockchain puede particionarse por mes de ``timestamp``.
+
+Django no sabe de particiones: los modelos no cambian y las tablas se
+convierten con SQL desde las migraciones y los comandos
+``particiones_inventario`` y ``particiones_blockchain`` (solo PostgreSQL;
+en SQLite no hacen nada). PostgreSQL exige que la llave primaria y las
+restricciones únicas de una tabla particionada incluyan la columna de
+partición. Por eso la llave primaria en la base de datos pasa a ser
+``(id, empresa_id)`` o ``(indice, timestamp)``. Para el ORM ``id`` sigue
+siendo la llave primaria y sigue siendo única, porque la genera una
+secuencia. Una restricción única nueva en estas tablas debe incluir la
+columna de partición.
+"""
+from datetime import date
+
+# Partición que recibe las filas fuera de los meses creados
+SUFIJO_OTROS = 'otros'
+
+
+def meses(desde: date, hasta: date) -> list:
+    """Primer día de cada mes entre ``desde`` y ``hasta`` (ambos incluidos)"""
+    mes = desde.replace(day=1)
+    resultado = []
+    while mes <= hasta:
+        resultado.append(mes)
+        mes = siguiente_mes(mes)
+    return resultado
+
+
+def siguiente_mes(mes: date) -> date:
+    """Primer día del mes siguiente"""
+    return date(mes.year + mes.month // 12, mes.month % 12 + 1, 1)
+
+
+def sumar_meses(dia: date, cantidad: int) -> date:
+    """Primer día del mes ``cantidad`` meses después del de ``dia``"""
+    mes = dia.replace(day=1)
+    for _ in range(cantidad):
+        mes = siguiente_mes(mes)
+    return mes
+
+
+def particiones_hash(tabla: str, modulo: int) -> list:
+    """(nombre, límites) de las particiones hash de ``tabla``"""
+    return [
+        (f'{tabla}_h{modulo}_{resto}', f'FOR VALUES WITH (MODULUS {modulo}, REMAINDER {resto})')
+        for resto in range(modulo)
+    ]
+
+
+def particion_mensual(tabla: str, mes: date) -> tuple:
+    """(nombre, límites) de la partición de ``tabla`` para el mes de ``mes``"""
+    return (
+        f'{tabla}_{mes:%Y%m}',
+        f"FOR VALUES FROM ('{mes.isoformat()}') TO ('{siguiente_mes(mes).isoformat()}')",
+    )
+
+
+def esta_particionada(connection, tabla: str) -> bool:
+    """True si ``tabla`` es una tabla particionada"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [tabla]
+        )
+        return cursor.fetchone() is not None
+
+
+def listar_particiones(connection, tabla: str) -> list:
+    """(nombre, límites, filas aproximadas, bytes) de cada partición de ``tabla``"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname, pg_get_expr(c.relpartbound, c.oid),
+                   GREATEST(c.reltuples, 0)::bigint, pg_total_relation_size(c.oid)
+            FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            ORDER BY c.relname
+            """,
+            [tabla]
+        )
+        return cursor.fetchall()
+
+
+def particionar_por_hash(connection, tabla: str, columna: str, modulo: int, columna_id: str = 'id'):
+    """Convierte ``tabla`` (particionada o no) en ``modulo`` particiones por hash de ``columna``"""
+    quote = connection.ops.quote_name
+    _reconstruir(
+        connection, tabla, columna_id, (columna_id, columna),
+        f'PARTITION BY HASH ({quote(columna)})', particiones_hash(tabla, modulo)
+    )
+
+
+def particionar_por_mes(connection, tabla: str, columna: str, desde: date, hasta: date,
+                        columna_id: str = 'id'):
+    """Convierte ``tabla`` en particiones mensuales de ``columna`` más una por defecto"""
+    quote = connection.ops.quote_name
+    particiones = [particion_mensual(tabla, mes) for mes in meses(desde, hasta)]
+    particiones.append((f'{tabla}_{SUFIJO_OTROS}', 'DEFAULT'))
+    _reconstruir(
+        connection, tabla, columna_id, (columna_id, columna),
+        f'PARTITION BY RANGE ({quote(columna)})', particiones
+    )
+
+
+def crear_particiones_mensuales(connection, tabla: str, desde: date, hasta: date) -> list:
+    """
+    Crea las particiones mensuales que falten entre ``desde`` y ``hasta``.
+
+    Devuelve los nombres creados. Falla si la partición por defecto ya
+    tiene filas de alguno de esos meses; por eso se crean por adelantado.
+    """
+    quote = connection.ops.quote_name
+    creadas = []
+    with connection.cursor() as cursor:
+        for mes in meses(desde, hasta):
+            nombre, limites = particion_mensual(tabla, mes)
+            cursor.execute('SELECT to_regclass(%s)', [nombre])
+            if cursor.fetchone()[0] is not None:
+                continue
+            cursor.execute(f'CREATE TABLE {quote(nombre)} PARTITION OF {quote(tabla)} {limites}')
+            creadas.append(nombre)
+    return creadas
+
+
+def desparticionar(connection, tabla: str, columna_id: str = 'id'):
+    """Vuelve a convertir ``tabla`` en una tabla sin particiones"""
+    _reconstruir(connection, tabla, columna_id, (columna_id,))
+
+
+def _reconstruir(connection, tabla, columna_id, llave_primaria, particionado='', particiones=()):
+    """
+    Reescribe ``tabla`` con otra forma conservando filas, restricciones e índices.
+
+    Copia las filas a una tabla nueva con las mismas columnas, borra la
+    original y renombra la nueva. Los nombres de la llave primaria, las
+    restricciones y los índices no cambian, así que las migraciones
+    posteriores de Django los siguen encontrando. Bloquea la tabla mientras
+    tanto y debe correr dentro de una transacción; las restricciones
+    diferidas de esa transacción pasan a verificarse en el momento.
+    """
+    quote = connection.ops.quote_name
+    nueva = f'{tabla}_nueva'
+    secuencia = f'{tabla}_{columna_id}_seq'
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {quote(tabla)} IN ACCESS EXCLUSIVE MODE')
+        # Las llaves foráneas de Django son diferidas: sus chequeos pendientes
+        # impedirían el DROP TABLE de la original
+        cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+            [tabla]
+        )
+        nombre_llave = cursor.fetchone()[0]
+        # Únicas y llaves foráneas; las CHECK las copia LIKE
+        cursor.execute(
+            """
+            SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+            WHERE conrelid = %s::regclass AND contype IN ('u', 'f')
+            ORDER BY conname
+            """,
+            [tabla]
+        )
+        restricciones = cursor.fetchall()
+        # Índices propios (no los que respaldan una restricción)
+        cursor.execute(
+            """
+            SELECT pg_get_indexdef(i.indexrelid) FROM pg_index i
+            WHERE i.indrelid = %s::regclass AND NOT EXISTS (
+                SELECT 1 FROM pg_constraint c
+                WHERE c.conrelid = i.indrelid AND c.conindid = i.indexrelid
+            )
+            """,
+            [tabla]
+        )
+        indices = [fila[0] for fila in cursor.fetchall()]
+
+        cursor.execute(
+            f'CREATE TABLE {quote(nueva)} '
+            f'(LIKE {quote(tabla)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) {particionado}'
+        )
+        for nombre, limites in particiones:
+            cursor.execute(f'CREATE TABLE {quote(nombre)} PARTITION OF {quote(nueva)} {limites}')
+
+        # Secuencia propia para el id: las columnas identity no se admiten
+        # en tablas particionadas antes de PostgreSQL 17
+        cursor.execute(f'CREATE SEQUENCE {quote(nueva + "_seq")}')
+        cursor.execute(
+            f'ALTER TABLE {quote(nueva)} ALTER COLUMN {quote(columna_id)} '
+            f"SET DEFAULT nextval('{nueva}_seq'::regclass)"
+        )
+        cursor.execute(f'INSERT INTO {quote(nueva)} SELECT * FROM {quote(tabla)}')
+        cursor.execute(
+            f"SELECT setval('{nueva}_seq', COALESCE(MAX({quote(columna_id)}), 0) + 1, false) "
+            f'FROM {quote(nueva)}'
+        )
+
+        # Con la original se borran sus particiones y su secuencia
+        cursor.execute(f'DROP TABLE {quote(tabla)}')
+        cursor.execute(f'ALTER TABLE {quote(nueva)} RENAME TO {quote(tabla)}')
+        cursor.execute(f'ALTER SEQUENCE {quote(nueva + "_seq")} RENAME TO {quote(secuencia)}')
+        cursor.execute(f'ALTER SEQUENCE {quote(secuencia)} OWNED BY {quote(tabla)}.{quote(columna_id)}')
+
+        columnas = ', '.join(map(quote, llave_primaria))
+        cursor.execute(f'ALTER TABLE {quote(tabla)} ADD CONSTRAINT {quote(nombre_llave)} PRIMARY KEY ({columnas})')
+        for nombre, definicion in restricciones:
+            cursor.execute(f'ALTER TABLE {quote(tabla)} ADD CONSTRAINT {quote(nombre)} {definicion}')
+        for definicion in indices:
+            # En una tabla particionada pg_get_indexdef devuelve "ON ONLY",
+            # que no crearía el índice en las particiones
+            cursor.execute(definicion.replace(' ON ONLY ', ' ON ', 1))
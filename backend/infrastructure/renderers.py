@@ -0,0 +1,71 @@
+"""
+Renderer JSON de alto rendimiento para DRF.
+
+Usa orjson si está instalado y, si no, se comporta exactamente como el
+``JSONRenderer`` de DRF. La salida es la misma que la del renderer
+estándar con la configuración por defecto (compacta, UTF-8 sin escapar,
+``\\u2028``/``\\u2029`` escapados, Decimal como número, datetimes ISO 8601
+con ``Z`` para UTC y UUID como texto). Las respuestas con indentación
+(p. ej. la API navegable) y los valores que orjson no soporta (enteros
+de más de 64 bits) se delegan al encoder estándar. orjson escribe NaN e
+infinito como ``null``; si la salida tiene ``null`` y los datos traen
+floats no finitos también se delega, así que con STRICT_JSON se lanza el
+mismo ValueError que DRF (y sin STRICT_JSON se emite ``NaN``).
+"""
+import math
+from decimal import Decimal
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depende del entorno
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer respaldado por orjson cuando está disponible"""
+
+    if orjson is not None:
+        opciones = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+    # Tipos que orjson no conoce (Decimal, timedelta, lazy strings,
+    # QuerySets...) se convierten igual que en el encoder de DRF
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(data, default=self._default, option=self.opciones)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if b'null' in ret and _tiene_no_finitos(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Igual que DRF: JSON como subconjunto estricto de JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+def _tiene_no_finitos(valor):
+    """Si hay algún float o Decimal NaN o infinito en listas y dicts anidados"""
+    pendientes = [valor]
+    while pendientes:
+        valor = pendientes.pop()
+        if isinstance(valor, float):
+            if not math.isfinite(valor):
+                return True
+        elif isinstance(valor, Decimal):
+            if not valor.is_finite():
+                return True
+        elif isinstance(valor, dict):
+            pendientes.extend(valor.values())
+        elif isinstance(valor, (list, tuple)):
+            pendientes.extend(valor)
+    return False
@@ -0,0 +1,225 @@
+"""
+Lecturas en réplicas de la base de datos.
+
+Con réplicas configuradas (``DATABASE_REPLICAS``, ver DB_REPLICA_HOST en
+settings) los casos de uso marcados con ``@solo_lectura`` consultan una
+réplica elegida por turnos (round-robin); todo lo demás usa el primario.
+
+* Read-your-writes: la primera escritura de un request lo fija al primario
+  hasta que termina, y ``ReplicaMiddleware`` deja una cookie para que los
+  requests de los DB_REPLICA_PIN_SECONDS segundos siguientes también lean
+  del primario (el retraso de la replicación no los alcanza).
+* Dentro de una transacción del primario se lee del primario. Fuera de un
+  request (comandos, shell) no hay fijación: un script que lee lo que
+  acaba de escribir debe hacerlo dentro de ``transaction.atomic``.
+* Una réplica que no acepta conexiones queda fuera DB_REPLICA_RETRY
+  segundos (circuit breaker por réplica); sin réplicas disponibles se lee
+  del primario.
+
+La réplica se elige al llamar al caso de uso. Si devuelve un iterador
+perezoso (``iterar_filas``), las consultas que hace al recorrerlo van a la
+misma réplica aunque el recorrido ocurra después, al enviar la respuesta.
+"""
+import contextvars
+import functools
+import itertools
+from collections.abc import Iterator
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+from infrastructure.circuit_breaker import CircuitBreaker
+
+# Cookie que fija al primario los requests posteriores a una escritura
+COOKIE_PRIMARIO = 'db_primario'
+
+# Réplica de las lecturas del caso de uso en curso (None: primario)
+_replica_actual = ContextVar('replica_actual', default=None)
+# Estado de escritura del request en curso (una instancia mutable por request)
+_estado = ContextVar('estado_replicas', default=None)
+
+
+class _EstadoRequest:
+    __slots__ = ('fijado', 'escribio')
+
+    def __init__(self, fijado=False):
+        self.fijado = fijado
+        self.escribio = False
+
+
+class Replicas:
+    """Elige réplicas por turnos, salteando las que no aceptan conexiones"""
+
+    def __init__(self):
+        self._turno = itertools.count()
+        self._circuitos = {}
+
+    @property
+    def aliases(self):
+        return settings.DATABASE_REPLICAS
+
+    def circuito(self, alias):
+        circuito = self._circuitos.get(alias)
+        if circuito is None:
+            circuito = self._circuitos.setdefault(
+                alias, CircuitBreaker(umbral_fallos=1, tiempo_apertura=settings.DB_REPLICA_RETRY)
+            )
+        return circuito
+
+    def elegir(self):
+        """Alias de la próxima réplica disponible, o None para leer del primario"""
+        aliases = self.aliases
+        if not aliases:
+            return None
+        inicio = next(self._turno)
+        for i in range(len(aliases)):
+            alias = aliases[(inicio + i) % len(aliases)]
+            circuito = self.circuito(alias)
+            if not circuito.permite():
+                continue
+            try:
+                # Sin costo si la conexión del hilo ya está abierta
+                connections[alias].ensure_connection()
+            except OperationalError:
+                circuito.registrar_fallo()
+                continue
+            circuito.registrar_exito()
+            return alias
+        return None
+
+    def registrar_fallo(self, alias):
+        self.circuito(alias).registrar_fallo()
+        connections[alias].close()
+
+    def reiniciar(self):
+        self._circuitos.clear()
+
+
+replicas = Replicas()
+
+
+def fijado_al_primario():
+    """True si las lecturas del contexto actual deben ir al primario"""
+    estado = _estado.get()
+    if estado is not None and estado.fijado:
+        return True
+    # Una transacción abierta en el primario ve datos que la réplica aún no tiene
+    return connections[DEFAULT_DB_ALIAS].in_atomic_block
+
+
+def fijar_al_primario():
+    """Fija al primario el resto del request en curso"""
+    estado = _estado.get()
+    if estado is not None:
+        estado.fijado = True
+        estado.escribio = True
+
+
+def solo_lectura(metodo):
+    """
+    Marca un caso de uso que solo lee: sus consultas van a una réplica.
+
+    Si la réplica falla a mitad de la llamada (se cayó después de elegirla)
+    la llamada se repite contra el primario.
+    """
+    @functools.wraps(metodo)
+    def envoltura(*args, **kwargs):
+        if not settings.DATABASE_REPLICAS or fijado_al_primario():
+            return metodo(*args, **kwargs)
+        alias = replicas.elegir()
+        if alias is None:
+            return metodo(*args, **kwargs)
+
+        contexto = contextvars.copy_context()
+        contexto.run(_replica_actual.set, alias)
+        try:
+            resultado = contexto.run(metodo, *args, **kwargs)
+        except OperationalError:
+            replicas.registrar_fallo(alias)
+            return metodo(*args, **kwargs)
+        if isinstance(resultado, Iterator):
+            return _recorrer_en(contexto, resultado)
+        return resultado
+
+    return envoltura
+
+
+def _recorrer_en(contexto, iterador):
+    """Recorre ``iterador`` dentro de ``contexto``, donde fue creado"""
+    while True:
+        try:
+            valor = contexto.run(next, iterador)
+        except StopIteration:
+            return
+        yield valor
+
+
+class RouterReplicas:
+    """Router de Django: lecturas de ``@solo_lectura`` a réplicas, el resto al primario"""
+
+    def db_for_read(self, model, **hints):
+        return _replica_actual.get()
+
+    def db_for_write(self, model, **hints):
+        fijar_al_primario()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # El primario y las réplicas tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # El esquema llega a las réplicas por la replicación
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Read-your-writes entre requests.
+
+    Un request que escribió responde con una cookie que fija al primario a
+    los requests del mismo cliente durante DB_REPLICA_PIN_SECONDS segundos.
+    Sin réplicas configuradas no se instala.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        estado = _EstadoRequest(fijado=COOKIE_PRIMARIO in request.COOKIES)
+        token = _estado.set(estado)
+        try:
+            response = self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self.marcar(estado, response)
+
+    async def __acall__(self, request):
+        estado = _EstadoRequest(fijado=COOKIE_PRIMARIO in request.COOKIES)
+        token = _estado.set(estado)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _estado.reset(token)
+        return self.marcar(estado, response)
+
+    def marcar(self, estado, response):
+        if estado.escribio:
+            response.set_cookie(
+                COOKIE_PRIMARIO, '1', max_age=settings.DB_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax'
+            )
+        return response
@@ -0,0 +1,163 @@
+"""
+Respuestas JSON en streaming para listados grandes.
+
+``StreamingJSONResponse`` emite un array JSON a medida que se consumen
+las filas de un iterador (normalmente un ``QuerySet.iterator()``): el
+primer byte sale con el primer lote y la memoria máxima no depende del
+tamaño del catálogo. Los lotes se serializan con ``FastJSONRenderer``,
+así que el cuerpo es idéntico byte a byte al de la respuesta normal.
+
+Django solo transmite por partes los iteradores del tipo de su servidor:
+bajo WSGI (runserver, gunicorn) uno síncrono y bajo ASGI uno asíncrono;
+con el otro tipo acumula el cuerpo completo antes de enviarlo. Por eso
+las respuestas reciben el request y eligen el iterador con ``es_asgi``.
+
+El primer lote se consulta al crear la respuesta, de modo que un error de
+la consulta llega a la vista antes de enviar nada. Si falla un lote
+posterior el status ya se envió: el array no se cierra y el cuerpo
+termina con ``ERROR_EN_STREAM``, así el cliente no confunde la respuesta
+truncada con una completa.
+
+``evento_sse`` y ``EventStreamResponse`` sirven para Server-Sent Events.
+La vista pasa el generador de eventos del tipo de su servidor; si falla a
+mitad del stream se cierra con un evento ``error``.
+"""
+import logging
+from itertools import chain, islice
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from infrastructure.renderers import FastJSONRenderer
+
+logger = logging.getLogger(__name__)
+
+TAMANO_LOTE = 500
+
+# Cierre de un array interrumpido: deja el JSON inválido a propósito
+ERROR_EN_STREAM = '\n{"error": "La respuesta se interrumpió"}\n'.encode()
+
+
+def es_asgi(request):
+    """True si el request llegó por el servidor ASGI (acepta requests de DRF)"""
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def _lotes(filas, tamano_lote, renderer):
+    filas = iter(filas)
+    while lote := list(islice(filas, tamano_lote)):
+        # render() de una lista produce "[...]": se quitan los corchetes
+        yield renderer.render(lote)[1:-1]
+
+
+def json_array_stream(filas, tamano_lote=TAMANO_LOTE, renderer=None):
+    """
+    Genera ``[fila, fila, ...]`` en bytes, serializando por lotes.
+
+    El primer bloque ya incluye el primer lote: un error al consultarlo se
+    lanza. Los errores posteriores se registran y cierran el cuerpo con
+    ERROR_EN_STREAM.
+    """
+    lotes = _lotes(filas, tamano_lote, renderer or FastJSONRenderer())
+    primero = next(lotes, None)
+    if primero is None:
+        yield b'[]'
+        return
+    yield b'[' + primero
+    try:
+        for lote in lotes:
+            yield b',' + lote
+    except Exception:
+        logger.exception('Error al generar un listado en streaming')
+        yield ERROR_EN_STREAM
+        return
+    yield b']'
+
+
+async def _en_hilo(bloques):
+    """
+    Recorre un iterador síncrono desde el event loop.
+
+    Cada bloque se pide en el hilo de las vistas síncronas del request
+    (thread_sensitive), el mismo que abrió el cursor de la consulta.
+    """
+    siguiente = sync_to_async(next)
+    while (bloque := await siguiente(bloques, None)) is not None:
+        yield bloque
+
+
+class StreamingJSONResponse(StreamingHttpResponse):
+    """Respuesta con un array JSON generado a partir de un iterable de dicts"""
+
+    def __init__(self, request, filas, tamano_lote=TAMANO_LOTE, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        bloques = json_array_stream(filas, tamano_lote)
+        # Consulta el primer lote ahora, dentro de la vista
+        bloques = chain([next(bloques)], bloques)
+        super().__init__(_en_hilo(bloques) if es_asgi(request) else bloques, **kwargs)
+
+
+def evento_sse(evento, datos):
+    """Un evento Server-Sent Events con ``datos`` serializados a JSON"""
+    return b'event: ' + evento.encode() + b'\ndata: ' + FastJSONRenderer().render(datos) + b'\n\n'
+
+
+def _evento_de_error():
+    return evento_sse('error', {'detail': 'La respuesta se interrumpió'})
+
+
+def _con_evento_de_error(eventos):
+    try:
+        yield from eventos
+    except Exception:
+        logger.exception('Error al generar un stream de eventos')
+        yield _evento_de_error()
+
+
+async def _acon_evento_de_error(eventos):
+    try:
+        async for evento in eventos:
+            yield evento
+    except Exception:
+        logger.exception('Error al generar un stream de eventos')
+        yield _evento_de_error()
+
+
+class EventStreamResponse(StreamingHttpResponse):
+    """
+    Respuesta ``text/event-stream`` sin caché ni buffering en el proxy.
+
+    ``eventos`` es un iterador asíncrono bajo ASGI y uno síncrono bajo WSGI.
+    """
+
+    def __init__(self, eventos, **kwargs):
+        kwargs.setdefault('content_type', 'text/event-stream')
+        if hasattr(eventos, '__aiter__'):
+            eventos = _acon_evento_de_error(eventos)
+        else:
+            eventos = _con_evento_de_error(eventos)
+        super().__init__(eventos, **kwargs)
+        self['Cache-Control'] = 'no-cache'
+        # nginx acumula la respuesta salvo que se le indique lo contrario
+        self['X-Accel-Buffering'] = 'no'
+
+
+def acepta_eventos(request):
+    """True si el cliente pidió Server-Sent Events (Accept o ?stream=true)"""
+    if request.GET.get('stream', '').lower() in ('1', 'true'):
+        return True
+    return 'text/event-stream' in request.headers.get('Accept', '')
+
+
+def acepta_streaming(request):
+    """
+    True si el listado puede responderse en streaming.
+
+    Solo cuando DRF negoció JSON (la API navegable sigue usando el
+    renderer HTML) y el cliente no pidió lo contrario con ?stream=false.
+    """
+    if request.query_params.get('stream', '').lower() in ('0', 'false'):
+        return False
+    return isinstance(getattr(request, 'accepted_renderer', None), JSONRenderer)
@@ -0,0 +1,94 @@
+"""
+Tests de las actualizaciones parciales y de los bloques con diferencias
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from application.use_cases import EmpresaUseCases, InventarioUseCases, ProductoUseCases
+from apps.blockchain.models import RegistroBlockchain
+from apps.empresas.models import Empresa
+from apps.inventario.models import Inventario
+from apps.productos.models import Producto
+
+
+@pytest.fixture
+def inventario(db):
+    empresa = Empresa.objects.create(nit='900-1', nombre='Empresa', direccion='Calle', telefono='300')
+    producto = Producto.objects.create(codigo='P-1', nombre='Producto', empresa=empresa)
+    return Inventario.objects.create(empresa=empresa, producto=producto, cantidad=5, ubicacion='Bodega')
+
+
+def ultimo_bloque():
+    return RegistroBlockchain.objects.order_by('-indice').first()
+
+
+@pytest.mark.django_db
+class TestAplicarCambios:
+    """Tests de SeguimientoDeCambios.aplicar_cambios"""
+
+    def test_compara_despues_de_normalizar(self, inventario):
+        """Test: Los None se ignoran y los espacios no cuentan como cambio"""
+        assert inventario.aplicar_cambios(cantidad=None, ubicacion=' Bodega ') == {}
+        assert inventario.aplicar_cambios(cantidad=8, ubicacion='Bodega') == {'cantidad': (5, 8)}
+
+    def test_save_limpia_los_cambios(self, inventario):
+        """Test: Tras guardar, un save() completo vuelve a registrar la foto entera"""
+        inventario.aplicar_cambios(cantidad=8)
+        assert inventario.guardar_cambios()
+        assert inventario.cambios is None
+        inventario.save()
+        assert ultimo_bloque().datos['cantidad'] == 8
+
+
+@pytest.mark.django_db
+class TestActualizacionSinCambios:
+    """Tests de las actualizaciones que no cambian nada"""
+
+    def test_no_escribe_ni_agrega_bloques(self, inventario):
+        """Test: Solo se lee; no hay UPDATE ni bloque nuevo"""
+        bloques = RegistroBlockchain.objects.count()
+        with CaptureQueriesContext(connection) as consultas:
+            EmpresaUseCases().actualizar_empresa('900-1', nombre='Empresa', telefono=' 300 ')
+            ProductoUseCases().actualizar_producto(inventario.producto_id, nombre='Producto')
+            InventarioUseCases().actualizar_registro(inventario.id, cantidad=5)
+            InventarioUseCases().incrementar_stock(inventario.id, 0)
+        assert all(c['sql'].startswith('SELECT') for c in consultas.captured_queries)
+        assert RegistroBlockchain.objects.count() == bloques
+
+@pytest.mark.django_db
+class TestActualizacionParcial:
+    """Tests de las actualizaciones con cambios"""
+
+    def test_solo_escribe_las_columnas_cambiadas(self, inventario, django_assert_num_queries):
+        """Test: El UPDATE lleva la columna cambiada y updated_at, nada más"""
+        with django_assert_num_queries(4) as consultas:
+            # inventario, UPDATE, bloque (último + alta)
+            InventarioUseCases().actualizar_registro(inventario.id, cantidad=9, ubicacion='Bodega')
+        update = next(c['sql'] for c in consultas.captured_queries if c['sql'].startswith('UPDATE'))
+        assert '"cantidad"' in update and '"updated_at"' in update
+        assert '"ubicacion"' not in update and '"empresa_id"' not in update
+
+    def test_el_bloque_registra_la_diferencia(self, inventario):
+        """Test: Los bloques de modificación llevan identificación y diferencia"""
+        EmpresaUseCases().actualizar_empresa('900-1', nombre='Renombrada', direccion='Calle')
+        assert ultimo_bloque().datos == {
+            'nit': '900-1', 'cambios': {'nombre': {'antes': 'Empresa', 'despues': 'Renombrada'}}
+        }
+
+        ProductoUseCases().actualizar_producto(inventario.producto_id, caracteristicas='Nuevas')
+        assert ultimo_bloque().datos == {
+            'id': inventario.producto_id, 'codigo': 'P-1',
+            'cambios': {'caracteristicas': {'antes': '', 'despues': 'Nuevas'}}
+        }
+
+        InventarioUseCases().decrementar_stock(inventario.id, 2)
+        bloque = ultimo_bloque()
+        assert bloque.tipo == 'inventario_actualizado'
+        assert bloque.datos == {
+            'id': inventario.id, 'empresa': '900-1', 'producto': 'Producto',
+            'cambios': {'cantidad': {'antes': 5, 'despues': 3}}
+        }
+        assert RegistroBlockchain.verificar_integridad()['valido']
+        assert Empresa.objects.get().nombre == 'Renombrada'
+        assert Inventario.objects.get().cantidad == 3
@@ -0,0 +1,175 @@
+"""
+Tests de la autenticación JWT compartida entre middleware y DRF
+"""
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.blockchain.models import RegistroBlockchain
+from apps.users.authentication import CachedJWTAuthentication, _clave_version
+from apps.users.models import User
+
+
+def _cliente(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+@pytest.mark.django_db
+class TestCachedJWTAuthentication:
+    """Tests para CachedJWTAuthentication y CurrentUserMiddleware"""
+
+    def test_token_se_valida_una_vez_por_request(self, user_admin, monkeypatch):
+        """Test: Middleware y vista comparten una sola validación del token"""
+        llamadas = []
+        original = JWTAuthentication.get_validated_token
+
+        def _contar(self, raw_token):
+            llamadas.append(raw_token)
+            return original(self, raw_token)
+
+        monkeypatch.setattr(JWTAuthentication, 'get_validated_token', _contar)
+        response = _cliente(user_admin).get('/api/auth/me/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(llamadas) == 1
+
+    def test_usuario_cacheado_por_token(self, user_admin):
+        """Test: Con la caché caliente el request no consulta el usuario"""
+        client = _cliente(user_admin)
+        client.get('/api/auth/me/')
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = client.get('/api/auth/me/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['email'] == 'admin@test.com'
+        assert len(consultas) == 0
+
+    def test_guardar_usuario_invalida_cache(self, user_admin):
+        """Test: Un cambio de rol se ve en el siguiente request"""
+        client = _cliente(user_admin)
+        assert client.post('/api/empresas/', {}, format='json').status_code == status.HTTP_400_BAD_REQUEST
+
+        user_admin.role = 'externo'
+        user_admin.save()
+
+        response = client.post('/api/empresas/', {}, format='json')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_cada_request_recibe_su_copia(self, user_admin):
+        """Test: Lo que un request le asigna al usuario cacheado no llega a otro"""
+        token = AccessToken.for_user(user_admin)
+        autenticacion = CachedJWTAuthentication()
+        primero = autenticacion.get_user(token)
+        primero.atributo_del_request = 'primero'
+        primero.role = 'externo'
+
+        segundo = autenticacion.get_user(token)
+        assert segundo is not primero
+        assert not hasattr(segundo, 'atributo_del_request')
+        assert segundo.role == 'admin'
+
+    def test_cambio_en_otro_worker_invalida_la_cache(self, user_admin):
+        """Test: Un usuario desactivado en otro proceso deja de servirse desde esta caché"""
+        client = _cliente(user_admin)
+        assert client.get('/api/auth/me/').status_code == status.HTTP_200_OK
+
+        # Lo que ve este proceso cuando otro worker guarda el usuario: cambia
+        # la versión en la base y se borra la de la caché de Django
+        User.objects.filter(pk=user_admin.pk).update(
+            is_active=False, token_version=F('token_version') + 1
+        )
+        cache.delete(_clave_version(user_admin.pk))
+
+        assert client.get('/api/auth/me/').status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_token_invalido_sigue_rechazandose(self):
+        """Test: Un token inválido devuelve 401"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer token-invalido')
+        response = client.get('/api/auth/me/')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.fixture
+def sin_estado(settings):
+    """Activa los tokens sin estado"""
+    settings.JWT_STATELESS_USER = True
+    cache.clear()
+
+
+def _login(email='admin@test.com', password='testpass123'):
+    response = APIClient().post('/api/auth/login/', {'email': email, 'password': password}, format='json')
+    assert response.status_code == status.HTTP_200_OK
+    return response.data
+
+
+@pytest.mark.django_db
+class TestTokensSinEstado:
+    """Tests del modo JWT_STATELESS_USER"""
+
+    def test_login_embebe_claims(self, sin_estado, user_admin):
+        """Test: El access token lleva email, rol, superusuario y versión"""
+        token = AccessToken(_login()['access'])
+        assert token['email'] == 'admin@test.com'
+        assert token['role'] == 'admin'
+        assert token['is_superuser'] is False
+        assert token['ver'] == user_admin.token_version
+
+    def test_permisos_sin_consultar_usuario(self, sin_estado, user_admin):
+        """Test: Con la versión cacheada los permisos no consultan la base de datos"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {_login()['access']}")
+        client.get('/api/monitoring/perfiles/')
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = client.get('/api/monitoring/perfiles/')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert len(consultas) == 0
+
+    def test_cambio_de_rol_revoca_tokens(self, sin_estado, user_admin):
+        """Test: Cambiar el rol invalida access y refresh emitidos"""
+        tokens = _login()
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        assert client.get('/api/monitoring/perfiles/').status_code == status.HTTP_200_OK
+
+        user_admin.role = 'externo'
+        user_admin.save()
+
+        assert client.get('/api/monitoring/perfiles/').status_code == status.HTTP_401_UNAUTHORIZED
+        response = APIClient().post('/api/auth/refresh/', {'refresh': tokens['refresh']}, format='json')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_refresh_renueva_claims(self, sin_estado, user_admin):
+        """Test: El refresh emite un access token con los claims vigentes"""
+        tokens = _login()
+        response = APIClient().post('/api/auth/refresh/', {'refresh': tokens['refresh']}, format='json')
+        assert response.status_code == status.HTTP_200_OK
+        assert AccessToken(response.data['access'])['role'] == 'admin'
+
+    def test_blockchain_registra_email_del_token(self, sin_estado, user_admin, empresa_data):
+        """Test: Los bloques se atribuyen al email del claim"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {_login()['access']}")
+        response = client.post('/api/empresas/', empresa_data, format='json')
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert RegistroBlockchain.objects.filter(tipo='empresa_creada').first().usuario == 'admin@test.com'
+
+    def test_me_devuelve_usuario_completo(self, sin_estado, user_admin):
+        """Test: /auth/me/ carga el usuario aunque el token sea sin estado"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {_login()['access']}")
+        response = client.get('/api/auth/me/')
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['date_joined']
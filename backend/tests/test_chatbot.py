@@ -0,0 +1,387 @@
+"""
+Tests de la vista asíncrona del chatbot
+"""
+import asyncio
+import json
+
+import httpx
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.chatbot.models import ConversacionChat, MensajeChat
+from apps.chatbot import webhook as modulo_webhook
+from apps.chatbot.cache import cache_respuestas
+from apps.chatbot.persistencia import buffer_mensajes
+from apps.chatbot.webhook import aconsultar_webhook, circuito
+from apps.monitoring import metrics
+from infrastructure.circuit_breaker import ABIERTO, CERRADO
+
+
+class _Webhook(list):
+    """Mensajes recibidos por el webhook simulado y la respuesta a devolver"""
+    respuesta = httpx.Response(200, json={'response': 'Respuesta del bot'})
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    """Reemplaza el webhook de n8n"""
+    recibidos = _Webhook()
+
+    def _responder(request):
+        recibidos.append(json.loads(request.content)['message'])
+        respuesta = recibidos.respuesta
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        if callable(respuesta):
+            return respuesta()
+        return httpx.Response(respuesta.status_code, headers=respuesta.headers, content=respuesta.content)
+
+    cliente = httpx.AsyncClient(transport=httpx.MockTransport(_responder))
+    sincrono = httpx.Client(transport=httpx.MockTransport(_responder))
+    monkeypatch.setattr(modulo_webhook, '_cliente', lambda: cliente)
+    monkeypatch.setattr(modulo_webhook, '_cliente_sincrono', lambda: sincrono)
+    circuito.reiniciar()
+    cache_respuestas.limpiar()
+    buffer_mensajes.limpiar()
+    yield recibidos
+    circuito.reiniciar()
+    cache_respuestas.limpiar()
+    buffer_mensajes.limpiar()
+
+
+@pytest.fixture
+def webhook_caido(webhook):
+    """Simula que el webhook no está disponible"""
+    webhook.respuesta = httpx.ConnectError('webhook no disponible')
+    return webhook
+
+
+@pytest.mark.django_db
+class TestChatbotView:
+    """Tests para POST /api/chatbot/"""
+
+    def test_respuesta_del_webhook(self, webhook):
+        """Test: La respuesta del webhook se devuelve y se guardan ambos mensajes"""
+        response = APIClient().post('/api/chatbot/', {'message': 'hola'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        datos = response.json()
+        assert datos['response'] == 'Respuesta del bot'
+        assert webhook == ['hola']
+        buffer_mensajes.vaciar()
+        conversacion = ConversacionChat.objects.get(session_id=datos['session_id'])
+        assert list(conversacion.mensajes.values_list('tipo', 'mensaje')) == [
+            ('user', 'hola'), ('bot', 'Respuesta del bot')
+        ]
+
+    def test_respuesta_local_si_el_webhook_falla(self, webhook_caido):
+        """Test: Sin webhook se responde con la respuesta local"""
+        response = APIClient().post('/api/chatbot/', {'message': 'info de inventario'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'Inventario' in response.json()['response']
+        buffer_mensajes.vaciar()
+        assert MensajeChat.objects.filter(tipo='bot').count() == 1
+
+    def test_error_http_usa_respuesta_local(self, webhook):
+        """Test: Un status distinto de 200 del webhook usa la respuesta local"""
+        webhook.respuesta = httpx.Response(500)
+        response = APIClient().post('/api/chatbot/', {'message': 'hola'}, format='json')
+        assert response.json()['response'].startswith('¡Hola!')
+
+    def test_misma_sesion_misma_conversacion(self, webhook):
+        """Test: Los mensajes con el mismo session_id comparten conversación"""
+        client = APIClient()
+        client.post('/api/chatbot/', {'message': 'uno', 'session_id': 's-1'}, format='json')
+        client.post('/api/chatbot/', {'message': 'dos', 'session_id': 's-1'}, format='json')
+
+        assert ConversacionChat.objects.count() == 1
+        buffer_mensajes.vaciar()
+        assert MensajeChat.objects.count() == 4
+
+    def test_usuario_autenticado_queda_en_la_conversacion(self, webhook, user_externo):
+        """Test: La conversación se asocia al usuario del token"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user_externo).access_token}')
+        response = client.post('/api/chatbot/', {'message': 'hola'}, format='json')
+
+        conversacion = ConversacionChat.objects.get(session_id=response.json()['session_id'])
+        assert conversacion.usuario_id == user_externo.id
+
+    def test_token_invalido(self, webhook):
+        """Test: Un token inválido devuelve 401 como en el resto de la API"""
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Bearer token-invalido')
+        response = client.post('/api/chatbot/', {'message': 'hola'}, format='json')
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_mensaje_requerido(self, webhook):
+        """Test: Sin mensaje devuelve 400 con el error del campo"""
+        response = APIClient().post('/api/chatbot/', {}, format='json')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert 'message' in response.json()
+        assert webhook == []
+
+    def test_circuito_abierto_responde_sin_llamar_al_webhook(self, webhook_caido):
+        """Test: Tras los fallos consecutivos se usa el fallback sin esperar al webhook"""
+        client = APIClient()
+        for _ in range(circuito.umbral_fallos):
+            client.post('/api/chatbot/', {'message': 'hola'}, format='json')
+        assert len(webhook_caido) == circuito.umbral_fallos
+        assert metrics.CHATBOT_CIRCUITO._valores[()] == 2
+
+        response = client.post('/api/chatbot/', {'message': 'hola'}, format='json')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()['response'].startswith('¡Hola!')
+        assert len(webhook_caido) == circuito.umbral_fallos
+
+
+
+@pytest.mark.django_db
+class TestClienteWebhook:
+    """Tests del ciclo de vida de los clientes HTTP del webhook"""
+
+    def test_wsgi_reutiliza_el_cliente_del_proceso(self, monkeypatch):
+        """Test: Bajo WSGI todos los requests usan el mismo httpx.Client"""
+        transporte = httpx.MockTransport(lambda request: httpx.Response(200, json={'response': 'ok'}))
+        monkeypatch.setattr(modulo_webhook, '_opciones_cliente', lambda: {'transport': transporte})
+        modulo_webhook.cerrar_cliente_sincrono()
+        circuito.reiniciar()
+        cache_respuestas.limpiar()
+        try:
+            client = APIClient()
+            client.post('/api/chatbot/', {'message': 'uno', 'cache': False}, format='json')
+            cliente = modulo_webhook._cliente_del_proceso
+            client.post('/api/chatbot/', {'message': 'dos', 'cache': False}, format='json')
+
+            assert cliente is not None and not cliente.is_closed
+            assert modulo_webhook._cliente_del_proceso is cliente
+            assert not modulo_webhook._clientes
+        finally:
+            modulo_webhook.cerrar_cliente_sincrono()
+            buffer_mensajes.limpiar()
+        assert cliente.is_closed
+
+    def test_lifespan_cierra_el_cliente_al_apagar(self):
+        """Test: El apagado ASGI (lifespan.shutdown) cierra el cliente del loop"""
+        from config.asgi import application
+
+        async def _ciclo():
+            cliente = modulo_webhook._cliente()
+            eventos = asyncio.Queue()
+            for tipo in ('lifespan.startup', 'lifespan.shutdown'):
+                eventos.put_nowait({'type': tipo})
+            enviados = []
+
+            async def _enviar(mensaje):
+                enviados.append(mensaje['type'])
+
+            await application({'type': 'lifespan'}, eventos.get, _enviar)
+            return cliente, enviados
+
+        cliente, enviados = asyncio.run(_ciclo())
+        assert enviados == ['lifespan.startup.complete', 'lifespan.shutdown.complete']
+        assert cliente.is_closed
+
+
+class TestCancelacionDelWebhook:
+    """Una consulta cancelada (cliente desconectado) solo cuenta como fallo si es la prueba"""
+
+    @pytest.fixture(autouse=True)
+    def webhook_colgado(self, monkeypatch):
+        async def _colgado(request):
+            await asyncio.sleep(60)
+
+        cliente = httpx.AsyncClient(transport=httpx.MockTransport(_colgado))
+        monkeypatch.setattr(modulo_webhook, '_cliente', lambda: cliente)
+        circuito.reiniciar()
+        yield
+        circuito.reiniciar()
+
+    def _cancelar(self):
+        async def _consultar_y_cancelar():
+            tarea = asyncio.ensure_future(aconsultar_webhook('hola'))
+            await asyncio.sleep(0.01)
+            tarea.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await tarea
+
+        asyncio.run(_consultar_y_cancelar())
+
+    def test_circuito_cerrado_no_cuenta_el_fallo(self):
+        """Test: Cancelar con el circuito cerrado no suma fallos"""
+        for _ in range(circuito.umbral_fallos):
+            self._cancelar()
+        assert circuito.estado == CERRADO
+        assert circuito._fallos == 0
+
+    def test_prueba_cancelada_reabre_el_circuito(self, monkeypatch):
+        """Test: Cancelar la llamada de prueba del circuito semiabierto lo vuelve a abrir"""
+        for _ in range(circuito.umbral_fallos):
+            circuito.registrar_fallo()
+        monkeypatch.setattr(circuito, 'tiempo_apertura', 0)
+        self._cancelar()
+        assert circuito.estado == ABIERTO
+
+@pytest.mark.django_db
+class TestChatbotCache:
+    """Tests de la caché de respuestas en POST /api/chatbot/"""
+
+    def test_pregunta_repetida_no_llama_al_webhook(self, webhook):
+        """Test: Una pregunta equivalente se responde desde la caché y se guarda en el historial"""
+        client = APIClient()
+        client.post('/api/chatbot/', {'message': '¿Qué productos hay?', 'session_id': 's-1'}, format='json')
+        hits = metrics.CHATBOT_CACHE._valores.get(('hit',), 0)
+
+        response = client.post('/api/chatbot/', {'message': 'que productos hay', 'session_id': 's-1'}, format='json')
+
+        assert response.json()['response'] == 'Respuesta del bot'
+        assert webhook == ['¿Qué productos hay?']
+        assert metrics.CHATBOT_CACHE._valores[('hit',)] == hits + 1
+        buffer_mensajes.vaciar()
+        assert list(MensajeChat.objects.values_list('tipo', flat=True)) == ['user', 'bot', 'user', 'bot']
+
+    def test_bypass_consulta_el_webhook(self, webhook):
+        """Test: "cache": false o Cache-Control: no-cache consultan el webhook"""
+        client = APIClient()
+        client.post('/api/chatbot/', {'message': 'hola'}, format='json')
+        client.post('/api/chatbot/', {'message': 'hola', 'cache': False}, format='json')
+        client.post('/api/chatbot/', {'message': 'hola'}, format='json', HTTP_CACHE_CONTROL='no-cache')
+        assert webhook == ['hola', 'hola', 'hola']
+
+    def test_respuesta_local_no_se_cachea(self, webhook_caido):
+        """Test: Las respuestas locales no se cachean (el webhook se reintenta)"""
+        client = APIClient()
+        client.post('/api/chatbot/', {'message': 'hola'}, format='json')
+        client.post('/api/chatbot/', {'message': 'hola'}, format='json')
+        assert len(webhook_caido) == 2
+
+
+class _Chunks(httpx.SyncByteStream, httpx.AsyncByteStream):
+    """Cuerpo en chunks que sirve tanto al cliente síncrono como al asíncrono"""
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+
+    def __iter__(self):
+        yield from self.chunks
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            yield chunk
+
+
+def _en_streaming(*lineas, tipo='application/x-ndjson'):
+    """Respuesta del webhook que envía cada línea como un chunk"""
+    chunks = [linea.encode() + b'\n' for linea in lineas]
+    return lambda: httpx.Response(200, headers={'Content-Type': tipo}, stream=_Chunks(chunks))
+
+
+def _leer_eventos(response):
+    """Eventos SSE de la respuesta como lista de (evento, datos)"""
+    eventos = []
+    if response.is_async:
+        async def _leer():
+            return b''.join([chunk async for chunk in response.streaming_content])
+        cuerpo = async_to_sync(_leer)()
+    else:
+        cuerpo = b''.join(response.streaming_content)
+    for bloque in cuerpo.decode().strip().split('\n\n'):
+        evento, datos = bloque.split('\n')
+        eventos.append((evento.removeprefix('event: '), json.loads(datos.removeprefix('data: '))))
+    return eventos
+
+
+@pytest.mark.django_db
+class TestChatbotStreaming:
+    """Tests para POST /api/chatbot/ con Server-Sent Events"""
+
+    def _enviar(self, mensaje='hola'):
+        return APIClient().post(
+            '/api/chatbot/', {'message': mensaje, 'session_id': 's-1'},
+            format='json', HTTP_ACCEPT='text/event-stream', HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+    def test_reenvia_los_fragmentos_del_webhook(self, webhook):
+        """Test: Cada fragmento de n8n es un evento delta y el mensaje completo se guarda al final"""
+        webhook.respuesta = _en_streaming(
+            '{"type": "begin"}',
+            '{"type": "item", "content": "Hola, "}',
+            '{"type": "item", "content": "¿en qué te ayudo?"}',
+            '{"type": "end"}',
+        )
+        response = self._enviar()
+
+        assert response['Content-Type'] == 'text/event-stream'
+        assert 'Content-Encoding' not in response
+        assert _leer_eventos(response) == [
+            ('delta', {'text': 'Hola, '}),
+            ('delta', {'text': '¿en qué te ayudo?'}),
+            ('done', {'session_id': 's-1', 'response': 'Hola, ¿en qué te ayudo?', 'success': True}),
+        ]
+        buffer_mensajes.vaciar()
+        assert MensajeChat.objects.get(tipo='bot').mensaje == 'Hola, ¿en qué te ayudo?'
+
+    def test_webhook_con_server_sent_events(self, webhook):
+        """Test: Un webhook que responde con SSE también se reenvía por fragmentos"""
+        webhook.respuesta = _en_streaming(
+            'data: {"delta": "uno "}', '', 'data: dos', '', 'data: [DONE]', '',
+            tipo='text/event-stream'
+        )
+        eventos = _leer_eventos(self._enviar())
+        assert [datos for evento, datos in eventos if evento == 'delta'] == [{'text': 'uno '}, {'text': 'dos'}]
+        assert eventos[-1][1]['response'] == 'uno dos'
+
+    def test_webhook_sin_streaming_un_solo_evento(self, webhook):
+        """Test: Si el webhook responde de una vez se envía solo el evento done"""
+        eventos = _leer_eventos(self._enviar())
+        assert eventos == [('done', {'session_id': 's-1', 'response': 'Respuesta del bot', 'success': True})]
+
+    def test_webhook_caido_usa_respuesta_local(self, webhook_caido):
+        """Test: Sin webhook el evento done trae la respuesta local"""
+        eventos = _leer_eventos(self._enviar('info de inventario'))
+        assert len(eventos) == 1
+        assert 'Inventario' in eventos[0][1]['response']
+        buffer_mensajes.vaciar()
+        assert MensajeChat.objects.filter(tipo='bot').count() == 1
+
+    def test_wsgi_envia_los_eventos_con_un_iterador_sincrono(self, webhook):
+        """Test: Bajo WSGI el stream es síncrono (Django no lo acumula)"""
+        response = self._enviar()
+        assert response.streaming and not response.is_async
+
+    def test_asgi_envia_los_eventos_con_un_iterador_asincrono(self, webhook):
+        """Test: Bajo ASGI el stream es asíncrono y reenvía los mismos fragmentos"""
+        webhook.respuesta = _en_streaming(
+            '{"type": "item", "content": "Hola, "}', '{"type": "item", "content": "mundo"}'
+        )
+        response = async_to_sync(AsyncClient().post)(
+            '/api/chatbot/', {'message': 'hola', 'session_id': 's-1'},
+            content_type='application/json', headers={'Accept': 'text/event-stream'}
+        )
+
+        assert response.is_async
+        assert _leer_eventos(response) == [
+            ('delta', {'text': 'Hola, '}),
+            ('delta', {'text': 'mundo'}),
+            ('done', {'session_id': 's-1', 'response': 'Hola, mundo', 'success': True}),
+        ]
+
+    def test_error_a_mitad_del_stream_cierra_con_evento_de_error(self, webhook, monkeypatch):
+        """Test: Un error tras los primeros eventos termina el stream con un evento error"""
+        webhook.respuesta = _en_streaming('{"type": "item", "content": "Hola"}')
+
+        def _falla(*args, **kwargs):
+            raise RuntimeError('se cayó la base')
+
+        monkeypatch.setattr('apps.chatbot.api.views.guardar_mensajes', _falla)
+        eventos = _leer_eventos(self._enviar())
+        assert eventos == [
+            ('delta', {'text': 'Hola'}),
+            ('error', {'detail': 'La respuesta se interrumpió'}),
+        ]
@@ -0,0 +1,84 @@
+"""
+Tests de la caché de respuestas del chatbot
+"""
+from apps.chatbot.cache import CacheRespuestas, identificadores, normalizar
+
+
+class Reloj:
+    """Reloj controlable para probar el TTL"""
+
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+class TestNormalizar:
+    """Tests para la normalización de preguntas"""
+
+    def test_quita_tildes_signos_y_mayusculas(self):
+        """Test: Tildes, signos y mayúsculas no distinguen preguntas"""
+        assert normalizar('¿Cómo  veo el INVENTARIO?') == 'como veo el inventario'
+
+    def test_conserva_la_enie(self):
+        """Test: La ñ no se confunde con la n"""
+        assert normalizar('Compañía') == 'compañia'
+
+    def test_identificadores(self):
+        """Test: Códigos, números y nombres propios identifican la pregunta"""
+        assert identificadores('¿Cuántas unidades de PROD-001 tiene Alfa?') == {'prod', '001', 'alfa'}
+        assert identificadores('Qué productos hay') == frozenset()
+
+
+class TestCacheRespuestas:
+    """Tests para CacheRespuestas"""
+
+    def test_misma_pregunta_normalizada(self):
+        """Test: Una pregunta con otra puntuación usa la misma entrada"""
+        cache = CacheRespuestas()
+        cache.guardar('¿Qué productos hay?', 'respuesta')
+        assert cache.obtener('que productos hay') == 'respuesta'
+
+    def test_pregunta_similar(self):
+        """Test: Las palabras significativas en otro orden reutilizan la respuesta"""
+        cache = CacheRespuestas(umbral_similitud=0.8)
+        cache.guardar('cómo veo el inventario de productos', 'respuesta')
+        assert cache.obtener('inventario de productos, cómo lo veo') == 'respuesta'
+        assert cache.obtener('cómo veo el inventario') is None
+
+    def test_ttl(self):
+        """Test: Las entradas vencidas no se devuelven"""
+        reloj = Reloj()
+        cache = CacheRespuestas(ttl=10, reloj=reloj)
+        cache.guardar('hola', 'respuesta')
+        reloj.ahora = 10
+        assert cache.obtener('hola') is None
+        assert len(cache) == 0
+
+    def test_desaloja_la_menos_usada(self):
+        """Test: Al llenarse se desaloja la entrada usada hace más tiempo"""
+        cache = CacheRespuestas(max_entradas=2)
+        cache.guardar('uno', '1')
+        cache.guardar('dos', '2')
+        cache.obtener('uno')
+        cache.guardar('tres', '3')
+        assert cache.obtener('dos') is None
+        assert cache.obtener('uno') == '1'
+        assert cache.obtener('tres') == '3'
+
+    def test_similar_no_cruza_identificadores(self):
+        """Test: Preguntas parecidas sobre otra entidad no comparten respuesta"""
+        cache = CacheRespuestas(umbral_similitud=0.5)
+        cache.guardar('cuántas unidades quedan del producto PROD-001 en la bodega', '001')
+        cache.guardar('dame el teléfono de contacto de la empresa Alfa', 'alfa')
+        assert cache.obtener('cuántas unidades quedan del producto PROD-002 en la bodega') is None
+        assert cache.obtener('dame el teléfono de contacto de la empresa Beta') is None
+        assert cache.obtener('en la bodega cuántas unidades quedan del producto PROD-001') == '001'
+
+    def test_exacta(self):
+        """Test: Con exacta=True una pregunta solo similar no usa la caché"""
+        cache = CacheRespuestas(umbral_similitud=0.8)
+        cache.guardar('cómo veo el inventario de productos', 'respuesta')
+        assert cache.obtener('inventario de productos, cómo lo veo', exacta=True) is None
+        assert cache.obtener('¿Cómo veo el inventario de productos?', exacta=True) == 'respuesta'
@@ -0,0 +1,130 @@
+"""
+Tests de las respuestas del chatbot con datos del sistema
+"""
+import httpx
+import pytest
+from rest_framework.test import APIClient
+
+from apps.chatbot import webhook as modulo_webhook
+from apps.chatbot.cache import cache_respuestas
+from apps.chatbot.consultas import indice_entidades, responder_con_datos
+from apps.chatbot.models import MensajeChat
+from apps.chatbot.persistencia import buffer_mensajes
+from apps.chatbot.webhook import circuito
+from apps.empresas.models import Empresa
+from apps.inventario.models import Inventario
+from apps.productos.models import Producto, PrecioProducto
+
+
+@pytest.fixture
+def datos(db):
+    """Empresa con dos productos, precios e inventario"""
+    indice_entidades.invalidar()
+    acme = Empresa.objects.create(
+        nit='900123456-1', nombre='Acme Andina', direccion='Calle 10 #20-30', telefono='6011234567'
+    )
+    silla = Producto.objects.create(codigo='SIL-001', nombre='Silla Ergonómica', empresa=acme)
+    mesa = Producto.objects.create(codigo='MES-002', nombre='Mesa de Juntas', empresa=acme)
+    PrecioProducto.objects.create(producto=silla, moneda='COP', precio=1250000)
+    PrecioProducto.objects.create(producto=silla, moneda='USD', precio=310.5)
+    Inventario.objects.create(empresa=acme, producto=silla, cantidad=1500, ubicacion='Bodega')
+    Inventario.objects.create(empresa=acme, producto=mesa, cantidad=0, ubicacion='Bodega')
+    yield acme
+    indice_entidades.invalidar()
+
+
+class TestResponderConDatos:
+    """Tests para responder_con_datos"""
+
+    def test_stock_de_empresa_por_nombre(self, datos):
+        """Test: La empresa se reconoce por su nombre sin tildes ni mayúsculas"""
+        respuesta = responder_con_datos('¿Cuánto stock tiene ACME andina?')
+        assert respuesta == (
+            'Acme Andina (NIT 900123456-1) tiene 1.500 unidades en 2 registro(s) '
+            'de inventario; 1 sin stock.'
+        )
+
+    def test_empresa_por_nit_sin_digito_de_verificacion(self, datos):
+        """Test: El NIT con o sin dígito de verificación identifica a la empresa"""
+        assert responder_con_datos('productos de la empresa 900123456') == (
+            'Acme Andina (NIT 900123456-1) tiene 2 producto(s): Mesa de Juntas, Silla Ergonómica.'
+        )
+        assert 'Calle 10' in responder_con_datos('dirección del NIT 900123456-1')
+
+    def test_precio_de_producto_por_codigo(self, datos):
+        """Test: El producto se reconoce por su código"""
+        assert responder_con_datos('¿cuánto cuesta el sil-001?') == (
+            'El producto Silla Ergonómica (SIL-001) cuesta 1.250.000,00 COP, 310,50 USD.'
+        )
+
+    def test_stock_de_producto_por_nombre(self, datos):
+        """Test: Un producto mencionado por nombre responde su stock"""
+        assert responder_con_datos('existencias de la silla ergonomica') == (
+            'Del producto Silla Ergonómica (SIL-001) hay 1.500 unidades en 1 registro(s) de inventario.'
+        )
+
+    def test_sin_entidad_o_sin_consulta(self, datos):
+        """Test: Sin entidad conocida o sin tipo de consulta no hay respuesta con datos"""
+        assert responder_con_datos('¿cómo veo el inventario?') is None
+        assert responder_con_datos('hola Acme Andina') is None
+
+    def test_indice_se_invalida_al_crear_una_empresa(self, datos):
+        """Test: Una empresa nueva se reconoce sin esperar el TTL del índice"""
+        assert responder_con_datos('stock de Globex') is None
+        Empresa.objects.create(nit='800999888-2', nombre='Globex', direccion='D', telefono='1')
+        assert responder_con_datos('stock de Globex').startswith('Globex (NIT 800999888-2) no tiene')
+
+
+@pytest.mark.django_db
+def test_el_chatbot_responde_sin_llamar_al_webhook(datos, monkeypatch):
+    """Test: Una consulta de datos se responde localmente y queda en el historial"""
+    llamadas = []
+
+    def _responder(request):
+        llamadas.append(request)
+        return httpx.Response(200, json={'response': 'webhook'})
+
+    cliente = httpx.AsyncClient(transport=httpx.MockTransport(_responder))
+    sincrono = httpx.Client(transport=httpx.MockTransport(_responder))
+    monkeypatch.setattr(modulo_webhook, '_cliente', lambda: cliente)
+    monkeypatch.setattr(modulo_webhook, '_cliente_sincrono', lambda: sincrono)
+    circuito.reiniciar()
+
+    response = APIClient().post('/api/chatbot/', {'message': 'stock de Acme Andina'}, format='json')
+
+    assert response.json()['response'].startswith('Acme Andina (NIT 900123456-1) tiene 1.500')
+    assert llamadas == []
+    buffer_mensajes.vaciar()
+    assert list(MensajeChat.objects.values_list('tipo', flat=True)) == ['user', 'bot']
+
+
+@pytest.mark.django_db
+def test_la_cache_no_mezcla_consultas_de_datos(monkeypatch, settings):
+    """Test: Una consulta de datos sobre otro producto no usa la respuesta cacheada"""
+    settings.CHATBOT_DATA_ANSWERS = False
+    settings.CHATBOT_CACHE_ENABLED = True
+    monkeypatch.setattr(cache_respuestas, 'umbral_similitud', 0.5)
+    consultas = []
+
+    def _responder(request):
+        consultas.append(request)
+        return httpx.Response(200, json={'response': f'webhook {len(consultas)}'})
+
+    cliente = httpx.AsyncClient(transport=httpx.MockTransport(_responder))
+    sincrono = httpx.Client(transport=httpx.MockTransport(_responder))
+    monkeypatch.setattr(modulo_webhook, '_cliente', lambda: cliente)
+    monkeypatch.setattr(modulo_webhook, '_cliente_sincrono', lambda: sincrono)
+    circuito.reiniciar()
+    cache_respuestas.limpiar()
+    client = APIClient()
+    try:
+        primera = client.post('/api/chatbot/', {'message': 'stock de prod 001'}, format='json')
+        segunda = client.post('/api/chatbot/', {'message': 'stock del prod 002'}, format='json')
+        repetida = client.post('/api/chatbot/', {'message': '¿Stock de PROD 001?'}, format='json')
+    finally:
+        cache_respuestas.limpiar()
+        buffer_mensajes.limpiar()
+
+    assert primera.json()['response'] == 'webhook 1'
+    assert segunda.json()['response'] == 'webhook 2'
+    assert repetida.json()['response'] == 'webhook 1'
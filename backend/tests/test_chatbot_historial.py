@@ -0,0 +1,133 @@
+"""
+Tests del historial paginado y del listado de conversaciones del chatbot
+"""
+from datetime import timedelta, timezone as dt_timezone
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.chatbot.models import ConversacionChat, MensajeChat
+
+
+@pytest.fixture
+def conversacion(db, user_externo):
+    """Conversación con 10 mensajes separados por un segundo"""
+    conversacion = ConversacionChat.objects.create(session_id='sesion-larga', usuario=user_externo)
+    inicio = timezone.now() - timedelta(hours=1)
+    for i in range(10):
+        mensaje = MensajeChat.objects.create(
+            conversacion=conversacion, tipo='user' if i % 2 == 0 else 'bot', mensaje=f'mensaje {i}'
+        )
+        MensajeChat.objects.filter(pk=mensaje.pk).update(timestamp=inicio + timedelta(seconds=i))
+    return conversacion
+
+
+def _textos(response):
+    return [m['mensaje'] for m in response.data['mensajes']]
+
+
+class TestHistorialPaginado:
+    """Tests para HistorialChatView con cursores"""
+
+    url = '/api/chatbot/historial/sesion-larga/'
+
+    def test_por_defecto_devuelve_los_ultimos_mensajes(self, conversacion, settings):
+        """Test: Sin cursor se devuelven los últimos N mensajes en orden cronológico"""
+        settings.CHATBOT_HISTORY_PAGE_SIZE = 4
+        response = APIClient().get(self.url)
+        assert response.status_code == 200
+        assert response.data['session_id'] == 'sesion-larga'
+        assert _textos(response) == ['mensaje 6', 'mensaje 7', 'mensaje 8', 'mensaje 9']
+        assert response.data['hay_mas'] is True
+
+    def test_recorrer_hacia_atras_con_before(self, conversacion):
+        """Test: El cursor before recorre todo el historial sin repetir mensajes"""
+        client = APIClient()
+        response = client.get(self.url, {'limit': 4})
+        vistos = _textos(response)
+        while response.data['hay_mas']:
+            response = client.get(self.url, {'limit': 4, 'before': response.data['cursores']['before']})
+            vistos = _textos(response) + vistos
+        assert vistos == [f'mensaje {i}' for i in range(10)]
+
+    def test_after_devuelve_los_mensajes_siguientes(self, conversacion):
+        """Test: El cursor after devuelve los mensajes posteriores"""
+        client = APIClient()
+        cuarto = client.get(self.url).data['mensajes'][3]
+        primera = client.get(self.url, {'limit': 3, 'before': cuarto['timestamp']})
+        assert _textos(primera) == ['mensaje 0', 'mensaje 1', 'mensaje 2']
+        assert primera.data['hay_mas'] is False
+
+        siguiente = client.get(self.url, {'limit': 3, 'after': primera.data['cursores']['after']})
+        assert _textos(siguiente) == ['mensaje 3', 'mensaje 4', 'mensaje 5']
+        assert siguiente.data['hay_mas'] is True
+
+    def test_mensajes_con_el_mismo_timestamp(self, conversacion):
+        """Test: El id desempata el cursor y no se saltan mensajes del mismo instante"""
+        MensajeChat.objects.filter(conversacion=conversacion).update(timestamp=timezone.now())
+        client = APIClient()
+        response = client.get(self.url, {'limit': 3})
+        vistos = _textos(response)
+        while response.data['hay_mas']:
+            response = client.get(self.url, {'limit': 3, 'before': response.data['cursores']['before']})
+            vistos = _textos(response) + vistos
+        assert vistos == [f'mensaje {i}' for i in range(10)]
+
+        assert _textos(response) == ['mensaje 0']
+        siguiente = client.get(self.url, {'limit': 4, 'after': response.data['cursores']['after']})
+        assert _textos(siguiente) == ['mensaje 1', 'mensaje 2', 'mensaje 3', 'mensaje 4']
+
+    def test_cursor_con_zona_horaria_sin_codificar(self, conversacion):
+        """Test: Un '+' de la zona horaria que llega como espacio se interpreta bien"""
+        ultimo = MensajeChat.objects.filter(conversacion=conversacion).order_by('-timestamp')[0]
+        cursor = ultimo.timestamp.astimezone(dt_timezone.utc).isoformat().replace('+', ' ')
+        response = APIClient().get(f'{self.url}?limit=2&before={cursor}')
+        assert _textos(response) == ['mensaje 7', 'mensaje 8']
+
+    def test_parametros_invalidos(self, conversacion):
+        """Test: Un cursor o un límite inválido responde 400"""
+        client = APIClient()
+        assert client.get(self.url, {'before': 'ayer'}).status_code == 400
+        assert client.get(self.url, {'after': '2025-01-01T00:00:00Z,x'}).status_code == 400
+        assert client.get(self.url, {'limit': 0}).status_code == 400
+
+    def test_limite_maximo(self, conversacion, settings):
+        """Test: limit no supera CHATBOT_HISTORY_MAX_PAGE_SIZE"""
+        settings.CHATBOT_HISTORY_MAX_PAGE_SIZE = 5
+        assert len(APIClient().get(self.url, {'limit': 1000}).data['mensajes']) == 5
+
+    def test_conversacion_inexistente(self, db):
+        """Test: Una sesión inexistente responde 404"""
+        assert APIClient().get('/api/chatbot/historial/no-existe/').status_code == 404
+
+
+class TestListadoConversaciones:
+    """Tests para ConversacionViewSet"""
+
+    def test_listado_devuelve_resumenes(self, conversacion, user_externo):
+        """Test: El listado trae cantidad de mensajes y último mensaje, sin los mensajes"""
+        ConversacionChat.objects.create(session_id='vacia', usuario=user_externo)
+        client = APIClient()
+        client.force_authenticate(user=user_externo)
+        response = client.get('/api/conversaciones/')
+        assert response.status_code == 200
+        resumenes = {c['session_id']: c for c in response.data}
+        assert 'mensajes' not in resumenes['sesion-larga']
+        assert resumenes['sesion-larga']['total_mensajes'] == 10
+        assert resumenes['sesion-larga']['ultimo_mensaje']['mensaje'] == 'mensaje 9'
+        assert resumenes['sesion-larga']['ultimo_mensaje']['tipo'] == 'bot'
+        assert resumenes['vacia']['total_mensajes'] == 0
+        assert resumenes['vacia']['ultimo_mensaje'] is None
+
+    def test_listado_con_mensajes_y_detalle(self, conversacion, user_externo):
+        """Test: ?mensajes=true y el detalle incluyen todos los mensajes en orden"""
+        client = APIClient()
+        client.force_authenticate(user=user_externo)
+        esperados = [f'mensaje {i}' for i in range(10)]
+
+        listado = client.get('/api/conversaciones/', {'mensajes': 'true'})
+        assert [m['mensaje'] for m in listado.data[0]['mensajes']] == esperados
+
+        detalle = client.get(f'/api/conversaciones/{conversacion.id}/')
+        assert [m['mensaje'] for m in detalle.data['mensajes']] == esperados
@@ -0,0 +1,153 @@
+"""
+Tests del write-behind de mensajes del chatbot
+"""
+from datetime import timedelta
+
+import httpx
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.chatbot import webhook as modulo_webhook
+from apps.chatbot.cache import cache_respuestas
+from apps.chatbot.models import ConversacionChat, MensajeChat
+from apps.chatbot.persistencia import BufferMensajes, buffer_mensajes
+from apps.chatbot.webhook import circuito
+from apps.monitoring import metrics
+
+
+class _Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def conversacion(db):
+    return ConversacionChat.objects.create(session_id='s-1')
+
+
+@pytest.fixture
+def webhook(monkeypatch):
+    transporte = httpx.MockTransport(
+        lambda request: httpx.Response(200, json={'response': 'Respuesta del bot'})
+    )
+    cliente = httpx.AsyncClient(transport=transporte)
+    sincrono = httpx.Client(transport=transporte)
+    monkeypatch.setattr(modulo_webhook, '_cliente', lambda: cliente)
+    monkeypatch.setattr(modulo_webhook, '_cliente_sincrono', lambda: sincrono)
+    circuito.reiniciar()
+    cache_respuestas.limpiar()
+    buffer_mensajes.limpiar()
+    yield
+    cache_respuestas.limpiar()
+    buffer_mensajes.limpiar()
+
+
+def _mensaje(conversacion, texto='hola'):
+    return MensajeChat(conversacion=conversacion, tipo='user', mensaje=texto)
+
+
+class TestBufferMensajes:
+    """Tests para BufferMensajes"""
+
+    def test_vacia_al_llegar_al_tamano(self, conversacion):
+        """Test: agregar indica vaciar al llegar a max_mensajes y vaciar escribe todo junto"""
+        buffer = BufferMensajes(max_mensajes=3, intervalo=60, reloj=_Reloj())
+        assert buffer.agregar([_mensaje(conversacion), _mensaje(conversacion)]) is False
+        assert buffer.agregar([_mensaje(conversacion)]) is True
+        assert MensajeChat.objects.count() == 0
+
+        assert buffer.vaciar() == 3
+        assert len(buffer) == 0
+        assert MensajeChat.objects.count() == 3
+
+    def test_vacia_por_antiguedad(self, conversacion):
+        """Test: Pasado el intervalo desde el primer pendiente hay que vaciar"""
+        reloj = _Reloj()
+        buffer = BufferMensajes(max_mensajes=100, intervalo=2, reloj=reloj)
+        assert buffer.agregar([_mensaje(conversacion)]) is False
+        reloj.ahora = 2.5
+        assert buffer.agregar([_mensaje(conversacion)]) is True
+
+    def test_conserva_el_timestamp_de_llegada(self, conversacion):
+        """Test: El timestamp guardado es el de creación del mensaje, no el de la escritura"""
+        buffer = BufferMensajes()
+        mensaje = _mensaje(conversacion)
+        mensaje.timestamp = timezone.now() - timedelta(minutes=5)
+        buffer.agregar([mensaje])
+        buffer.vaciar()
+        assert MensajeChat.objects.get().timestamp == mensaje.timestamp
+
+    def test_un_mensaje_invalido_no_descarta_el_lote(self, conversacion):
+        """Test: Si el lote falla se guardan de a uno y solo se descarta el inválido"""
+        buffer = BufferMensajes()
+        invalido = MensajeChat(conversacion=conversacion, tipo='user', mensaje=None)
+        descartados = metrics.CHATBOT_BUFFER_ESCRITOS._valores.get(('descartado',), 0)
+        buffer.agregar([_mensaje(conversacion, 'uno'), invalido, _mensaje(conversacion, 'dos')])
+
+        assert buffer.vaciar() == 2
+        assert list(MensajeChat.objects.values_list('mensaje', flat=True)) == ['uno', 'dos']
+        assert metrics.CHATBOT_BUFFER_ESCRITOS._valores[('descartado',)] == descartados + 1
+
+    def test_vaciado_programado_en_un_hilo(self, transactional_db):
+        """Test: programar vacía el buffer desde un timer al vencer el intervalo"""
+        # El vaciado corre en el hilo del timer: la conversación debe estar confirmada
+        buffer = BufferMensajes(intervalo=0.01)
+        buffer.agregar([_mensaje(ConversacionChat.objects.create(session_id='s-1'))])
+
+        buffer.programar()
+        timer = buffer._programado
+        buffer.programar()
+        assert buffer._programado is timer
+
+        timer.join(timeout=5)
+        assert len(buffer) == 0
+        assert MensajeChat.objects.count() == 1
+
+
+@pytest.mark.django_db
+class TestChatbotWriteBehind:
+    """Tests de la persistencia de mensajes en POST /api/chatbot/"""
+
+    @pytest.fixture
+    def write_behind(self, settings):
+        settings.CHATBOT_WRITE_BEHIND = True
+
+    def test_los_mensajes_quedan_en_el_buffer(self, webhook, write_behind):
+        """Test: La pregunta y la respuesta se agregan al buffer sin escribir"""
+        APIClient().post('/api/chatbot/', {'message': 'hola', 'session_id': 's-1'}, format='json')
+        assert len(buffer_mensajes) == 2
+        assert MensajeChat.objects.count() == 0
+
+    def test_el_historial_incluye_los_pendientes(self, webhook, write_behind):
+        """Test: El historial de la sesión vacía el buffer antes de leer"""
+        client = APIClient()
+        client.post('/api/chatbot/', {'message': 'hola', 'session_id': 's-1'}, format='json')
+        response = client.get('/api/chatbot/historial/s-1/')
+        assert [m['tipo'] for m in response.data['mensajes']] == ['user', 'bot']
+        assert len(buffer_mensajes) == 0
+
+    def test_persistencia_sincrona_por_defecto(self, webhook):
+        """Test: Sin CHATBOT_WRITE_BEHIND pregunta y respuesta se guardan al responder"""
+        APIClient().post('/api/chatbot/', {'message': 'hola', 'session_id': 's-1'}, format='json')
+        assert len(buffer_mensajes) == 0
+        assert list(MensajeChat.objects.order_by('timestamp').values_list('tipo', 'mensaje')) == [
+            ('user', 'hola'), ('bot', 'Respuesta del bot')
+        ]
+
+
+class TestVaciadoPorTiempo:
+    """El vaciado por tiempo no depende de que llegue otro mensaje"""
+
+    def test_wsgi_vacia_sin_otro_request(self, transactional_db, webhook, monkeypatch, settings):
+        """Test: Tras responder bajo WSGI los mensajes se escriben al vencer el intervalo"""
+        settings.CHATBOT_WRITE_BEHIND = True
+        monkeypatch.setattr(buffer_mensajes, 'intervalo', 0.05)
+        APIClient().post('/api/chatbot/', {'message': 'hola', 'session_id': 's-1'}, format='json')
+
+        buffer_mensajes._programado.join(timeout=5)
+        assert len(buffer_mensajes) == 0
+        assert MensajeChat.objects.count() == 2
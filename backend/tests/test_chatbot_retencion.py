@@ -0,0 +1,140 @@
+"""
+Tests de la retención del historial del chatbot
+"""
+import gzip
+import json
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError
+from django.utils import timezone
+
+from apps.chatbot.models import ConversacionChat, MensajeChat
+from apps.chatbot.retencion import compactar_conversacion, resumir
+
+
+def _conversacion(session_id, textos, hace):
+    """Conversación con un mensaje por texto, el último de hace ``hace``"""
+    conversacion = ConversacionChat.objects.create(session_id=session_id)
+    ConversacionChat.objects.filter(pk=conversacion.pk).update(created_at=timezone.now() - hace)
+    inicio = timezone.now() - hace - timedelta(seconds=len(textos))
+    for i, texto in enumerate(textos):
+        mensaje = MensajeChat.objects.create(
+            conversacion=conversacion, tipo='user' if i % 2 == 0 else 'bot', mensaje=texto
+        )
+        MensajeChat.objects.filter(pk=mensaje.pk).update(timestamp=inicio + timedelta(seconds=i + 1))
+    return conversacion
+
+
+@pytest.mark.django_db
+class TestSessionIdUnico:
+    """Tests del índice único de session_id"""
+
+    def test_session_id_duplicado_falla(self):
+        """Test: No se pueden crear dos conversaciones con el mismo session_id"""
+        ConversacionChat.objects.create(session_id='abc')
+        with pytest.raises(IntegrityError):
+            ConversacionChat.objects.create(session_id='abc')
+
+
+@pytest.mark.django_db
+class TestArchivarConversaciones:
+    """Tests del comando archivar_conversaciones"""
+
+    def test_archiva_y_elimina_las_inactivas(self, tmp_path):
+        """Test: Las conversaciones inactivas van al JSONL comprimido y se borran; las activas quedan"""
+        vieja = _conversacion('vieja', ['hola', 'buenas'], hace=timedelta(days=120))
+        _conversacion('vacia', [], hace=timedelta(days=200))
+        _conversacion('reciente', ['hola'], hace=timedelta(days=1))
+
+        salida = StringIO()
+        call_command('archivar_conversaciones', dias=90, lote=1, directorio=str(tmp_path), stdout=salida)
+
+        assert list(ConversacionChat.objects.values_list('session_id', flat=True)) == ['reciente']
+        assert MensajeChat.objects.count() == 1
+        archivos = list(tmp_path.glob('*.jsonl.gz'))
+        assert len(archivos) == 1
+        with gzip.open(archivos[0], 'rt', encoding='utf-8') as archivo:
+            lineas = [json.loads(linea) for linea in archivo]
+        assert [linea['session_id'] for linea in lineas] == ['vieja', 'vacia']
+        assert lineas[0]['id'] == vieja.id
+        assert [m['mensaje'] for m in lineas[0]['mensajes']] == ['hola', 'buenas']
+        assert lineas[1]['mensajes'] == []
+        assert 'Se archivaron 2 conversaciones (2 mensajes)' in salida.getvalue()
+
+    def test_no_borra_la_que_recibe_un_mensaje_durante_el_lote(self, tmp_path, monkeypatch):
+        """Test: Una conversación que vuelve a estar activa antes del bloqueo no se archiva ni se borra"""
+        revivida = _conversacion('revivida', ['hola'], hace=timedelta(days=120))
+        _conversacion('vieja', ['hola'], hace=timedelta(days=120))
+        bloquear = ConversacionChat.objects.select_for_update
+
+        def _llega_un_mensaje():
+            MensajeChat.objects.create(conversacion=revivida, tipo='user', mensaje='sigo aquí')
+            return bloquear()
+
+        monkeypatch.setattr(ConversacionChat.objects, 'select_for_update', _llega_un_mensaje)
+        call_command('archivar_conversaciones', dias=90, directorio=str(tmp_path), stdout=StringIO())
+
+        assert list(ConversacionChat.objects.values_list('session_id', flat=True)) == ['revivida']
+        assert MensajeChat.objects.filter(conversacion=revivida).count() == 2
+        with gzip.open(next(tmp_path.glob('*.jsonl.gz')), 'rt', encoding='utf-8') as archivo:
+            assert [json.loads(linea)['session_id'] for linea in archivo] == ['vieja']
+
+    def test_simular_no_borra(self, tmp_path):
+        """Test: --simular cuenta sin escribir ni borrar"""
+        _conversacion('vieja', ['hola'], hace=timedelta(days=120))
+        salida = StringIO()
+        call_command('archivar_conversaciones', simular=True, directorio=str(tmp_path), stdout=salida)
+        assert ConversacionChat.objects.count() == 1
+        assert not list(tmp_path.iterdir())
+        assert 'Se archivarían 1 conversaciones (1 mensajes)' in salida.getvalue()
+
+
+@pytest.mark.django_db
+class TestCompactarConversaciones:
+    """Tests de la compactación de sesiones largas"""
+
+    def test_resume_los_mensajes_mas_antiguos(self):
+        """Test: Al superar el máximo se conserva la mitad más reciente y el resto se resume"""
+        textos = [
+            f'¿cuánto stock hay en la bodega {i}?' if i % 2 == 0 else f'respuesta {i}'
+            for i in range(12)
+        ]
+        conversacion = _conversacion('larga', textos, hace=timedelta(minutes=5))
+
+        assert compactar_conversacion(conversacion.id, maximo=10) == 7
+
+        mensajes = list(conversacion.mensajes.order_by('timestamp', 'id'))
+        assert [m.tipo for m in mensajes[:1]] == ['resumen']
+        assert [m.mensaje for m in mensajes[1:]] == textos[7:]
+        resumen = mensajes[0].mensaje
+        assert resumen.startswith('Resumen de 7 mensajes anteriores')
+        assert 'Temas: inventario (4)' in resumen
+        assert '«¿cuánto stock hay en la bodega 6?»' in resumen
+
+    def test_no_compacta_bajo_el_maximo_ni_resume_resumenes(self):
+        """Test: Bajo el máximo no cambia nada y los resúmenes previos no cuentan"""
+        conversacion = _conversacion('corta', [f'm{i}' for i in range(12)], hace=timedelta(minutes=5))
+        assert compactar_conversacion(conversacion.id, maximo=20) == 0
+        assert compactar_conversacion(conversacion.id, maximo=10) == 7
+        assert compactar_conversacion(conversacion.id, maximo=10) == 0
+        assert conversacion.mensajes.filter(tipo='resumen').count() == 1
+
+    def test_comando(self):
+        """Test: El comando compacta solo las sesiones que superan el máximo"""
+        _conversacion('larga', [f'm{i}' for i in range(8)], hace=timedelta(minutes=5))
+        _conversacion('corta', ['m0', 'm1'], hace=timedelta(minutes=5))
+        salida = StringIO()
+        call_command('compactar_conversaciones', max_mensajes=4, stdout=salida)
+        assert 'Se resumieron 6 mensajes de 1 conversaciones' in salida.getvalue()
+        assert MensajeChat.objects.filter(conversacion__session_id='corta').count() == 2
+
+    def test_resumir_sin_preguntas(self):
+        """Test: Un resumen sin preguntas del usuario solo indica el rango"""
+        ahora = timezone.now()
+        assert resumir([('bot', 'hola', ahora)]) == (
+            f'Resumen de 1 mensajes anteriores ({timezone.localtime(ahora).date()} '
+            f'a {timezone.localtime(ahora).date()}).'
+        )
@@ -0,0 +1,80 @@
+"""
+Tests del circuit breaker
+"""
+from infrastructure.circuit_breaker import CircuitBreaker, CERRADO, SEMIABIERTO, ABIERTO
+
+
+class Reloj:
+    """Reloj controlable para simular el paso del tiempo"""
+
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+def _circuito(reloj, cambios=None):
+    return CircuitBreaker(
+        umbral_fallos=3, tiempo_apertura=10, reloj=reloj,
+        al_cambiar=cambios.append if cambios is not None else None
+    )
+
+
+class TestCircuitBreaker:
+    """Tests de las transiciones del circuit breaker"""
+
+    def test_se_abre_tras_fallos_consecutivos(self):
+        """Test: El circuito se abre al llegar al umbral de fallos"""
+        circuito = _circuito(Reloj())
+        for _ in range(2):
+            assert circuito.permite()
+            circuito.registrar_fallo()
+        assert circuito.estado == CERRADO
+
+        circuito.registrar_fallo()
+        assert circuito.estado == ABIERTO
+        assert not circuito.permite()
+
+    def test_exito_reinicia_el_conteo(self):
+        """Test: Un éxito entre fallos evita que el circuito se abra"""
+        circuito = _circuito(Reloj())
+        circuito.registrar_fallo()
+        circuito.registrar_fallo()
+        circuito.registrar_exito()
+        circuito.registrar_fallo()
+        assert circuito.estado == CERRADO
+
+    def test_prueba_semiabierta_exitosa_cierra(self):
+        """Test: Pasado el tiempo de apertura una sola prueba decide"""
+        reloj = Reloj()
+        cambios = []
+        circuito = _circuito(reloj, cambios)
+        for _ in range(3):
+            circuito.registrar_fallo()
+
+        reloj.ahora = 10
+        assert circuito.permite()
+        assert circuito.estado == SEMIABIERTO
+        assert not circuito.permite()
+
+        circuito.registrar_exito()
+        assert circuito.estado == CERRADO
+        assert cambios == [ABIERTO, SEMIABIERTO, CERRADO]
+
+    def test_prueba_semiabierta_fallida_reabre(self):
+        """Test: Si la prueba falla el circuito vuelve a abrirse por otro periodo"""
+        reloj = Reloj()
+        circuito = _circuito(reloj)
+        for _ in range(3):
+            circuito.registrar_fallo()
+
+        reloj.ahora = 10
+        assert circuito.permite()
+        circuito.registrar_fallo()
+
+        assert circuito.estado == ABIERTO
+        reloj.ahora = 15
+        assert not circuito.permite()
+        reloj.ahora = 20
+        assert circuito.permite()
@@ -0,0 +1,151 @@
+"""
+Tests de compresión negociada y listados en streaming
+"""
+import gzip
+import json
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+
+from domain.models import Empresa, Producto, PrecioProducto, Inventario
+from infrastructure.compression import elegir_codificacion
+from infrastructure.renderers import FastJSONRenderer
+from infrastructure.streaming import ERROR_EN_STREAM, json_array_stream
+
+
+@pytest.fixture
+def catalogo(db):
+    """Catálogo con suficientes filas para superar el umbral de compresión"""
+    empresa = Empresa.objects.create(
+        nit='900123456-7', nombre='Tech Solutions S.A.S',
+        direccion='Calle 123 #45-67', telefono='+57 300 123 4567'
+    )
+    for i in range(30):
+        producto = Producto.objects.create(
+            codigo=f'P{i:03d}', nombre=f'Producto {i}',
+            caracteristicas='Características del producto', empresa=empresa
+        )
+        PrecioProducto.objects.create(producto=producto, moneda='COP', precio=1000 + i)
+        Inventario.objects.create(empresa=empresa, producto=producto, cantidad=i)
+    return empresa
+
+
+class TestNegociacion:
+    """Tests de la elección de codificación"""
+
+    def test_gzip_aceptado(self):
+        """Test: gzip se elige si el cliente lo acepta"""
+        assert elegir_codificacion('gzip, deflate') == 'gzip'
+
+    def test_q_cero_excluye(self):
+        """Test: q=0 excluye la codificación"""
+        assert elegir_codificacion('gzip;q=0, identity') is None
+
+    def test_comodin(self):
+        """Test: el comodín acepta cualquier codificación disponible"""
+        assert elegir_codificacion('*') is not None
+
+    def test_sin_cabecera(self):
+        """Test: sin Accept-Encoding no se comprime"""
+        assert elegir_codificacion('') is None
+
+
+@pytest.mark.django_db
+class TestCompressionMiddleware:
+    """Tests del middleware de compresión"""
+
+    def test_respuesta_grande_se_comprime(self, catalogo):
+        """Test: Un listado grande se envía comprimido con gzip"""
+        response = APIClient().get(
+            '/api/inventario/?stream=false', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert len(json.loads(gzip.decompress(response.content))) == 30
+
+    def test_respuesta_pequena_no_se_comprime(self, catalogo, settings):
+        """Test: Por debajo del umbral la respuesta va sin comprimir"""
+        settings.COMPRESSION_MIN_SIZE = 10 ** 6
+        response = APIClient().get(
+            '/api/inventario/?stream=false', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        assert 'Content-Encoding' not in response
+
+    def test_streaming_se_comprime_por_chunks(self, catalogo):
+        """Test: Los listados en streaming se comprimen sin acumular el cuerpo"""
+        response = APIClient().get('/api/productos/', HTTP_ACCEPT_ENCODING='gzip')
+        assert response.streaming
+        assert response['Content-Encoding'] == 'gzip'
+        cuerpo = gzip.decompress(b''.join(response.streaming_content))
+        assert len(json.loads(cuerpo)) == 30
+
+
+@pytest.mark.django_db
+class TestStreamingJSON:
+    """Tests de los listados en streaming"""
+
+    @pytest.mark.parametrize('tamano_lote', [1, 7, 500])
+    def test_stream_igual_al_render_completo(self, tamano_lote):
+        """Test: El array por lotes es idéntico al render de la lista completa"""
+        filas = [{'id': i, 'nombre': f'Fila {i}'} for i in range(20)]
+        stream = b''.join(json_array_stream(iter(filas), tamano_lote))
+        assert stream == FastJSONRenderer().render(filas)
+
+    def test_stream_vacio(self):
+        """Test: Sin filas se emite un array vacío"""
+        assert b''.join(json_array_stream(iter([]))) == b'[]'
+
+    def test_error_a_mitad_del_stream_deja_el_json_invalido(self):
+        """Test: Si falla un lote posterior al primero el cuerpo termina con el marcador de error"""
+        def _filas():
+            yield {'id': 1}
+            raise RuntimeError('se cayó la base')
+
+        cuerpo = b''.join(json_array_stream(_filas(), tamano_lote=1))
+        assert cuerpo == b'[{"id":1}' + ERROR_EN_STREAM
+        with pytest.raises(ValueError):
+            json.loads(cuerpo)
+
+    def test_error_en_el_primer_lote_llega_a_la_vista(self, monkeypatch):
+        """Test: Un error al consultar las filas responde 500 sin empezar el stream"""
+        def _falla(self):
+            raise RuntimeError('se cayó la base')
+            yield
+
+        monkeypatch.setattr('application.use_cases.ProductoUseCases.iterar_filas', _falla)
+        response = APIClient().get('/api/productos/')
+        assert response.status_code == 500
+        assert not response.streaming
+        assert response.json() == {'error': 'se cayó la base'}
+
+    def test_wsgi_usa_iterador_sincrono(self, catalogo):
+        """Test: Bajo WSGI el cuerpo es un iterador síncrono (Django no lo acumula)"""
+        response = APIClient().get('/api/productos/')
+        assert response.streaming and not response.is_async
+
+    def test_asgi_usa_iterador_asincrono(self, catalogo):
+        """Test: Bajo ASGI el cuerpo es un iterador asíncrono con los mismos datos"""
+        async def _pedir():
+            response = await AsyncClient().get('/api/productos/')
+            return response, b''.join([bloque async for bloque in response.streaming_content])
+
+        response, cuerpo = async_to_sync(_pedir)()
+        assert response.is_async
+        assert len(json.loads(cuerpo)) == 30
+
+    @pytest.mark.parametrize('url', ['/api/productos/', '/api/inventario/', '/api/blockchain/'])
+    def test_listado_streaming_igual_al_normal(self, catalogo, url):
+        """Test: El listado en streaming devuelve los mismos datos"""
+        client = APIClient()
+        response = client.get(url)
+        assert response.streaming
+        normal = client.get(url + '?stream=false')
+        assert not normal.streaming
+        assert json.loads(b''.join(response.streaming_content)) == json.loads(normal.content)
+
+    def test_api_navegable_no_usa_streaming(self, catalogo):
+        """Test: La API navegable sigue renderizando HTML"""
+        response = APIClient().get('/api/productos/', HTTP_ACCEPT='text/html')
+        assert not response.streaming
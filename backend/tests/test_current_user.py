@@ -0,0 +1,73 @@
+"""
+Tests del contexto de usuario actual (CurrentUserMiddleware)
+"""
+import asyncio
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.blockchain.middleware import CurrentUserMiddleware, get_current_user
+from apps.blockchain.models import RegistroBlockchain
+from apps.users.models import User
+
+
+def _request(email):
+    request = RequestFactory().get('/')
+    request.user = User(email=email)
+    return request
+
+
+class TestCurrentUserMiddleware:
+    """Tests del usuario actual en modo síncrono y asíncrono"""
+
+    def test_se_limpia_al_terminar(self):
+        """Test: Después del request no queda usuario en el contexto"""
+        vistos = []
+
+        def vista(request):
+            vistos.append(get_current_user())
+            return HttpResponse()
+
+        CurrentUserMiddleware(vista)(_request('a@test.com'))
+
+        assert vistos[0].email == 'a@test.com'
+        assert get_current_user() is None
+
+    def test_requests_concurrentes_no_se_mezclan(self):
+        """Test: Requests asíncronos intercalados ven cada uno su usuario"""
+        vistos = {}
+
+        async def vista(request):
+            for _ in range(5):
+                await asyncio.sleep(0)
+                vistos.setdefault(request.user.email, set()).add(get_current_user().email)
+            return HttpResponse()
+
+        middleware = CurrentUserMiddleware(vista)
+
+        async def concurrentes():
+            await asyncio.gather(*(
+                middleware(_request(f'usuario{i}@test.com')) for i in range(10)
+            ))
+
+        asyncio.run(concurrentes())
+
+        assert len(vistos) == 10
+        assert all(emails == {email} for email, emails in vistos.items())
+
+
+@pytest.mark.django_db
+def test_asgi_atribuye_bloques_al_usuario(user_admin, empresa_data):
+    """Test: Bajo ASGI los bloques llevan el email del usuario del token"""
+    token = RefreshToken.for_user(user_admin).access_token
+    response = async_to_sync(AsyncClient().post)(
+        '/api/empresas/', empresa_data, content_type='application/json',
+        headers={'Authorization': f'Bearer {token}'}
+    )
+
+    assert response.status_code == 201
+    assert RegistroBlockchain.objects.get(tipo='empresa_creada').usuario == 'admin@test.com'
+    assert get_current_user() is None
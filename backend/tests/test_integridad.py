@@ -0,0 +1,115 @@
+"""
+Tests de la validación de escrituras internas y de la unicidad por restricciones
+"""
+import pytest
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError
+
+from application.use_cases import EmpresaUseCases, InventarioUseCases, ProductoUseCases
+from application.use_cases.integridad import es_violacion_de_unicidad, unicidad
+from apps.empresas.models import Empresa
+from apps.inventario.models import Inventario
+from apps.productos.models import PrecioProducto, Producto
+from domain.exceptions import DuplicateEntityException, EntityNotFoundException, ValidationException
+
+
+@pytest.fixture
+def empresa(db):
+    return Empresa.objects.create(nit='900-1', nombre='Empresa', direccion='Calle', telefono='300')
+
+
+@pytest.mark.django_db
+class TestValidar:
+    """Tests de ValidacionDominio.validar"""
+
+    def test_no_consulta_la_base_de_datos(self, empresa, django_assert_num_queries):
+        """Test: validar revisa campos y reglas sin consultar llaves foráneas ni unicidad"""
+        producto = Producto(codigo='P-1', nombre='Producto', empresa_id=empresa.nit)
+        inventario = Inventario(empresa_id=empresa.nit, producto_id=999, cantidad=1)
+        with django_assert_num_queries(0):
+            producto.validar()
+            inventario.validar()
+
+    def test_reglas_de_negocio_y_campos(self, empresa):
+        """Test: validar aplica clean() y los validadores de los campos"""
+        with pytest.raises(ValidationError) as error:
+            Producto(codigo='P-1', nombre='  ', empresa_id=empresa.nit).save()
+        assert 'nombre' in error.value.message_dict
+
+        with pytest.raises(ValidationError) as error:
+            Empresa(nit='900-2', nombre='x' * 201, direccion='Calle', telefono='300').validar()
+        assert 'nombre' in error.value.message_dict
+
+
+@pytest.mark.django_db
+class TestUnicidad:
+    """Tests de la traducción de violaciones de unicidad"""
+
+    def test_duplicado_como_excepcion_de_dominio(self, empresa):
+        """Test: La violación de unicidad llega como DuplicateEntityException y la transacción sigue usable"""
+        with pytest.raises(DuplicateEntityException) as error:
+            with unicidad('Producto', 'P-1'):
+                Producto.objects.create(codigo='P-1', nombre='Uno', empresa=empresa)
+                Producto.objects.create(codigo='P-1', nombre='Dos', empresa=empresa)
+        assert error.value.details == {'entity': 'Producto', 'identifier': 'P-1'}
+        # El savepoint deshizo el bloque completo
+        assert Producto.objects.count() == 0
+
+    def test_otros_errores_de_integridad_no_se_traducen(self, empresa):
+        """Test: Un NOT NULL violado sigue siendo IntegrityError"""
+        with pytest.raises(IntegrityError) as error:
+            with unicidad('Empresa', empresa.nit):
+                Empresa.objects.filter(nit=empresa.nit).update(nombre=None)
+        assert not es_violacion_de_unicidad(error.value)
+
+
+@pytest.mark.django_db
+class TestCreacion:
+    """Tests de las altas por restricción (sin verificar antes de insertar)"""
+
+    def test_empresa_duplicada(self, empresa):
+        """Test: Un NIT existente se rechaza con DuplicateEntityException"""
+        with pytest.raises(DuplicateEntityException):
+            EmpresaUseCases().crear_empresa('900-1', 'Otra', 'Calle', '300')
+
+    def test_producto_con_precios(self, empresa, django_assert_num_queries):
+        """Test: El producto y sus precios se crean sin leer la empresa completa"""
+        with django_assert_num_queries(7):
+            # empresa, savepoint, producto, bloque (último + alta), precios, release
+            producto = ProductoUseCases().crear_producto(
+                'P-1', 'Producto', '', '900-1',
+                precios=[{'moneda': 'COP', 'precio': 1000}, {'moneda': 'USD', 'precio': 2}]
+            )
+        assert producto.empresa_nombre == 'Empresa'
+        assert [(p.moneda, p.precio) for p in producto.precios] == [('COP', 1000.0), ('USD', 2.0)]
+        assert PrecioProducto.objects.filter(producto_id=producto.id).count() == 2
+
+    def test_producto_errores(self, empresa):
+        """Test: Empresa inexistente, código repetido y monedas repetidas"""
+        casos = ProductoUseCases()
+        with pytest.raises(EntityNotFoundException):
+            casos.crear_producto('P-1', 'Producto', '', 'no-existe')
+        casos.crear_producto('P-1', 'Producto', '', '900-1')
+        with pytest.raises(DuplicateEntityException):
+            casos.crear_producto('P-1', 'Otro', '', '900-1')
+        with pytest.raises(ValidationException):
+            casos.crear_producto('P-2', 'Otro', '', '900-1',
+                                 precios=[{'moneda': 'COP', 'precio': 1}, {'moneda': 'COP', 'precio': 2}])
+        assert Producto.objects.count() == 1
+
+    def test_registro_de_inventario(self, empresa):
+        """Test: crear_registro resuelve empresa y producto en una consulta y rechaza duplicados"""
+        Producto.objects.create(codigo='P-1', nombre='Producto', empresa=empresa)
+        casos = InventarioUseCases()
+        with pytest.raises(EntityNotFoundException, match='Empresa'):
+            casos.crear_registro('no-existe', 'P-1', 1)
+        with pytest.raises(EntityNotFoundException, match='Producto'):
+            casos.crear_registro('900-1', 'no-existe', 1)
+
+        registro = casos.crear_registro('900-1', 'P-1', 3, ' Bodega ')
+        assert (registro.empresa_nombre, registro.producto, registro.producto_nombre) == (
+            'Empresa', 'P-1', 'Producto'
+        )
+        assert Inventario.objects.get().ubicacion == 'Bodega'
+        with pytest.raises(DuplicateEntityException):
+            casos.crear_registro('900-1', 'P-1', 1)
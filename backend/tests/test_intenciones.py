@@ -0,0 +1,77 @@
+"""
+Tests del motor de intenciones del chatbot
+"""
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from apps.chatbot.intenciones import Intencion, MotorIntenciones, motor
+from apps.chatbot.respuestas import respuesta_local
+
+
+@pytest.fixture
+def motor_simple():
+    return MotorIntenciones(
+        [
+            Intencion('saludo', 'hola!', ('hola', 'buenos'), peso=0.5),
+            Intencion('productos', 'productos', ('producto*', 'catálogo')),
+            Intencion('inventario', 'inventario', ('stock', 'buenos dias de stock')),
+        ],
+        por_defecto='no entiendo',
+        max_respuestas=2,
+    )
+
+
+class TestMotorIntenciones:
+    """Tests para MotorIntenciones"""
+
+    def test_sin_tildes_ni_mayusculas(self, motor_simple):
+        """Test: Las palabras coinciden sin importar tildes ni mayúsculas"""
+        assert motor_simple.responder('Ver el CATALOGO') == 'productos'
+        assert motor_simple.responder('ver el catálogo') == 'productos'
+
+    def test_palabra_completa(self, motor_simple):
+        """Test: Una palabra clave no coincide dentro de otra palabra"""
+        assert motor_simple.responder('restock') == 'no entiendo'
+        assert motor_simple.responder('chola') == 'no entiendo'
+
+    def test_comodin(self, motor_simple):
+        """Test: producto* acepta plurales y otras terminaciones"""
+        assert motor_simple.responder('¿qué productos hay?') == 'productos'
+
+    def test_la_intencion_con_mas_puntaje_gana(self, motor_simple):
+        """Test: Un saludo pesa menos que una consulta concreta"""
+        assert motor_simple.responder('hola, ¿cuánto stock hay?') == 'inventario'
+
+    def test_empate_responde_ambas_intenciones(self, motor_simple):
+        """Test: Con varias intenciones empatadas se responden en orden"""
+        assert motor_simple.responder('stock de productos') == 'productos\n\ninventario'
+
+    def test_frase_mas_larga_primero(self, motor_simple):
+        """Test: Una frase clave gana sobre una palabra que es su prefijo"""
+        clasificacion = motor_simple.clasificar('buenos dias de stock')
+        assert [(i.nombre, puntaje) for i, puntaje in clasificacion] == [('inventario', 1.0)]
+
+    def test_archivo_invalido(self, tmp_path):
+        """Test: Un archivo de intenciones mal formado es un error de configuración"""
+        ruta = tmp_path / 'intenciones.json'
+        ruta.write_text('{"intenciones": []}')
+        with pytest.raises(ImproperlyConfigured):
+            MotorIntenciones.desde_archivo(ruta)
+
+
+class TestRespuestaLocal:
+    """Tests de las respuestas locales con el archivo del proyecto"""
+
+    def test_archivo_del_proyecto(self):
+        """Test: El archivo configurado carga todas las intenciones"""
+        assert {i.nombre for i in motor().intenciones} >= {
+            'saludo', 'empresas', 'productos', 'inventario', 'blockchain', 'usuarios'
+        }
+
+    def test_respuestas(self):
+        """Test: Mensajes habituales llegan a la intención esperada"""
+        assert respuesta_local('Hola').startswith('¡Hola!')
+        assert 'Empresas' in respuesta_local('¿Cómo registro una compañía con su NIT?')
+        assert 'Inventario' in respuesta_local('Buenas, necesito el reporte de inventario')
+        assert respuesta_local('Adiós').startswith('¡Hasta pronto!')
+        assert respuesta_local('xyz').startswith('Entiendo tu consulta')
@@ -0,0 +1,63 @@
+"""
+Tests de la ruta rápida de listados (filas livianas).
+
+Verifican que las filas de values_list producen exactamente la misma
+salida que el camino DTO + Serializer(many=True) que reemplazan.
+"""
+import pytest
+
+from application.use_cases import EmpresaUseCases, InventarioUseCases, ProductoUseCases
+from apps.empresas.api.serializers import EmpresaListOutputSerializer
+from apps.inventario.api.serializers import InventarioListOutputSerializer
+from apps.productos.api.serializers import ProductoListOutputSerializer
+from apps.empresas.models import Empresa
+from apps.productos.models import Producto, PrecioProducto
+from apps.inventario.models import Inventario
+
+
+@pytest.fixture
+def catalogo(db):
+    """Dos empresas con productos, precios e inventario"""
+    for n in range(2):
+        empresa = Empresa.objects.create(
+            nit=f'800{n}-1', nombre=f'Empresa {n}', direccion='Calle', telefono='300'
+        )
+        for i in range(3):
+            producto = Producto.objects.create(
+                codigo=f'{n}-P{i}', nombre=f'Producto {i}', caracteristicas='', empresa=empresa
+            )
+            PrecioProducto.objects.create(producto=producto, moneda='USD', precio='12.50')
+            if i:
+                PrecioProducto.objects.create(producto=producto, moneda='COP', precio=50000)
+                Inventario.objects.create(empresa=empresa, producto=producto, cantidad=i)
+    return '8001-1'
+
+
+@pytest.mark.django_db
+class TestListadosRapidos:
+    """Tests de equivalencia entre filas livianas y serializers"""
+
+    def test_inventario_igual_al_serializer(self, catalogo):
+        use_cases = InventarioUseCases()
+        for nit in (None, catalogo):
+            dtos = use_cases.listar_inventario() if nit is None else use_cases.listar_por_empresa(nit)
+            esperado = InventarioListOutputSerializer([d.to_dict() for d in dtos], many=True).data
+            assert [f.to_dict() for f in use_cases.listar_filas(nit)] == esperado
+
+    def test_productos_igual_al_serializer(self, catalogo):
+        use_cases = ProductoUseCases()
+        for nit in (None, catalogo):
+            dtos = use_cases.listar_productos() if nit is None else use_cases.listar_por_empresa(nit)
+            esperado = ProductoListOutputSerializer([d.to_dict() for d in dtos], many=True).data
+            assert [f.to_dict() for f in use_cases.listar_filas(nit)] == esperado
+
+    def test_empresas_igual_al_serializer(self, catalogo):
+        use_cases = EmpresaUseCases()
+        esperado = EmpresaListOutputSerializer(
+            [e.to_dict() for e in use_cases.listar_empresas()], many=True
+        ).data
+        assert [f.to_dict() for f in use_cases.listar_filas()] == esperado
+
+    def test_filas_no_tienen_dict_por_instancia(self, catalogo):
+        fila = InventarioUseCases().listar_filas()[0]
+        assert not hasattr(fila, '__dict__')
@@ -0,0 +1,144 @@
+"""
+Tests del endpoint /metrics y la agregación de métricas entre procesos.
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.monitoring import metrics
+
+
+def _valor(texto, linea_inicio):
+    """Valor numérico de la primera línea que empieza con linea_inicio"""
+    for linea in texto.splitlines():
+        if linea.startswith(linea_inicio):
+            return float(linea.rsplit(' ', 1)[1])
+    return None
+
+
+@pytest.fixture(autouse=True)
+def metricas_activas(settings):
+    """/metrics está desactivado por defecto"""
+    settings.METRICS_ENABLED = True
+
+
+@pytest.mark.django_db
+class TestMetrics:
+    """Tests para /metrics"""
+
+    def test_metrics_desactivado_por_defecto(self, settings):
+        """Test: Sin METRICS_ENABLED el endpoint no existe"""
+        settings.METRICS_ENABLED = False
+        assert APIClient().get('/metrics').status_code == status.HTTP_404_NOT_FOUND
+
+    def test_metrics_expone_requests_por_vista(self, settings):
+        """Test: Los requests a la API aparecen en http_requests_total"""
+        settings.METRICS_DIR = ''
+        client = APIClient()
+        antes = _valor(
+            client.get('/metrics').content.decode(),
+            'http_requests_total{view="empresas-list",method="GET",status="200"}'
+        ) or 0
+
+        client.get('/api/empresas/')
+        response = client.get('/metrics')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+        texto = response.content.decode()
+        assert _valor(
+            texto, 'http_requests_total{view="empresas-list",method="GET",status="200"}'
+        ) == antes + 1
+        assert '# TYPE http_request_duration_seconds histogram' in texto
+        assert 'http_request_duration_seconds_bucket{view="empresas-list",method="GET",le="+Inf"}' in texto
+        assert _valor(texto, 'blockchain_chain_length') == 0
+
+    def test_metrics_con_token(self, settings):
+        """Test: Con METRICS_TOKEN el scrape exige el token"""
+        settings.METRICS_TOKEN = 'token-scrape'
+        client = APIClient()
+        assert client.get('/metrics').status_code == status.HTTP_403_FORBIDDEN
+        response = client.get('/metrics', HTTP_AUTHORIZATION='Bearer token-scrape')
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_agregacion_entre_procesos(self, settings, tmp_path):
+        """Test: El scrape suma los volcados de todos los workers"""
+        settings.METRICS_DIR = str(tmp_path)
+        otro_worker = {
+            'pdf_render_duration_seconds': {
+                'tipo': 'histogram', 'ayuda': 'PDF', 'etiquetas': [],
+                'buckets': list(metrics.PDF_RENDER.buckets),
+                'valores': [[[], [1] + [0] * len(metrics.PDF_RENDER.buckets) + [0.004]]],
+            },
+        }
+        (tmp_path / f'{os.getppid()}-otro.json').write_text(json.dumps(otro_worker))
+
+        metrics.PDF_RENDER.observe(0.2)
+        metrics.PDF_RENDER.observe(0.3)
+        local = metrics.PDF_RENDER._valores[()]
+        texto = metrics.exponer()
+
+        assert _valor(texto, 'pdf_render_duration_seconds_count') == sum(local[:-1]) + 1
+        assert _valor(texto, 'pdf_render_duration_seconds_bucket{le="0.005"}') == local[0] + 1
+        assert any(p.name.startswith(metrics._ID_PROCESO) for p in tmp_path.iterdir())
+
+    def test_gauges_se_combinan_segun_su_modo(self, settings, tmp_path):
+        """Test: Los pendientes del buffer se suman entre workers; el estado del circuito toma el máximo"""
+        settings.METRICS_DIR = str(tmp_path)
+        otro_worker = {
+            'chatbot_message_buffer_pending': {
+                'tipo': 'gauge', 'ayuda': 'Pendientes', 'etiquetas': [], 'modo': 'sum',
+                'valores': [[[], 3]],
+            },
+            'chatbot_webhook_circuit_state': {
+                'tipo': 'gauge', 'ayuda': 'Circuito', 'etiquetas': [], 'modo': 'max',
+                'valores': [[[], 2]],
+            },
+        }
+        (tmp_path / f'{os.getppid()}-otro.json').write_text(json.dumps(otro_worker))
+        metrics.CHATBOT_BUFFER_PENDIENTES.set(4)
+        metrics.CHATBOT_CIRCUITO.set(0)
+        try:
+            texto = metrics.exponer()
+        finally:
+            metrics.CHATBOT_BUFFER_PENDIENTES.set(0)
+
+        assert _valor(texto, 'chatbot_message_buffer_pending') == 7
+        assert _valor(texto, 'chatbot_webhook_circuit_state') == 2
+
+    def test_modo_de_gauge_invalido(self):
+        """Test: Un modo desconocido falla al declarar la métrica"""
+        with pytest.raises(ValueError):
+            metrics.Gauge('gauge_de_prueba', 'Prueba', modo='promedio')
+
+    def test_retira_volcados_de_procesos_terminados(self, settings, tmp_path):
+        """Test: Un worker terminado deja de sumar gauges pero sus contadores no bajan"""
+        settings.METRICS_DIR = str(tmp_path)
+        proceso = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                                 capture_output=True, text=True, check=True)
+        muerto = tmp_path / f'{proceso.stdout.strip()}-muerto.json'
+        muerto.write_text(json.dumps({
+            'chatbot_message_buffer_pending': {
+                'tipo': 'gauge', 'ayuda': 'Pendientes', 'etiquetas': [], 'valores': [[[], 1000]],
+            },
+            'chatbot_cache_requests_total': {
+                'tipo': 'counter', 'ayuda': 'Caché', 'etiquetas': ['resultado'],
+                'valores': [[['hit'], 500]],
+            },
+        }))
+        linea = 'chatbot_cache_requests_total{resultado="hit"}'
+        locales = metrics.CHATBOT_CACHE._valores.get(('hit',), 0)
+
+        texto = metrics.exponer()
+
+        assert (_valor(texto, 'chatbot_message_buffer_pending') or 0) < 1000
+        assert _valor(texto, linea) == locales + 500
+        assert not muerto.exists()
+        assert (tmp_path / metrics.RETIRADOS).exists()
+        # El acumulado se suma una sola vez en los scrapes siguientes
+        assert _valor(metrics.exponer(), linea) == locales + 500
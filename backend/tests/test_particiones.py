@@ -0,0 +1,165 @@
+"""
+Tests del particionamiento por empresa del inventario y por mes de la blockchain.
+
+La poda de particiones se verifica con EXPLAIN sobre las consultas que hacen
+los endpoints; solo corre en PostgreSQL (en SQLite las migraciones no
+particionan nada). Las tablas se particionan con los comandos dentro de la
+transacción de cada test, así que la base de pruebas queda como la dejan
+las migraciones.
+"""
+from io import StringIO
+import json
+from datetime import date, timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.blockchain.models import RegistroBlockchain
+from apps.empresas.models import Empresa
+from apps.inventario.checks import particiones_del_inventario
+from apps.inventario.models import Inventario
+from apps.productos.models import Producto
+from infrastructure import particiones
+
+solo_postgresql = pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='El particionamiento solo existe en PostgreSQL'
+)
+
+TABLA_INVENTARIO = Inventario._meta.db_table
+TABLA_BLOCKCHAIN = RegistroBlockchain._meta.db_table
+
+
+def tablas_del_plan(sql):
+    """Tablas (o particiones) que recorre el plan de ``sql``"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+        plan = cursor.fetchone()[0]
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    tablas, pendientes = set(), [plan[0]['Plan']]
+    while pendientes:
+        nodo = pendientes.pop()
+        if 'Relation Name' in nodo:
+            tablas.add(nodo['Relation Name'])
+        pendientes.extend(nodo.get('Plans', []))
+    return tablas
+
+
+def particiones_recorridas(consultas, tabla):
+    """Particiones de ``tabla`` que recorren las consultas capturadas que la usan"""
+    recorridas = set()
+    for consulta in consultas.captured_queries:
+        if f'"{tabla}"' in consulta['sql']:
+            recorridas |= {t for t in tablas_del_plan(consulta['sql']) if t.startswith(tabla)}
+    return recorridas
+
+
+@pytest.fixture
+def inventario_varias_empresas(db):
+    for numero in range(6):
+        empresa = Empresa.objects.create(
+            nit=f'900-{numero}', nombre=f'Empresa {numero}', direccion='Calle', telefono='300'
+        )
+        producto = Producto.objects.create(codigo=f'P-{numero}', nombre='Producto', empresa=empresa)
+        Inventario.objects.create(empresa=empresa, producto=producto, cantidad=numero)
+
+
+class TestMeses:
+    """Tests de los rangos de las particiones mensuales"""
+
+    def test_meses_incluye_los_extremos(self):
+        """Test: Un mes por partición, cruzando el cambio de año"""
+        assert particiones.meses(date(2025, 11, 15), date(2026, 2, 1)) == [
+            date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1), date(2026, 2, 1)
+        ]
+        assert particiones.sumar_meses(date(2025, 12, 31), 2) == date(2026, 2, 1)
+
+    def test_nombres_y_limites(self):
+        """Test: Los límites de cada partición no se solapan"""
+        assert particiones.particion_mensual('bloques', date(2025, 12, 1)) == (
+            'bloques_202512', "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')"
+        )
+        assert particiones.particiones_hash('inventario', 2) == [
+            ('inventario_h2_0', 'FOR VALUES WITH (MODULUS 2, REMAINDER 0)'),
+            ('inventario_h2_1', 'FOR VALUES WITH (MODULUS 2, REMAINDER 1)'),
+        ]
+
+
+@solo_postgresql
+@pytest.mark.django_db
+class TestInventarioParticionado:
+    """Tests del inventario particionado por hash de la empresa"""
+
+    @pytest.fixture(autouse=True)
+    def particionado(self, db, settings):
+        settings.INVENTARIO_PARTICIONES = 4
+        call_command('particiones_inventario', particiones=4, stdout=StringIO())
+
+    def test_el_comando_particiona(self):
+        """Test: La tabla tiene las particiones pedidas y coincide con la configuración"""
+        assert particiones.esta_particionada(connection, TABLA_INVENTARIO)
+        assert len(particiones.listar_particiones(connection, TABLA_INVENTARIO)) == 4
+        assert particiones_del_inventario(None, databases=['default']) == []
+
+    def test_chequeo_falla_si_cambia_la_configuracion(self, settings):
+        """Test: Cambiar INVENTARIO_PARTICIONES después de migrar es un error de chequeo"""
+        settings.INVENTARIO_PARTICIONES = 8
+        errores = particiones_del_inventario(None, databases=['default'])
+        assert [error.id for error in errores] == ['inventario.E001']
+        assert 'tiene 4 particiones' in errores[0].msg
+
+    def test_por_empresa_recorre_una_particion(self, inventario_varias_empresas):
+        """Test: Filtrar por NIT poda todas las particiones menos la de la empresa"""
+        with CaptureQueriesContext(connection) as consultas:
+            response = APIClient().get('/api/inventario/por_empresa/?nit=900-3')
+        assert response.status_code == 200
+        assert [fila['cantidad'] for fila in response.json()] == [3]
+        assert len(particiones_recorridas(consultas, TABLA_INVENTARIO)) == 1
+
+    def test_reparticionar_conserva_filas_y_secuencia(self, inventario_varias_empresas):
+        """Test: El comando cambia el número de particiones sin perder filas ni ids"""
+        ids = set(Inventario.objects.values_list('id', flat=True))
+        call_command('particiones_inventario', particiones=3, stdout=StringIO())
+        assert len(particiones.listar_particiones(connection, TABLA_INVENTARIO)) == 3
+        assert set(Inventario.objects.values_list('id', flat=True)) == ids
+
+        empresa = Empresa.objects.get(nit='900-0')
+        producto = Producto.objects.create(codigo='P-N', nombre='Nuevo', empresa=empresa)
+        nuevo = Inventario.objects.create(empresa=empresa, producto=producto, cantidad=1)
+        assert nuevo.id > max(ids)
+
+        call_command('particiones_inventario', particiones=0, stdout=StringIO())
+        assert not particiones.esta_particionada(connection, TABLA_INVENTARIO)
+        assert Inventario.objects.count() == len(ids) + 1
+
+
+@pytest.mark.django_db
+def test_por_defecto_el_inventario_no_se_particiona(settings):
+    """Test: Sin INVENTARIO_PARTICIONES la migración deja la tabla como está y el chequeo pasa"""
+    assert settings.INVENTARIO_PARTICIONES == 0
+    assert not particiones.esta_particionada(connection, TABLA_INVENTARIO)
+    assert particiones_del_inventario(None, databases=['default']) == []
+
+
+@solo_postgresql
+@pytest.mark.django_db
+class TestBlockchainParticionada:
+    """Tests del registro de la blockchain particionado por mes"""
+
+    def test_rango_de_fechas_recorre_sus_meses(self):
+        """Test: Un filtro por timestamp solo recorre las particiones de esos meses"""
+        call_command('particiones_blockchain', particionar=True, meses=1)
+        RegistroBlockchain.registrar_transaccion('empresa_creada', {'nit': '1'}, 'sistema')
+        ahora = timezone.now()
+
+        with CaptureQueriesContext(connection) as consultas:
+            list(RegistroBlockchain.objects.filter(
+                timestamp__gte=ahora - timedelta(minutes=5), timestamp__lt=ahora + timedelta(minutes=5)
+            ))
+        recorridas = particiones_recorridas(consultas, TABLA_BLOCKCHAIN)
+        assert recorridas and len(recorridas) <= 2
+        assert f'{TABLA_BLOCKCHAIN}_{particiones.SUFIJO_OTROS}' not in recorridas
+        assert RegistroBlockchain.verificar_integridad()['valido']
@@ -0,0 +1,84 @@
+"""
+Tests del perfilado de requests con cProfile.
+"""
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import HttpResponse
+from django.test import AsyncClient
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from apps.empresas.models import Empresa
+from apps.monitoring.middleware import ProfilingMiddleware
+
+
+@pytest.fixture
+def perfilado(settings, tmp_path):
+    """Activa el perfilado por secreto con un directorio temporal"""
+    settings.PROFILING_SECRET = 'secreto-de-prueba'
+    settings.PROFILING_SAMPLE_RATE = 0
+    settings.PROFILING_DIR = tmp_path
+    return tmp_path
+
+
+@pytest.mark.django_db
+class TestProfiling:
+    """Tests para ProfilingMiddleware y el endpoint de perfiles"""
+
+    def test_request_con_secreto_guarda_perfil(self, perfilado):
+        """Test: Un request con el secreto genera .prof y .json"""
+        Empresa.objects.create(nit='1-1', nombre='E', direccion='D', telefono='T')
+        response = APIClient().get('/api/empresas/', HTTP_X_PROFILE='secreto-de-prueba')
+
+        assert response.status_code == status.HTTP_200_OK
+        perfil_id = response['X-Profile-Id']
+        assert (perfilado / f'{perfil_id}.prof').exists()
+        assert (perfilado / f'{perfil_id}.json').exists()
+
+    def test_perfil_bajo_asgi(self, perfilado):
+        """Test: Bajo ASGI el middleware corre asíncrono y también guarda el perfil"""
+        async def vista(request):
+            return HttpResponse()
+
+        assert iscoroutinefunction(ProfilingMiddleware(vista))
+        response = async_to_sync(AsyncClient().get)(
+            '/api/empresas/', headers={'X-Profile': 'secreto-de-prueba'}
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert (perfilado / f"{response['X-Profile-Id']}.prof").exists()
+
+    def test_request_sin_secreto_no_se_perfila(self, perfilado):
+        """Test: Sin secreto ni muestreo no se guarda nada"""
+        response = APIClient().get('/api/empresas/', HTTP_X_PROFILE='otro')
+        assert 'X-Profile-Id' not in response
+        assert list(perfilado.iterdir()) == []
+
+    def test_agregar_perfiles_por_vista(self, perfilado, user_admin):
+        """Test: El endpoint de admin agrega los perfiles por vista"""
+        client = APIClient()
+        for _ in range(2):
+            client.get('/api/empresas/?_profile=secreto-de-prueba')
+
+        client.force_authenticate(user=user_admin)
+        resumen = client.get('/api/monitoring/perfiles/')
+        assert resumen.status_code == status.HTTP_200_OK
+        assert resumen.data[0]['vista'] == 'empresas-list'
+        assert resumen.data[0]['perfiles'] == 2
+
+        detalle = client.get('/api/monitoring/perfiles/?vista=empresas-list')
+        assert detalle.data['perfiles'] == 2
+        assert 'function calls' in detalle.data['reporte']
+
+    def test_perfiles_requiere_admin(self, perfilado, user_externo):
+        """Test: Usuario externo no puede consultar perfiles"""
+        client = APIClient()
+        client.force_authenticate(user=user_externo)
+        response = client.get('/api/monitoring/perfiles/')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_orden_invalido_es_400(self, perfilado, user_admin):
+        """Test: Un criterio de orden desconocido no llega a pstats"""
+        client = APIClient()
+        client.force_authenticate(user=user_admin)
+        response = client.get('/api/monitoring/perfiles/?vista=empresas-list&orden=inexistente')
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
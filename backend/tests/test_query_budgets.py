@@ -0,0 +1,248 @@
+"""
+Presupuestos de consultas SQL por endpoint.
+
+Cada ruta de la API tiene un número máximo de consultas permitido
+con varios registros en la base de datos, de modo que un N+1
+nuevo (en signals, DTOs o vistas) haga fallar la suite.
+"""
+import pytest
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.http import HttpResponse
+from django.test import AsyncClient
+from django.urls import get_resolver, URLResolver
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from apps.empresas.models import Empresa
+from apps.productos.models import Producto, PrecioProducto
+from apps.inventario.models import Inventario
+from apps.blockchain.models import RegistroBlockchain
+from apps.chatbot.models import ConversacionChat, MensajeChat
+from apps.chatbot.cache import cache_respuestas
+from apps.chatbot.persistencia import buffer_mensajes
+from apps.chatbot.webhook import circuito
+from apps.monitoring.middleware import QueryCountMiddleware
+
+# Rutas excluidas del presupuesto
+RUTAS_EXCLUIDAS = {'admin'}
+
+# (nombre de ruta, método, url, autenticación, payload, presupuesto)
+CASOS = [
+    ('token_obtain_pair', 'post', lambda d: '/api/auth/login/', None,
+     lambda d: {'email': 'admin@test.com', 'password': 'testpass123'}, 1),
+    ('token_refresh', 'post', lambda d: '/api/auth/refresh/', None,
+     lambda d: {'refresh': d['refresh']}, 1),
+    ('user_me', 'get', lambda d: '/api/auth/me/', 'admin', None, 1),
+    ('user_register', 'post', lambda d: '/api/auth/register/', None,
+     lambda d: {'email': 'nuevo@test.com', 'password': 'clave-segura-123',
+                'password_confirm': 'clave-segura-123'}, 4),
+    ('users-list', 'get', lambda d: '/api/users/', 'admin', None, 2),
+    ('users-list', 'post', lambda d: '/api/users/', 'admin',
+     lambda d: {'email': 'otro@test.com', 'password': 'clave-segura-123', 'role': 'externo'}, 5),
+    ('users-detail', 'get', lambda d: f"/api/users/{d['externo'].id}/", 'admin', None, 2),
+    ('users-detail', 'patch', lambda d: f"/api/users/{d['externo'].id}/", 'admin',
+     lambda d: {'first_name': 'Nombre'}, 3),
+    ('users-detail', 'delete', lambda d: f"/api/users/{d['externo'].id}/", 'admin', None, 9),
+    ('api-root', 'get', lambda d: '/api/', 'admin', None, 1),
+    ('empresas-list', 'get', lambda d: '/api/empresas/', None, None, 1),
+    ('empresas-list', 'post', lambda d: '/api/empresas/', 'admin',
+     lambda d: {'nit': '555-1', 'nombre': 'Nueva', 'direccion': 'Calle 1', 'telefono': '300'}, 6),
+    ('empresas-detail', 'get', lambda d: f"/api/empresas/{d['empresa'].nit}/", None, None, 1),
+    ('empresas-detail', 'patch', lambda d: f"/api/empresas/{d['empresa'].nit}/", 'admin',
+     lambda d: {'nombre': 'Renombrada'}, 5),
+    ('empresas-detail', 'delete', lambda d: f"/api/empresas/{d['empresa'].nit}/", 'admin', None, 29),
+    ('productos-list', 'get', lambda d: '/api/productos/', None, None, 2),
+    ('productos-list', 'post', lambda d: '/api/productos/', 'admin',
+     lambda d: {'codigo': 'NEW-1', 'nombre': 'Nuevo', 'empresa': d['empresa'].nit,
+                'precios': [{'moneda': 'COP', 'precio': 1000}]}, 8),
+    ('productos-por-empresa', 'get',
+     lambda d: f"/api/productos/por_empresa/?nit={d['empresa'].nit}", None, None, 2),
+    ('productos-detail', 'get', lambda d: f"/api/productos/{d['producto'].id}/", None, None, 2),
+    ('productos-detail', 'patch', lambda d: f"/api/productos/{d['producto'].id}/", 'admin',
+     lambda d: {'nombre': 'Renombrado'}, 9),
+    ('productos-detail', 'delete', lambda d: f"/api/productos/{d['producto'].id}/", 'admin', None, 12),
+    ('productos-agregar-precio', 'post',
+     lambda d: f"/api/productos/{d['producto'].id}/agregar_precio/", 'admin',
+     lambda d: {'moneda': 'EUR', 'precio': 10}, 10),
+    ('descargar-pdf', 'get', lambda d: '/api/inventario/descargar-pdf/', None, None, 1),
+    ('enviar-pdf', 'post', lambda d: '/api/inventario/enviar-pdf/', 'admin',
+     lambda d: {'email': 'destino@test.com'}, 2),
+    ('inventario-list', 'get', lambda d: '/api/inventario/', None, None, 1),
+    ('inventario-list', 'post', lambda d: '/api/inventario/', 'admin',
+     lambda d: {'empresa': d['empresa'].nit, 'producto': d['sin_inventario'].codigo,
+                'cantidad': 5}, 7),
+    ('inventario-estadisticas', 'get', lambda d: '/api/inventario/estadisticas/', None, None, 4),
+    ('inventario-por-empresa', 'get',
+     lambda d: f"/api/inventario/por_empresa/?nit={d['empresa'].nit}", None, None, 1),
+    ('inventario-detail', 'get', lambda d: f"/api/inventario/{d['inventario'].id}/", None, None, 1),
+    ('inventario-detail', 'patch', lambda d: f"/api/inventario/{d['inventario'].id}/", 'admin',
+     lambda d: {'cantidad': 7}, 5),
+    ('inventario-detail', 'delete', lambda d: f"/api/inventario/{d['inventario'].id}/", 'admin', None, 7),
+    ('inventario-incrementar', 'post',
+     lambda d: f"/api/inventario/{d['inventario'].id}/incrementar/", 'admin',
+     lambda d: {'cantidad': 2}, 5),
+    ('inventario-decrementar', 'post',
+     lambda d: f"/api/inventario/{d['inventario'].id}/decrementar/", 'admin',
+     lambda d: {'cantidad': 1}, 5),
+    ('blockchain-list', 'get', lambda d: '/api/blockchain/', None, None, 1),
+    ('blockchain-estadisticas', 'get', lambda d: '/api/blockchain/estadisticas/', None, None, 5),
+    ('blockchain-verificar', 'get', lambda d: '/api/blockchain/verificar/', None, None, 1),
+    ('blockchain-detail', 'get', lambda d: f"/api/blockchain/{d['bloque'].indice}/", None, None, 1),
+    ('registrar-transaccion', 'post', lambda d: '/api/blockchain/registrar/', 'admin',
+     lambda d: {'tipo': 'empresa_creada', 'datos': {'nit': '1'}}, 3),
+    ('chatbot', 'post', lambda d: '/api/chatbot/', None,
+     lambda d: {'message': 'hola', 'session_id': d['conversacion'].session_id}, 2),
+    ('historial-chat', 'get',
+     lambda d: f"/api/chatbot/historial/{d['conversacion'].session_id}/", None, None, 2),
+    ('conversaciones-list', 'get', lambda d: '/api/conversaciones/', 'admin', None, 2),
+    ('conversaciones-list-mensajes', 'get',
+     lambda d: '/api/conversaciones/?mensajes=true', 'admin', None, 3),
+    ('conversaciones-detail', 'get',
+     lambda d: f"/api/conversaciones/{d['conversacion'].id}/", 'admin', None, 3),
+    ('perfiles', 'get', lambda d: '/api/monitoring/perfiles/', 'admin', None, 1),
+    ('metrics', 'get', lambda d: '/metrics', None, None, 1),
+    ('schema-swagger-ui', 'get', lambda d: '/docs/', None, None, 0),
+    ('schema-redoc', 'get', lambda d: '/redocs/', None, None, 0),
+]
+
+
+def _nombres_de_rutas(patterns):
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            if pattern.namespace in RUTAS_EXCLUIDAS:
+                continue
+            yield from _nombres_de_rutas(pattern.url_patterns)
+        elif pattern.name:
+            yield pattern.name
+
+
+@pytest.fixture
+def datos(user_admin, user_externo):
+    """Base de datos con varios registros por tabla para detectar N+1"""
+    empresa = Empresa.objects.create(
+        nit='900100200-1', nombre='Empresa Base', direccion='Calle 1', telefono='3000000000'
+    )
+    otra = Empresa.objects.create(
+        nit='900100200-2', nombre='Otra Empresa', direccion='Calle 2', telefono='3000000001'
+    )
+    productos = []
+    for i in range(3):
+        for emp in (empresa, otra):
+            producto = Producto.objects.create(
+                codigo=f'{emp.nit}-P{i}', nombre=f'Producto {i}',
+                caracteristicas='Caracteristicas', empresa=emp
+            )
+            PrecioProducto.objects.create(producto=producto, moneda='COP', precio=1000 + i)
+            PrecioProducto.objects.create(producto=producto, moneda='USD', precio=1 + i)
+            productos.append(producto)
+    inventarios = [
+        Inventario.objects.create(empresa=p.empresa, producto=p, cantidad=i, ubicacion='Bodega')
+        for i, p in enumerate(productos[:-1])
+    ]
+    conversaciones = []
+    for i in range(3):
+        conversacion = ConversacionChat.objects.create(session_id=f'sesion-{i}', usuario=user_admin)
+        for j in range(3):
+            MensajeChat.objects.create(conversacion=conversacion, tipo='user', mensaje=f'Hola {j}')
+            MensajeChat.objects.create(conversacion=conversacion, tipo='bot', mensaje=f'Respuesta {j}')
+        conversaciones.append(conversacion)
+
+    refresh = RefreshToken.for_user(user_admin)
+    return {
+        'admin': user_admin,
+        'externo': user_externo,
+        'empresa': empresa,
+        'producto': productos[0],
+        'sin_inventario': productos[-1],
+        'inventario': inventarios[1],
+        'bloque': RegistroBlockchain.objects.first(),
+        'conversacion': conversaciones[0],
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
+
+
+@pytest.fixture
+def sin_webhook(monkeypatch):
+    """Simula que el webhook del chatbot no está disponible"""
+    import httpx
+
+    def _falla(*args, **kwargs):
+        raise httpx.ConnectError('webhook no disponible')
+
+    async def _afalla(*args, **kwargs):
+        _falla()
+
+    monkeypatch.setattr(httpx.Client, 'post', _falla)
+    monkeypatch.setattr(httpx.AsyncClient, 'post', _afalla)
+    circuito.reiniciar()
+    cache_respuestas.limpiar()
+    buffer_mensajes.limpiar()
+    yield
+    buffer_mensajes.limpiar()
+
+
+def test_todas_las_rutas_tienen_presupuesto():
+    """Test: Cada ruta de config/urls.py tiene al menos un caso de presupuesto"""
+    rutas = set(_nombres_de_rutas(get_resolver().url_patterns))
+    cubiertas = {caso[0] for caso in CASOS}
+    assert rutas - cubiertas == set()
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    'nombre,metodo,url,auth,payload,presupuesto',
+    CASOS,
+    ids=[f'{caso[0]}-{caso[1]}' for caso in CASOS]
+)
+def test_presupuesto_de_consultas(
+    datos, sin_webhook, query_budget, settings, nombre, metodo, url, auth, payload, presupuesto
+):
+    """Test: El endpoint no excede su presupuesto de consultas SQL"""
+    settings.METRICS_ENABLED = True
+    client = APIClient()
+    if auth == 'admin':
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {datos['access']}")
+
+    kwargs = {'format': 'json'} if payload else {}
+    data = payload(datos) if payload else None
+
+    with query_budget(presupuesto):
+        response = getattr(client, metodo)(url(datos), data, **kwargs)
+        if response.streaming:
+            # Las filas se consultan mientras se envía el cuerpo
+            b''.join(response.streaming_content)
+
+    assert response.status_code < 400, response.content
+
+
+@pytest.mark.django_db
+def test_cabeceras_de_consultas_en_debug(datos, settings):
+    """Test: Con DEBUG activo la respuesta expone las estadísticas SQL"""
+    settings.DEBUG = True
+    settings.QUERY_INSTRUMENTATION = True
+    response = APIClient().get('/api/productos/?stream=false')
+    assert response['X-DB-Query-Count'] == '2'
+    assert response['X-DB-Duplicate-Queries'] == '0'
+    assert float(response['X-DB-Query-Time-Ms']) >= 0
+
+
+@pytest.mark.django_db
+def test_cabeceras_de_consultas_bajo_asgi(datos, settings):
+    """Test: Bajo ASGI el middleware corre asíncrono y cuenta las consultas del ORM"""
+    settings.DEBUG = True
+    settings.QUERY_INSTRUMENTATION = True
+
+    async def vista(request):
+        return HttpResponse()
+
+    assert iscoroutinefunction(QueryCountMiddleware(vista))
+    response = async_to_sync(AsyncClient().get)('/api/productos/?stream=false')
+    assert response['X-DB-Query-Count'] == '2'
+
+
+def test_huella_ignora_literales_y_listas_in():
+    """Test: Consultas con distintos parámetros comparten huella"""
+    from apps.monitoring.queries import fingerprint
+    assert fingerprint("SELECT * FROM t WHERE id IN (%s, %s) LIMIT 21") == \
+        fingerprint("SELECT *  FROM t WHERE id IN (%s) LIMIT 1")
@@ -0,0 +1,73 @@
+"""
+Tests del renderer JSON rápido.
+
+La salida debe ser byte a byte igual a la del JSONRenderer de DRF.
+"""
+import datetime
+import decimal
+import uuid
+import zoneinfo
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from infrastructure.renderers import FastJSONRenderer
+
+
+DATOS = {
+    'decimal': decimal.Decimal('12.50'),
+    'entero_decimal': decimal.Decimal('50000'),
+    'utc': datetime.datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=datetime.timezone.utc),
+    'bogota': datetime.datetime(2025, 1, 2, 3, 4, 5, tzinfo=zoneinfo.ZoneInfo('America/Bogota')),
+    'ingenuo': datetime.datetime(2025, 1, 2, 3, 4, 5),
+    'fecha': datetime.date(2025, 1, 2),
+    'duracion': datetime.timedelta(minutes=3),
+    'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+    'texto': 'Compañía\u2028línea',
+    'datos': {'nit': '900', 'precios': [1.5, 2, None, True], 3: 'clave numérica'},
+    'tupla': ('a', 'b'),
+}
+
+
+class TestFastJSONRenderer:
+    """Tests de equivalencia con JSONRenderer"""
+
+    def test_salida_identica(self):
+        assert FastJSONRenderer().render(DATOS) == JSONRenderer().render(DATOS)
+
+    def test_lista_de_registros(self):
+        registros = [dict(DATOS, indice=i) for i in range(50)]
+        assert FastJSONRenderer().render(registros) == JSONRenderer().render(registros)
+
+    def test_indentacion_usa_renderer_estandar(self):
+        contexto = {'indent': 4}
+        assert FastJSONRenderer().render(DATOS, renderer_context=contexto) == \
+            JSONRenderer().render(DATOS, renderer_context=contexto)
+
+    def test_entero_grande_usa_renderer_estandar(self):
+        datos = {'grande': 2 ** 70}
+        assert FastJSONRenderer().render(datos) == JSONRenderer().render(datos)
+
+    def test_none_es_vacio(self):
+        assert FastJSONRenderer().render(None) == b''
+
+    @pytest.mark.parametrize('valor', [float('nan'), float('inf'), decimal.Decimal('-Infinity')])
+    def test_no_finitos_lanzan_error_como_drf(self, valor):
+        datos = {'precios': [1.5, None, valor]}
+        with pytest.raises(ValueError):
+            JSONRenderer().render(datos)
+        with pytest.raises(ValueError):
+            FastJSONRenderer().render(datos)
+
+    def test_no_finitos_sin_strict_json(self, monkeypatch):
+        datos = {'precio': float('nan')}
+        monkeypatch.setattr(JSONRenderer, 'strict', False)
+        assert FastJSONRenderer().render(datos) == JSONRenderer().render(datos)
+
+
+@pytest.mark.django_db
+def test_api_usa_renderer_rapido(client):
+    """Test: Las respuestas de la API se generan con FastJSONRenderer"""
+    response = client.get('/api/empresas/')
+    assert isinstance(response.accepted_renderer, FastJSONRenderer)
+    assert response.json() == []
@@ -0,0 +1,164 @@
+"""
+Tests del ruteo de lecturas a réplicas.
+
+El primario es la base de pruebas y cada réplica un archivo SQLite aparte
+que ``replicar`` actualiza con una copia del primario: lo escrito después
+de replicar solo está en el primario. La copia usa ``backup()`` de
+sqlite3, así que los tests que replican solo corren con el primario en
+SQLite.
+"""
+import sqlite3
+
+import pytest
+from django.db import connection, connections, transaction
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from application.use_cases import EmpresaUseCases, InventarioUseCases
+from apps.empresas.models import Empresa
+from apps.inventario.models import Inventario
+from apps.productos.models import Producto
+from infrastructure.circuit_breaker import ABIERTO
+from infrastructure.replicas import COOKIE_PRIMARIO, ReplicaMiddleware, replicas
+
+solo_sqlite = pytest.mark.skipif(
+    connection.vendor != 'sqlite', reason='replicar copia el primario con el backup de SQLite'
+)
+
+
+def _empresa(nit):
+    return Empresa.objects.create(nit=nit, nombre=f'Empresa {nit}', direccion='Calle', telefono='300')
+
+
+@pytest.fixture
+def configurar_replicas(transactional_db, settings, tmp_path):
+    """Devuelve una función que registra réplicas SQLite (archivos en tmp_path)"""
+    aliases = []
+
+    def configurar(*nombres):
+        for nombre in nombres:
+            alias = f'replica_prueba_{len(aliases) + 1}'
+            config = connections.configure_settings({
+                'default': connections.settings['default'],
+                alias: {'ENGINE': 'django.db.backends.sqlite3', 'NAME': str(tmp_path / nombre)},
+            })[alias]
+            # Conexión creada a mano (no figura en DATABASES): la base de pruebas no la bloquea
+            setattr(connections._connections, alias, DatabaseWrapper(config, alias))
+            aliases.append(alias)
+        settings.DATABASE_REPLICAS = list(aliases)
+        settings.DATABASE_ROUTERS = ['infrastructure.replicas.RouterReplicas']
+        return aliases
+
+    replicas.reiniciar()
+    yield configurar
+    for alias in aliases:
+        connections[alias].close()
+        del connections[alias]
+    replicas.reiniciar()
+
+
+def replicar(*aliases):
+    """Copia el contenido actual del primario a las réplicas"""
+    primario = connections['default']
+    primario.ensure_connection()
+    for alias in aliases:
+        destino = sqlite3.connect(connections[alias].settings_dict['NAME'])
+        primario.connection.backup(destino)
+        destino.close()
+
+
+@pytest.fixture
+def replica(configurar_replicas):
+    """Una réplica con una empresa; el primario tiene además una segunda"""
+    alias, = configurar_replicas('replica.sqlite3')
+    _empresa('900-1')
+    replicar(alias)
+    _empresa('900-2')
+    return alias
+
+
+class TestRouterReplicas:
+    """Tests del ruteo de los casos de uso de solo lectura"""
+
+    @solo_sqlite
+    def test_las_lecturas_van_a_la_replica(self, replica):
+        """Test: Los casos de uso de solo lectura no ven lo que aún no se replicó"""
+        assert EmpresaUseCases().contar_empresas() == 1
+        assert [f.nit for f in EmpresaUseCases().listar_filas()] == ['900-1']
+        # Las escrituras y las lecturas que no son casos de uso van al primario
+        assert Empresa.objects.count() == 2
+
+    @solo_sqlite
+    def test_iterador_perezoso_lee_de_la_replica(self, replica):
+        """Test: Las consultas de iterar_filas al recorrerlo después usan la réplica elegida"""
+        for nit in ('900-1', '900-2'):
+            producto = Producto.objects.create(
+                codigo=f'P-{nit}', nombre='Producto', caracteristicas='', empresa_id=nit
+            )
+            Inventario.objects.create(empresa_id=nit, producto=producto, cantidad=1)
+        replicar(replica)
+        Inventario.objects.filter(empresa_id='900-2').delete()
+
+        filas = InventarioUseCases().iterar_filas()
+        assert sorted(f.empresa for f in filas) == ['900-1', '900-2']
+
+    @solo_sqlite
+    def test_transaccion_abierta_lee_del_primario(self, replica):
+        """Test: Dentro de transaction.atomic las lecturas ven lo escrito en la transacción"""
+        with transaction.atomic():
+            assert EmpresaUseCases().contar_empresas() == 2
+
+    @solo_sqlite
+    def test_round_robin(self, configurar_replicas):
+        """Test: Las llamadas se reparten por turnos entre las réplicas"""
+        primera, segunda = configurar_replicas('a.sqlite3', 'b.sqlite3')
+        _empresa('900-1')
+        replicar(primera)
+        _empresa('900-2')
+        replicar(segunda)
+
+        conteos = [EmpresaUseCases().contar_empresas() for _ in range(4)]
+        assert sorted(conteos[:2]) == [1, 2]
+        assert conteos[2:] == conteos[:2]
+
+    def test_replica_caida_usa_el_primario(self, configurar_replicas):
+        """Test: Si la réplica no acepta conexiones se lee del primario y queda fuera"""
+        alias, = configurar_replicas('no-existe/replica.sqlite3')
+        _empresa('900-1')
+
+        assert EmpresaUseCases().contar_empresas() == 1
+        assert replicas.circuito(alias).estado == ABIERTO
+
+
+class TestReadYourWrites:
+    """Tests de la fijación al primario después de escribir"""
+
+    @solo_sqlite
+    def test_request_que_escribe_lee_del_primario(self, replica, settings):
+        """Test: Tras escribir, el request lee del primario y responde con la cookie"""
+        def vista(request):
+            _empresa('900-3')
+            return HttpResponse(str(EmpresaUseCases().contar_empresas()))
+
+        response = ReplicaMiddleware(vista)(RequestFactory().get('/'))
+        assert response.content == b'3'
+        assert response.cookies[COOKIE_PRIMARIO]['max-age'] == settings.DB_REPLICA_PIN_SECONDS
+
+    @solo_sqlite
+    def test_cookie_fija_los_requests_siguientes(self, replica):
+        """Test: Con la cookie de una escritura reciente la lectura va al primario"""
+        middleware = ReplicaMiddleware(
+            lambda request: HttpResponse(str(EmpresaUseCases().contar_empresas()))
+        )
+        assert middleware(RequestFactory().get('/')).content == b'1'
+        con_cookie = RequestFactory(headers={'cookie': f'{COOKIE_PRIMARIO}=1'}).get('/')
+        assert middleware(con_cookie).content == b'2'
+
+    def test_sin_replicas_el_middleware_no_se_instala(self, settings):
+        """Test: Sin réplicas configuradas el middleware no agrega costo"""
+        from django.core.exceptions import MiddlewareNotUsed
+
+        settings.DATABASE_REPLICAS = []
+        with pytest.raises(MiddlewareNotUsed):
+            ReplicaMiddleware(lambda request: HttpResponse())
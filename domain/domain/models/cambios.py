@@ -0,0 +1,53 @@
+"""
+Actualizaciones parciales de entidades del dominio.
+
+Los casos de uso de actualización asignan los valores nuevos con
+``aplicar_cambios`` y escriben con ``guardar_cambios`` solo las columnas
+que cambiaron; si nada cambió no se escribe. Hasta el siguiente ``save()``
+la diferencia queda en ``cambios``, de donde la lee la auditoría
+(la señal que agrega el bloque a la blockchain).
+"""
+
+
+class SeguimientoDeCambios:
+    """Mixin para modelos del dominio: cambios por campo y guardado parcial"""
+
+    # {campo: (anterior, nuevo)} de la última llamada a aplicar_cambios
+    cambios = None
+
+    def normalizar(self):
+        """Normaliza los valores antes de guardar (p. ej. quita espacios)"""
+
+    def aplicar_cambios(self, **valores):
+        """
+        Asigna los valores (los None se ignoran) y devuelve los que cambiaron.
+
+        La comparación se hace después de normalizar: " Bodega " no es un
+        cambio si el valor guardado es "Bodega".
+        """
+        valores = {campo: valor for campo, valor in valores.items() if valor is not None}
+        anteriores = {campo: getattr(self, campo) for campo in valores}
+        for campo, valor in valores.items():
+            setattr(self, campo, valor)
+        self.normalizar()
+        self.cambios = {
+            campo: (anterior, getattr(self, campo))
+            for campo, anterior in anteriores.items()
+            if getattr(self, campo) != anterior
+        }
+        return self.cambios
+
+    def guardar_cambios(self):
+        """Escribe solo las columnas cambiadas (y updated_at); False si no había cambios"""
+        if not self.cambios:
+            return False
+        campos = set(self.cambios)
+        if any(campo.name == 'updated_at' for campo in self._meta.concrete_fields):
+            campos.add('updated_at')
+        self.save(update_fields=campos)
+        return True
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # La auditoría ya leyó la diferencia en post_save
+        self.cambios = None
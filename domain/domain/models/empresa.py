@@ -10,8 +10,11 @@ deben importar desde aquí usando: from domain.models import Empresa
 from django.db import models
 from django.core.exceptions import ValidationError
 
+from domain.models.cambios import SeguimientoDeCambios
+from domain.models.validacion import ValidacionDominio
 
-class Empresa(models.Model):
+
+class Empresa(ValidacionDominio, SeguimientoDeCambios, models.Model):
     """
     Modelo para empresas.
 
@@ -57,9 +60,13 @@ class Empresa(models.Model):
         if not self.telefono or not self.telefono.strip():
             raise ValidationError({'telefono': 'El teléfono no puede estar vacío'})
 
-    def save(self, *args, **kwargs):
+    def normalizar(self):
+        """Quita los espacios de los extremos de los textos"""
         self.nombre = self.nombre.strip() if self.nombre else ''
         self.direccion = self.direccion.strip() if self.direccion else ''
         self.telefono = self.telefono.strip() if self.telefono else ''
-        self.full_clean()
+
+    def save(self, *args, **kwargs):
+        self.normalizar()
+        self.validar()
         super().save(*args, **kwargs)
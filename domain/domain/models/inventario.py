@@ -9,8 +9,11 @@ deben importar desde aquí usando: from domain.models import Inventario
 from django.db import models
 from django.core.exceptions import ValidationError
 
+from domain.models.cambios import SeguimientoDeCambios
+from domain.models.validacion import ValidacionDominio
 
-class Inventario(models.Model):
+
+class Inventario(ValidacionDominio, SeguimientoDeCambios, models.Model):
     """
     Modelo para inventario de productos por empresa.
 
@@ -49,6 +52,16 @@ class Inventario(models.Model):
         verbose_name_plural = 'Inventarios'
         unique_together = ['empresa', 'producto']
         ordering = ['empresa', 'producto']
+        indexes = [
+            # Filtros de stock (cantidad__gt=0 en listados y estadísticas)
+            models.Index(fields=['cantidad'], name='inventario_cantidad_idx'),
+            # Índice parcial: solo los registros sin stock, en el orden del listado
+            models.Index(
+                fields=['empresa', 'producto'],
+                condition=models.Q(cantidad=0),
+                name='inventario_sin_stock_idx',
+            ),
+        ]
 
     def __str__(self):
         return f"{self.empresa.nombre} - {self.producto.nombre}: {self.cantidad}"
@@ -58,17 +71,21 @@ class Inventario(models.Model):
         if self.cantidad < 0:
             raise ValidationError({'cantidad': 'La cantidad no puede ser negativa'})
 
-    def save(self, *args, **kwargs):
+    def normalizar(self):
+        """Quita los espacios de los extremos de los textos"""
         self.ubicacion = self.ubicacion.strip() if self.ubicacion else ''
-        self.full_clean()
+
+    def save(self, *args, **kwargs):
+        self.normalizar()
+        self.validar()
         super().save(*args, **kwargs)
 
     def agregar_stock(self, cantidad: int) -> None:
         """Agrega stock al inventario"""
         if cantidad < 0:
             raise ValidationError({'cantidad': 'La cantidad a agregar no puede ser negativa'})
-        self.cantidad += cantidad
-        self.save()
+        self.aplicar_cambios(cantidad=self.cantidad + cantidad)
+        self.guardar_cambios()
 
     def remover_stock(self, cantidad: int) -> None:
         """Remueve stock del inventario"""
@@ -76,5 +93,5 @@ class Inventario(models.Model):
             raise ValidationError({'cantidad': 'La cantidad a remover no puede ser negativa'})
         if cantidad > self.cantidad:
             raise ValidationError({'cantidad': 'No hay suficiente stock disponible'})
-        self.cantidad -= cantidad
-        self.save()
+        self.aplicar_cambios(cantidad=self.cantidad - cantidad)
+        self.guardar_cambios()
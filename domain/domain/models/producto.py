@@ -9,8 +9,11 @@ deben importar desde aquí usando: from domain.models import Producto, PrecioPro
 from django.db import models
 from django.core.exceptions import ValidationError
 
+from domain.models.cambios import SeguimientoDeCambios
+from domain.models.validacion import ValidacionDominio
 
-class Producto(models.Model):
+
+class Producto(ValidacionDominio, SeguimientoDeCambios, models.Model):
     """
     Modelo para productos.
 
@@ -41,6 +44,10 @@ class Producto(models.Model):
         verbose_name = 'Producto'
         verbose_name_plural = 'Productos'
         ordering = ['nombre']
+        indexes = [
+            # Productos de una empresa en el orden por defecto (listar_por_empresa)
+            models.Index(fields=['empresa', 'nombre'], name='producto_empresa_nombre_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre} ({self.codigo})"
@@ -53,15 +60,19 @@ class Producto(models.Model):
         if not self.codigo or not self.codigo.strip():
             raise ValidationError({'codigo': 'El código del producto no puede estar vacío'})
 
-    def save(self, *args, **kwargs):
+    def normalizar(self):
+        """Quita los espacios de los extremos de los textos"""
         self.nombre = self.nombre.strip() if self.nombre else ''
         self.codigo = self.codigo.strip() if self.codigo else ''
         self.caracteristicas = self.caracteristicas.strip() if self.caracteristicas else ''
-        self.full_clean()
+
+    def save(self, *args, **kwargs):
+        self.normalizar()
+        self.validar()
         super().save(*args, **kwargs)
 
 
-class PrecioProducto(models.Model):
+class PrecioProducto(ValidacionDominio, models.Model):
     """
     Modelo para precios en múltiples monedas.
 
@@ -103,5 +114,5 @@ class PrecioProducto(models.Model):
             raise ValidationError({'precio': 'El precio no puede ser negativo'})
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        self.validar()
         super().save(*args, **kwargs)
@@ -64,6 +64,14 @@ class User(AbstractUser):
         choices=ROLE_CHOICES,
         default='externo'
     )
+    token_version = models.PositiveIntegerField(
+        'Versión de tokens',
+        default=0,
+        help_text='Se incrementa al cambiar datos embebidos en los tokens; invalida los emitidos'
+    )
+
+    # Campos cuyo cambio revoca los tokens emitidos
+    CAMPOS_DE_TOKEN = ('email', 'role', 'is_superuser', 'is_active', 'password')
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = []
@@ -80,6 +88,25 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._valores_de_token = instance._leer_valores_de_token()
+        return instance
+
+    def _leer_valores_de_token(self):
+        return tuple(self.__dict__.get(campo) for campo in self.CAMPOS_DE_TOKEN)
+
+    def save(self, *args, **kwargs):
+        """Incrementa token_version si cambió algún campo de CAMPOS_DE_TOKEN"""
+        previos = getattr(self, '_valores_de_token', None)
+        if previos is not None and previos != self._leer_valores_de_token():
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+        super().save(*args, **kwargs)
+        self._valores_de_token = self._leer_valores_de_token()
+
     def clean(self):
         """Validaciones de reglas de negocio"""
         if not self.email or not self.email.strip():
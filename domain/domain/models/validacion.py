@@ -0,0 +1,24 @@
+"""
+Validación de entidades del dominio sin consultas a la base de datos.
+
+``full_clean()`` completo consulta la base de datos para verificar las
+llaves foráneas y las restricciones de unicidad. Las escrituras internas
+(casos de uso) no lo necesitan: la base de datos ya garantiza ambas cosas
+y los casos de uso traducen la violación a una excepción de dominio. El
+``full_clean()`` completo queda para los caminos con datos no confiables,
+como los formularios del admin, que lo ejecutan por su cuenta.
+"""
+
+
+class ValidacionDominio:
+    """Mixin para modelos del dominio: validación en Python antes de guardar"""
+
+    def validar(self):
+        """
+        Valida los campos y las reglas de negocio de ``clean()`` sin consultas.
+
+        Omite las llaves foráneas, la unicidad y las restricciones del
+        modelo, que verifica la base de datos al escribir.
+        """
+        relaciones = [campo.name for campo in self._meta.concrete_fields if campo.is_relation]
+        self.full_clean(exclude=relaciones, validate_unique=False, validate_constraints=False)